@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 
@@ -21,10 +22,21 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Admin catalog-import uploads; kept out of MEDIA_ROOT so they are never served
+IMPORT_UPLOAD_ROOT = BASE_DIR / "private"
+
 
 CKEDITOR_UPLOAD_PATH = "uploads/"   # media/uploads/...
 CKEDITOR_IMAGE_BACKEND = "pillow"   # make sure pillow is installed
 
+# Question/Choice image downscaling (configurator/quiz_media.py). Each web
+# worker process that receives an upload starts its own pool: QUIZ_IMAGE_WORKERS
+# spawned processes plus as many dispatcher threads, so N web workers can hold
+# up to N * QUIZ_IMAGE_WORKERS extra processes. Set QUIZ_IMAGE_POOL = False to
+# resize inline after commit instead (e.g. on small hosts).
+QUIZ_IMAGE_POOL = True
+QUIZ_IMAGE_WORKERS = 2
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -53,6 +65,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # 304s from the views' Last-Modified (catalog versions) for requests the page cache skips
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -99,6 +113,35 @@ DATABASES = {
 }
 
 
+# Cache
+# File-based so cached pages, facet payloads and snapshots are shared by every
+# worker on the host; MAX_ENTRIES is sized for one entry per public URL and
+# variant-builder selection. Version counters get their own alias so culling
+# never drops them: Redis (atomic incr/add) when REDIS_URL is set, else a
+# separate file cache that never reaches its cap. The file fallback has no
+# atomic incr, so versioning.py bumps it by writing a fresh clock value; run
+# multi-worker or multi-host deployments with REDIS_URL set.
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'configsite',
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -1,10 +1,12 @@
 from django.utils.html import format_html
 from django.contrib import admin, messages
-from django.urls import path
-from django.shortcuts import redirect, render
+from django.urls import path, reverse
+from django.shortcuts import get_object_or_404, redirect, render
 from django import forms
 from django.db import transaction
-from django.http import HttpResponse
+from django.core.validators import FileExtensionValidator
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
 from .models import (
     ProductGroup,
     Item,
@@ -19,7 +21,9 @@ from .models import (
     ItemFeature, ItemVariantImage,
 ItemVariantSpec, ItemVariantDocument, ItemVariant
 )
-from .models import Page,ERPSettings,ContactMessage
+from .models import Page,ERPSettings,ContactMessage,ERPOutbox,ImportJob,JobOpening
+from .import_jobs import enqueue as enqueue_import
+from .importers import UPLOAD_EXTENSIONS
 from django import forms
 from .models import Question, Choice
 
@@ -82,12 +86,86 @@ class ItemVariantInline(admin.StackedInline):
 
 @admin.register(ItemVariant)
 class ItemVariantAdmin(admin.ModelAdmin):
+    change_list_template = "admin/configurator/itemvariant/change_list.html"
     list_display = ("name", "item", "code", "is_active")
     list_filter = ("is_active", "item__group")
     search_fields = ("name", "code", "item__name")
     autocomplete_fields = ("item",)
     inlines = [ItemVariantImageInline, ItemVariantSpecInline, ItemVariantDocumentInline]
 
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context["import_url"] = "admin:configurator_itemvariant_import"
+        return super().changelist_view(request, extra_context=extra_context)
+
+    # ---- Bulk import (variants + specs) ----
+    class ImportForm(forms.Form):
+        file = forms.FileField(
+            validators=[FileExtensionValidator(UPLOAD_EXTENSIONS)],
+            help_text="Upload a .csv or .xlsx file. Columns: item_code, variant_code, variant_name, description, is_active, specs"
+        )
+        mode = forms.ChoiceField(
+            choices=[("upsert", "Upsert (create or update)"),
+                     ("create", "Create only"),
+                     ("update", "Update only")],
+            initial="upsert",
+        )
+        clear_specs = forms.BooleanField(
+            required=False,
+            help_text="If checked, replace existing specs with the uploaded list for each variant."
+        )
+        dry_run = forms.BooleanField(
+            required=False,
+            help_text="Only report what would be created/updated (with field-level changes); nothing is saved."
+        )
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path("import/", self.admin_site.admin_view(self.import_variants), name="configurator_itemvariant_import"),
+            path("import/template/", self.admin_site.admin_view(self.variants_template_csv),
+                 name="configurator_itemvariant_template"),
+        ]
+        return my_urls + urls
+
+    def variants_template_csv(self, request):
+        import csv
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="variants_import_template.csv"'
+
+        writer = csv.writer(response)
+        writer.writerow(["item_code", "variant_code", "variant_name", "description", "is_active", "specs"])
+        writer.writerow([
+            "LPB-014", "LPB-014-I5-8", "ProBook 14 i5 / 8GB", "", "1",
+            "label=CPU|value=Intel i5; label=RAM|value=8|unit=GB|highlight=1; label=Storage|value=512|unit=GB"
+        ])
+        writer.writerow([
+            "LPB-014", "LPB-014-I7-16", "ProBook 14 i7 / 16GB", "", "1",
+            "label=CPU|value=Intel i7; label=RAM|value=16|unit=GB|highlight=1; label=Storage|value=1|unit=TB"
+        ])
+        return response
+
+    def import_variants(self, request):
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import Item Variants from CSV/XLSX",
+        }
+        if request.method == "POST":
+            form = self.ImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                job = enqueue_import(
+                    ImportJob.KIND_VARIANTS, form.cleaned_data["file"],
+                    {"mode": form.cleaned_data["mode"], "clear_specs": form.cleaned_data["clear_specs"]},
+                    dry_run=form.cleaned_data["dry_run"], user=request.user,
+                )
+                return redirect("admin:configurator_importjob_progress", job.pk)
+        else:
+            form = self.ImportForm()
+
+        context["form"] = form
+        return render(request, "admin/import_variants.html", context)
+
 
 
 
@@ -172,8 +250,8 @@ class ChoiceInline(admin.TabularInline):
     model = Choice
     extra = 2
     show_change_link = True
-    fields = ("order", "text", "is_active", "image", "img_thumb", "image_width", "image_height")
-    readonly_fields = ("img_thumb", "image_width", "image_height")
+    fields = ("order", "text", "is_active", "image", "img_thumb", "image_status", "image_width", "image_height")
+    readonly_fields = ("img_thumb", "image_status", "image_width", "image_height")
 
     def img_thumb(self, obj):
         if obj and obj.image:
@@ -250,6 +328,7 @@ class ItemAdmin(admin.ModelAdmin):
     # ---- Custom import view ----
     class ImportForm(forms.Form):
         file = forms.FileField(
+            validators=[FileExtensionValidator(UPLOAD_EXTENSIONS)],
             help_text="Upload a .csv or .xlsx file. Columns: group_name, item_name, item_code, description, is_active, features, specs"
         )
         mode = forms.ChoiceField(
@@ -272,31 +351,10 @@ class ItemAdmin(admin.ModelAdmin):
             required=False,
             help_text="If checked, replace existing specs with the uploaded list for each item."
         )
-
-    def _parse_specs(self, raw: str):
-        """
-        Parse 'specs' column into a list of dicts:
-          Required: label, value
-          Optional: unit, order, highlight
-        Format per spec (pipe-separated k=v), multiple specs separated by ';'
-          Example: label=CPU|value=Intel i5|unit=—|order=1|highlight=0
-        """
-        specs = []
-        raw = (raw or "").strip()
-        if not raw:
-            return specs
-
-        items = [p.strip() for p in raw.split(";") if p.strip()]
-        for it in items:
-            parts = [p.strip() for p in it.split("|") if p.strip()]
-            kv = {}
-            for part in parts:
-                if "=" in part:
-                    k, v = part.split("=", 1)
-                    kv[k.strip().lower()] = v.strip()
-            if "label" in kv and "value" in kv:
-                specs.append(kv)
-        return specs
+        dry_run = forms.BooleanField(
+            required=False,
+            help_text="Only report what would be created/updated (with field-level changes); nothing is saved."
+        )
 
     def get_urls(self):
         urls = super().get_urls()
@@ -353,118 +411,14 @@ class ItemAdmin(admin.ModelAdmin):
                 sep = (form.cleaned_data["feature_separator"] or ";").strip()
                 clear_specs = form.cleaned_data.get("clear_specs", False)
 
-                try:
-                    rows = self._read_rows(f)
-                except Exception as e:
-                    messages.error(request, f"Could not read file: {e}")
-                    context["form"] = form
-                    return render(request, "admin/import_items.html", context)
-
-                created, updated, skipped = 0, 0, 0
-                errors = []
-
-                with transaction.atomic():
-                    for i, row in enumerate(rows, start=2):  # assume header at row 1
-                        try:
-                            group_name = (row.get("group_name") or "").strip()
-                            item_name  = (row.get("item_name") or "").strip()
-                            item_code  = (row.get("item_code") or "").strip() or None
-                            description = (row.get("description") or "").strip()
-                            is_active = str(row.get("is_active") or "").strip().lower()
-
-                            # interpret is_active
-                            is_active_val = True
-                            if is_active in ("", "true", "1", "yes", "y"):
-                                is_active_val = True
-                            elif is_active in ("false", "0", "no", "n"):
-                                is_active_val = False
-
-                            features_raw = row.get("features") or ""
-                            features_list = self._split_features(features_raw, sep)
-
-                            specs_raw = (row.get("specs") or "").strip()
-                            specs_list = self._parse_specs(specs_raw)
-
-                            if not group_name or not item_name:
-                                skipped += 1
-                                continue
-
-                            group, _ = ProductGroup.objects.get_or_create(name=group_name)
-
-                            # Matching priority: item_code (if provided), else (group, name)
-                            item_qs = Item.objects.all()
-                            item_obj = None
-                            if item_code:
-                                item_obj = item_qs.filter(item_code=item_code).first()
-                            if not item_obj:
-                                item_obj = item_qs.filter(group=group, name=item_name).first()
-
-                            if item_obj:
-                                if mode == "create":
-                                    skipped += 1
-                                    continue
-                                # update
-                                item_obj.name = item_name
-                                item_obj.group = group
-                                item_obj.description = description
-                                item_obj.is_active = is_active_val
-                                if item_code:
-                                    item_obj.item_code = item_code
-                                item_obj.save()
-                                updated += 1
-                            else:
-                                if mode == "update":
-                                    skipped += 1
-                                    continue
-                                # create
-                                item_obj = Item.objects.create(
-                                    group=group,
-                                    name=item_name,
-                                    item_code=item_code,
-                                    description=description,
-                                    is_active=is_active_val,
-                                )
-                                created += 1
-
-                            # features
-                            if clear_features:
-                                item_obj.features.all().delete()
-
-                            for ft in features_list:
-                                if ft:
-                                    ItemFeature.objects.get_or_create(item=item_obj, text=ft)
-
-                            # NEW: specs (uses related_name="specs" on ItemSpec)
-                            if clear_specs:
-                                item_obj.specs.all().delete()  # ItemSpec FK uses related_name="specs"
-
-                            for sp in specs_list:
-                                lbl = sp.get("label")
-                                val = sp.get("value", "")
-                                if not lbl:
-                                    continue
-                                spec_obj, _ = ItemSpec.objects.get_or_create(item=item_obj, label=lbl)
-                                spec_obj.value = val
-                                if "unit" in sp:
-                                    spec_obj.unit = sp["unit"]
-                                if "order" in sp:
-                                    try:
-                                        spec_obj.order = int(sp["order"])
-                                    except Exception:
-                                        pass
-                                if "highlight" in sp:
-                                    spec_obj.highlight = str(sp["highlight"]).strip().lower() in ("1", "true", "yes",
-                                                                                                  "y")
-                                spec_obj.save()
-
-                        except Exception as e:
-                            errors.append(f"Row {i}: {e}")
-
-                if errors:
-                    for e in errors:
-                        messages.error(request, e)
-                messages.success(request, f"Import complete — created: {created}, updated: {updated}, skipped: {skipped}")
-                return redirect("admin:configurator_item_changelist")
+                # Runs in the background; the progress page polls the job
+                job = enqueue_import(
+                    ImportJob.KIND_ITEMS, f,
+                    {"mode": mode, "clear_features": clear_features, "clear_specs": clear_specs,
+                     "feature_separator": sep},
+                    dry_run=form.cleaned_data["dry_run"], user=request.user,
+                )
+                return redirect("admin:configurator_importjob_progress", job.pk)
         else:
             form = self.ImportForm()
 
@@ -473,48 +427,6 @@ class ItemAdmin(admin.ModelAdmin):
         # We render a very small form inline.
         return render(request, "admin/import_items.html", context)
 
-    # --- helpers ---
-    def _read_rows(self, uploaded_file):
-        name = (uploaded_file.name or "").lower()
-        if name.endswith(".csv"):
-            import csv, io
-            text = uploaded_file.read().decode("utf-8-sig")
-            reader = csv.DictReader(io.StringIO(text))
-            return list(reader)
-        elif name.endswith(".xlsx"):
-            try:
-                import openpyxl
-            except ImportError:
-                raise RuntimeError("openpyxl is required for .xlsx files. Install with: pip install openpyxl")
-            wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
-            ws = wb.active
-            headers = [str(c.value).strip() if c.value is not None else "" for c in next(ws.iter_rows(min_row=1, max_row=1))]
-            rows = []
-            for r in ws.iter_rows(min_row=2, values_only=True):
-                row = {headers[i]: ("" if val is None else str(val)) for i, val in enumerate(r)}
-                rows.append(row)
-            return rows
-        else:
-            raise RuntimeError("Unsupported file type. Please upload .csv or .xlsx")
-
-    def _split_features(self, raw: str, sep: str):
-        import re
-        raw = str(raw or "")
-        parts = []
-        # split on chosen separator or newlines
-        if sep:
-            parts.extend([p.strip() for p in str(raw).split(sep)])
-        # also split on newlines
-        nl_parts = re.split(r"[\r\n]+", raw)
-        for p in nl_parts:
-            p = p.strip()
-            if p and p not in parts:
-                parts.append(p)
-        # dedupe empties
-        return [p for p in parts if p]
-
-
-
 
 # =========================
 # Question
@@ -545,10 +457,10 @@ class QuestionAdmin(admin.ModelAdmin):
             "description": "Show this question only if the selected parent’s specific choice(s) are chosen."
         }),
         ("Image", {
-            "fields": ("image", "img_thumb", "image_width", "image_height")
+            "fields": ("image", "img_thumb", "image_status", "image_error", "image_width", "image_height")
         }),
     )
-    readonly_fields = ("img_thumb", "image_width", "image_height")
+    readonly_fields = ("img_thumb", "image_status", "image_error", "image_width", "image_height")
 
     def depends_on_display(self, obj):
         return obj.depends_on.text if obj.depends_on_id else "—"
@@ -577,6 +489,7 @@ class QuestionAdmin(admin.ModelAdmin):
     # -------- Import form for Questions --------
     class QuestionImportForm(forms.Form):
         file = forms.FileField(
+            validators=[FileExtensionValidator(UPLOAD_EXTENSIONS)],
             help_text=(
                 "Upload .csv or .xlsx with columns: "
                 "group_name, text, input_type, choices, is_required, is_active, affects_score, order, question_tag"
@@ -599,6 +512,10 @@ class QuestionAdmin(admin.ModelAdmin):
             initial=";",
             help_text="Separator for multiple choices (default ';'). Newlines also work."
         )
+        dry_run = forms.BooleanField(
+            required=False,
+            help_text="Only report what would be created/updated (with field-level changes); nothing is saved."
+        )
 
     def get_urls(self):
         urls = super().get_urls()
@@ -659,188 +576,18 @@ class QuestionAdmin(admin.ModelAdmin):
                 clear_choices = form.cleaned_data["clear_choices"]
                 sep = (form.cleaned_data["choices_separator"] or ";").strip()
 
-                try:
-                    rows = self._read_rows(uploaded)
-                except Exception as e:
-                    messages.error(request, f"Could not read file: {e}")
-                    context["form"] = form
-                    return render(request, "admin/import_questions.html", context)
-
-                created, updated, skipped = 0, 0, 0
-                errors = []
-
-                from .models import ProductGroup, Question, Choice  # local import to avoid cycles
-
-                with transaction.atomic():
-                    for i, row in enumerate(rows, start=2):  # header at row 1
-                        try:
-                            group_name = (row.get("group_name") or "").strip()
-                            text = (row.get("text") or "").strip()
-                            input_type_raw = (row.get("input_type") or "").strip().lower()
-                            choices_raw = row.get("choices") or ""
-                            is_required = self._parse_bool(row.get("is_required"))
-                            is_active = self._parse_bool(row.get("is_active"))
-                            affects_score = self._parse_bool(row.get("affects_score"))
-                            order_val = self._parse_int(row.get("order"), default=0)
-                            question_tag = (row.get("question_tag") or "").strip()
-
-                            if not group_name or not text:
-                                skipped += 1
-                                continue
-
-                            group, _ = ProductGroup.objects.get_or_create(name=group_name)
-
-                            # normalize input_type
-                            if input_type_raw in ("multi", "multiple", "checkbox", "checkboxes"):
-                                input_type_val = Question.INPUT_MULTI
-                            else:
-                                # default single (radio)
-                                input_type_val = Question.INPUT_SINGLE
-
-                            # Find existing question by (group, text)
-                            q = Question.objects.filter(group=group, text=text).first()
-
-                            if q:
-                                if mode == "create":
-                                    skipped += 1
-                                    continue
-                                # update
-                                q.input_type = input_type_val
-                                q.is_required = is_required
-                                q.is_active = is_active
-                                q.affects_score = affects_score
-                                q.order = order_val
-                                q.question_tag = question_tag
-                                q.save()
-                                updated += 1
-                            else:
-                                if mode == "update":
-                                    skipped += 1
-                                    continue
-                                # create
-                                q = Question.objects.create(
-                                    group=group,
-                                    text=text,
-                                    input_type=input_type_val,
-                                    is_required=is_required,
-                                    is_active=is_active,
-                                    affects_score=affects_score,
-                                    order=order_val,
-                                    question_tag=question_tag,
-                                )
-                                created += 1
-
-                            # Choices
-                            choice_specs = self._parse_choices(choices_raw, sep)
-                            if clear_choices:
-                                q.choices.all().delete()
-
-                            for spec in choice_specs:
-                                label = spec.get("label", "").strip()
-                                if not label:
-                                    continue
-                                ch, _ = Choice.objects.get_or_create(question=q, text=label)
-                                ch.order = self._parse_int(spec.get("order"), default=0)
-                                ch.is_active = self._parse_bool(spec.get("active"))
-                                ch.save()
-
-                        except Exception as e:
-                            errors.append(f"Row {i}: {e}")
-
-                if errors:
-                    for e in errors:
-                        messages.error(request, e)
-                messages.success(
-                    request,
-                    f"Question import complete — created: {created}, updated: {updated}, skipped: {skipped}"
+                job = enqueue_import(
+                    ImportJob.KIND_QUESTIONS, uploaded,
+                    {"mode": mode, "clear_choices": clear_choices, "choices_separator": sep},
+                    dry_run=form.cleaned_data["dry_run"], user=request.user,
                 )
-                return redirect("admin:configurator_question_changelist")
+                return redirect("admin:configurator_importjob_progress", job.pk)
         else:
             form = self.QuestionImportForm()
 
         context["form"] = form
         return render(request, "admin/import_questions.html", context)
 
-    # --- helpers (reuse pattern from Item import) ---
-    def _read_rows(self, uploaded_file):
-        name = (uploaded_file.name or "").lower()
-        if name.endswith(".csv"):
-            import csv, io
-            text = uploaded_file.read().decode("utf-8-sig")
-            reader = csv.DictReader(io.StringIO(text))
-            return list(reader)
-        elif name.endswith(".xlsx"):
-            try:
-                import openpyxl
-            except ImportError:
-                raise RuntimeError("openpyxl is required for .xlsx files. Install with: pip install openpyxl")
-            wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
-            ws = wb.active
-            headers = [str(c.value).strip() if c.value is not None else "" for c in
-                       next(ws.iter_rows(min_row=1, max_row=1))]
-            rows = []
-            for r in ws.iter_rows(min_row=2, values_only=True):
-                row = {headers[i]: ("" if val is None else str(val)) for i, val in enumerate(r)}
-                rows.append(row)
-            return rows
-        else:
-            raise RuntimeError("Unsupported file type. Please upload .csv or .xlsx")
-
-    def _parse_bool(self, val, default=False):
-        s = str(val or "").strip().lower()
-        if s in ("1", "true", "yes", "y"):
-            return True
-        if s in ("0", "false", "no", "n"):
-            return False
-        return default
-
-    def _parse_int(self, val, default=0):
-        try:
-            return int(str(val).strip())
-        except Exception:
-            return default
-
-    def _parse_choices(self, raw: str, sep: str):
-        """
-        Parses 'choices' column into list of dicts.
-        Each choice spec is separated by `sep` (default ';') or newline.
-        Each spec is pipe-separated key=val pairs. Supported keys:
-          - label (required)
-          - order (int, optional)
-          - active (bool, optional)
-        Example cell:
-          label=13-inch|order=1|active=1; label=14-inch|order=2|active=1
-        """
-        raw = (raw or "").strip()
-        if not raw:
-            return []
-        # split on separator and newlines
-        import re
-        chunks = []
-        if sep:
-            chunks.extend([p.strip() for p in raw.split(sep)])
-        for p in re.split(r"[\r\n]+", raw):
-            p = p.strip()
-            if p and p not in chunks:
-                chunks.append(p)
-
-        out = []
-        for ch in chunks:
-            if not ch:
-                continue
-            spec = {}
-            parts = [p.strip() for p in ch.split("|") if p.strip()]
-            for part in parts:
-                if "=" in part:
-                    k, v = part.split("=", 1)
-                    spec[k.strip().lower()] = v.strip()
-                else:
-                    # allow bare label fallback
-                    spec.setdefault("label", part.strip())
-            if "label" in spec:
-                out.append(spec)
-        return out
-
 
 
 # =========================
@@ -856,8 +603,9 @@ class ChoiceAdmin(admin.ModelAdmin):
     inlines = [ChoiceImpactInline]
     autocomplete_fields = ("question",)
 
-    fields = ("question", "order", "text", "is_active", "image", "img_thumb", "image_width", "image_height")
-    readonly_fields = ("img_thumb", "image_width", "image_height")
+    fields = ("question", "order", "text", "is_active", "image", "img_thumb",
+              "image_status", "image_error", "image_width", "image_height")
+    readonly_fields = ("img_thumb", "image_status", "image_error", "image_width", "image_height")
 
     def img_thumb(self, obj):
         if obj and obj.image:
@@ -935,11 +683,150 @@ class ERPSettingsAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         # keep it singleton-ish
-        from .models import ERPSettings
-        return ERPSettings.objects.count() == 0
+        from .erp import get_erp_settings
+        return get_erp_settings() is None
+
+
+@admin.register(ERPOutbox)
+class ERPOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "response_status", "next_attempt_at", "created_at", "delivered_at")
+    list_filter = ("status", "kind")
+    search_fields = ("last_error",)
+    readonly_fields = (
+        "kind", "doctype", "payload", "status", "attempts", "next_attempt_at", "locked_at",
+        "last_error", "response_status", "created_at", "delivered_at", "contact_message", "quiz_session",
+    )
+    actions = ["retry_now"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected now (also revives dead-lettered)")
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        from .outbox import kick
+        n = queryset.exclude(status=ERPOutbox.STATUS_DELIVERED).update(
+            status=ERPOutbox.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now(), locked_at=None
+        )
+        transaction.on_commit(kick)
+        messages.success(request, f"{n} message(s) queued for retry.")
+
 
+def _diff_value(value) -> str:
+    if value is None:
+        return "—"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, list):
+        return ", ".join(map(str, value)) or "(none)"
+    return str(value)
 
 
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "kind", "dry_run", "status", "progress_display", "created_count", "updated_count",
+        "skipped_count", "error_count", "created_by", "created_at", "progress_link",
+    )
+    list_filter = ("status", "kind", "dry_run")
+    readonly_fields = (
+        "kind", "original_name", "options", "dry_run", "status", "total_rows", "rows_done",
+        "created_count", "updated_count", "skipped_count", "error_count", "errors", "diffs", "last_error",
+        "created_by", "created_at", "started_at", "finished_at", "locked_at",
+    )
+    actions = ["requeue"]
 
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = super().get_urls()
+        my_urls = [
+            path("<int:object_id>/progress/", self.admin_site.admin_view(self.progress_view),
+                 name="configurator_importjob_progress"),
+            path("<int:object_id>/status/", self.admin_site.admin_view(self.status_view),
+                 name="configurator_importjob_status"),
+        ]
+        return my_urls + urls
 
+    @admin.display(description="Progress")
+    def progress_display(self, obj):
+        return "—" if obj.percent is None else f"{obj.percent}%"
+
+    @admin.display(description="")
+    def progress_link(self, obj):
+        url = reverse("admin:configurator_importjob_progress", args=[obj.pk])
+        return format_html('<a href="{}">View progress</a>', url)
+
+    def _job_or_404(self, request, object_id):
+        job = get_object_or_404(ImportJob, pk=object_id)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        return job
+
+    def progress_view(self, request, object_id):
+        job = self._job_or_404(request, object_id)
+        diffs = [
+            {**d, "changes": [(f, _diff_value(old), _diff_value(new)) for f, (old, new) in d["changes"].items()]}
+            for d in job.diffs
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": str(job),
+            "job": job,
+            "diffs": diffs,
+            "status_url": reverse("admin:configurator_importjob_status", args=[job.pk]),
+        }
+        return render(request, "admin/configurator/importjob/progress.html", context)
+
+    def status_view(self, request, object_id):
+        job = self._job_or_404(request, object_id)
+        return JsonResponse({
+            "status": job.status,
+            "status_display": job.get_status_display(),
+            "finished": job.is_finished,
+            "rows_done": job.rows_done,
+            "total_rows": job.total_rows,
+            "percent": job.percent,
+            "created": job.created_count,
+            "updated": job.updated_count,
+            "skipped": job.skipped_count,
+            "errors": job.error_count,
+            "last_error": job.last_error,
+        })
+
+    @admin.action(description="Re-queue selected failed or stalled jobs (they resume after their last finished chunk)")
+    def requeue(self, request, queryset):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .import_jobs import LEASE_SECONDS, kick
+        # A running job whose worker still renews its lease must not be claimed twice
+        stale = timezone.now() - timedelta(seconds=LEASE_SECONDS)
+        due = (
+            queryset.filter(status=ImportJob.STATUS_FAILED)
+            | queryset.filter(status=ImportJob.STATUS_RUNNING, locked_at__lt=stale)
+        )
+        gone = due.filter(file="").count()
+        n = due.exclude(file="").update(
+            status=ImportJob.STATUS_QUEUED, locked_at=None, finished_at=None, last_error=""
+        )
+        transaction.on_commit(kick)
+        messages.success(request, f"{n} import job(s) queued.")
+        if gone:
+            messages.warning(request, f"{gone} job(s) no longer have their upload; import the file again.")
+
+
+@admin.register(JobOpening)
+class JobOpeningAdmin(admin.ModelAdmin):
+    # Mirror of the ERP doctype; edit in the ERP and run `manage.py sync_job_openings`
+    list_display = ("name", "designation", "territory", "status", "erp_modified", "synced_at")
+    list_filter = ("status", "territory")
+    search_fields = ("name", "designation")
+    readonly_fields = (
+        "name", "designation", "status", "territory", "qualification",
+        "no_of_vacancy", "description", "erp_modified", "synced_at",
+    )
 
+    def has_add_permission(self, request):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class ConfiguratorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'configurator'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects receivers)
@@ -1,67 +1,369 @@
 # configurator/careers_api.py
-from typing import List, Dict, Optional
-import requests
-import pandas as pd
-from .models import ERPSettings  # admin-managed creds
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional
+import hashlib
+import json
+import logging
 import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .erp import get_client  # pooled session + admin-managed creds
+from .models import JobOpening
+
+log = logging.getLogger(__name__)
 
 JOB_OPENING_ENDPOINT   = "api/resource/Job Opening"
 JOB_APPLICANT_ENDPOINT = "api/resource/Job Applicant"
 
-def _get_erp():
-    erp = ERPSettings.objects.first()
-    if not erp or not erp.is_enabled:
-        raise RuntimeError("ERP disabled or not configured in admin.")
-    base = erp.base_url.rstrip("/")
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"token {erp.api_key}:{erp.api_secret}",
+# -----------------------
+# Careers query layer (status/designation/territory filters pushed down to the ERP)
+# -----------------------
+LIST_FIELDS = '["name","designation","status","custom_territory","custom_qualification"]'
+FACET_FIELDS = '["designation","custom_territory"]'
+CAREERS_PAGE_SIZE = getattr(settings, "CAREERS_PAGE_SIZE", 12)
+
+
+@dataclass(frozen=True)
+class JobQuery:
+    """
+    A careers list request. status/designation/territory go to the ERP as
+    Frappe `filters`; the matching rows are cached once per (designation,
+    territory), and the free-text search and paging are applied in memory over
+    plain dicts, so neither can force an ERP round-trip or a new cache entry.
+    """
+    search: str = ""
+    designation: str = ""
+    territory: str = ""
+    page: int = 1
+    per_page: int = CAREERS_PAGE_SIZE
+
+    def erp_filters(self) -> List[List[str]]:
+        filters = [["status", "=", JobOpening.STATUS_OPEN]]
+        if self.designation:
+            filters.append(["designation", "=", self.designation])
+        if self.territory:
+            filters.append(["custom_territory", "=", self.territory])
+        return filters
+
+    def cache_key(self) -> str:
+        raw = json.dumps([self.designation, self.territory])
+        return "configurator:careers:jobs:" + hashlib.sha1(raw.encode()).hexdigest()
+
+    def matches(self, job: Dict) -> bool:
+        if not self.search:
+            return True
+        return self.search in (job.get("name") or "").lower() or self.search in (job.get("designation") or "").lower()
+
+
+@dataclass
+class JobPage:
+    """Page of results with the same template-facing API as django.core.paginator.Page."""
+    jobs: List[Dict]
+    number: int
+    more: bool
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def has_next(self) -> bool:
+        return self.more
+
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+
+def _get_jobs(filters, fields=LIST_FIELDS, start=0, length=0) -> List[Dict]:
+    """One ERP round-trip. length=0 means 'all rows' in Frappe. Raises on failure."""
+    params = {
+        "fields": fields,
+        "filters": json.dumps(filters),
+        "order_by": "designation asc, name asc",
+        "limit_start": start,
+        "limit_page_length": length,
+    }
+    r = get_client().get(JOB_OPENING_ENDPOINT, params=params)
+    r.raise_for_status()
+    return [normalize_job(d) for d in r.json().get("data", [])]
+
+
+def _query_jobs_upstream(query: JobQuery) -> List[Dict]:
+    # Every open row matching the pushed-down filters; search and paging are local
+    return _get_jobs(query.erp_filters())
+
+
+def _job_facets_upstream() -> Dict[str, List[str]]:
+    rows = _get_jobs([["status", "=", JobOpening.STATUS_OPEN]], fields=FACET_FIELDS)
+    return {
+        "designations": sorted({r["designation"] for r in rows if r.get("designation")}),
+        "territories": sorted({r["territory"] for r in rows if r.get("territory")}),
     }
-    return base, headers
 
-def fetch_job_list() -> List[Dict]:
+
+# -----------------------
+# Careers cache (TTL + stale-while-revalidate + single-flight)
+# -----------------------
+JOBS_TTL = getattr(settings, "CAREERS_JOBS_TTL", 300)                   # fresh for 5 min
+JOBS_STALE_TTL = getattr(settings, "CAREERS_JOBS_STALE_TTL", 7 * 86400)  # last good snapshot kept a week
+JOBS_FAIL_BACKOFF = getattr(settings, "CAREERS_JOBS_FAIL_BACKOFF", 60)  # wait before retrying a down ERP
+JOBS_WAIT = 20                                                          # max wait for another refresher
+JOB_FACETS_CACHE_KEY = "configurator:careers:facets"
+
+# key -> Event set when the in-process leader for that key finishes
+_flights: Dict[str, threading.Event] = {}
+_flights_lock = threading.Lock()
+
+
+def _single_flight(key: str, fn: Callable[[], None], wait: bool = True) -> None:
+    """Coalesce concurrent calls for `key` in this process: one leader runs, followers wait."""
+    with _flights_lock:
+        done = _flights.get(key)
+        leader = done is None
+        if leader:
+            done = _flights[key] = threading.Event()
+    if not leader:
+        if wait:
+            done.wait(JOBS_WAIT)
+        return
     try:
-        base, headers = _get_erp()
-        url = f"{base}/{JOB_OPENING_ENDPOINT}"
-        params = {
-            'fields': '["name","designation","status","custom_territory","custom_qualification"]',
-            'limit_start': 0,
-            'limit_page_length': 999999999
-        }
-        r = requests.get(url, headers=headers, params=params, timeout=15)
-        r.raise_for_status()
-        data = r.json().get("data", [])
-        df = pd.DataFrame(data)
-        if not df.empty and "status" in df.columns:
-            df = df[df["status"] == "Open"]
-            return df.to_dict(orient="records")
-        return []
+        fn()
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        done.set()
+
+
+def _refresh(key: str, loader: Callable[[], object]) -> None:
+    # Cross-worker single-flight: only the holder of the cache lock hits the ERP
+    lock_key = key + ":refresh-lock"
+    if not cache.add(lock_key, os.getpid(), timeout=JOBS_WAIT):
+        deadline = time.monotonic() + JOBS_WAIT
+        while time.monotonic() < deadline and cache.get(lock_key) is not None:
+            time.sleep(0.2)
+        return
+    try:
+        value = loader()
+        cache.set(key, {"value": value, "fetched_at": time.time()}, timeout=JOBS_STALE_TTL)
     except Exception:
-        return []
+        log.warning("Careers refresh failed", exc_info=True)
+        entry = cache.get(key)
+        if entry:
+            # Keep serving the last good snapshot; retry after a short backoff
+            entry["fetched_at"] = time.time() - JOBS_TTL + JOBS_FAIL_BACKOFF
+            cache.set(key, entry, timeout=JOBS_STALE_TTL)
+    finally:
+        cache.delete(lock_key)
+
+
+def _refresh_detached(key: str, loader: Callable[[], object]) -> None:
+    try:
+        _single_flight(key, lambda: _refresh(key, loader), wait=False)
+    finally:
+        connections.close_all()  # this thread owns its own DB connection
+
+
+def _cached(key: str, loader: Callable[[], object], default):
+    """
+    - fresh (younger than JOBS_TTL): returned as is
+    - stale: returned immediately while one background refresh runs
+    - missing: one synchronous refresh shared by all concurrent callers
+    When the ERP is down or slow the last good snapshot keeps being served.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        if time.time() - entry["fetched_at"] >= JOBS_TTL and key not in _flights:
+            threading.Thread(
+                target=_refresh_detached, args=(key, loader), name="careers-refresh", daemon=True
+            ).start()
+        return entry["value"]
+
+    _single_flight(key, lambda: _refresh(key, loader))
+    entry = cache.get(key)
+    return entry["value"] if entry else default
+
+
+def query_jobs(query: JobQuery) -> JobPage:
+    """One page of open jobs from the ERP (rows cached per designation/territory)."""
+    facets = fetch_job_facets()
+    if (query.designation and query.designation not in facets["designations"]) or (
+        query.territory and query.territory not in facets["territories"]
+    ):
+        # Unknown filter values match nothing; don't spend an ERP call or a cache entry on them
+        return JobPage(jobs=[], number=query.page, more=False)
+    rows = [j for j in _cached(query.cache_key(), lambda: _query_jobs_upstream(query), []) if query.matches(j)]
+    start = (query.page - 1) * query.per_page
+    end = start + query.per_page
+    return JobPage(jobs=rows[start:end], number=query.page, more=len(rows) > end)
+
+
+def fetch_job_facets() -> Dict[str, List[str]]:
+    """Distinct designations/territories of open jobs, for the filter dropdowns (cached)."""
+    return _cached(JOB_FACETS_CACHE_KEY, _job_facets_upstream, {"designations": [], "territories": []})
+
 
 def fetch_job_details(job_id: str) -> Optional[Dict]:
+    """Job detail from the ERP; falls back to the local JobOpening mirror when the ERP fails."""
     try:
-        base, headers = _get_erp()
-        url = f"{base}/{JOB_OPENING_ENDPOINT}/{job_id}"
+        erp = get_client()
         params = {
             'fields': '["name","description","custom_no_of_vacancy","custom_territory","designation","custom_qualification"]'
         }
-        r = requests.get(url, headers=headers, params=params, timeout=15)
+        r = erp.get(f"{JOB_OPENING_ENDPOINT}/{job_id}", params=params)
         r.raise_for_status()
-        return r.json().get("data")
+        data = r.json().get("data")
+        return normalize_job(data) if data else None
     except Exception:
+        local = JobOpening.objects.filter(name=job_id).first()
+        return job_to_dict(local) if local else None
+
+
+# -----------------------
+# Local JobOpening mirror
+# -----------------------
+SYNC_FIELDS = (
+    '["name","designation","status","custom_territory","custom_qualification",'
+    '"custom_no_of_vacancy","description","modified"]'
+)
+SYNC_PAGE_SIZE = 500
+
+
+def normalize_job(d: Dict) -> Dict:
+    """Map ERP field names (custom_*) onto the plain keys templates and JobOpening use."""
+    out = dict(d)
+    out.setdefault("territory", d.get("custom_territory") or "")
+    out.setdefault("qualification", d.get("custom_qualification") or "")
+    out.setdefault("no_of_vacancy", d.get("custom_no_of_vacancy"))
+    return out
+
+
+def job_to_dict(job: JobOpening) -> Dict:
+    return {
+        "name": job.name,
+        "designation": job.designation,
+        "status": job.status,
+        "territory": job.territory,
+        "qualification": job.qualification,
+        "no_of_vacancy": job.no_of_vacancy,
+        "description": job.description,
+    }
+
+
+def _parse_erp_datetime(value):
+    dt = parse_datetime(str(value or ""))
+    if dt is not None and timezone.is_naive(dt):
+        # Frappe returns server-local naive timestamps
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def _format_erp_datetime(dt) -> str:
+    return timezone.localtime(dt).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
         return None
 
+
+def sync_job_openings(full: bool = False) -> Dict[str, int]:
+    """
+    Pull Job Openings modified since the newest `erp_modified` we hold (or all of
+    them with full=True) and upsert them into JobOpening in bulk.
+    A full sync also removes local rows that no longer exist in the ERP.
+    """
+    erp = get_client()
+    watermark = None if full else JobOpening.objects.aggregate(m=Max("erp_modified"))["m"]
+
+    filters = []
+    if watermark:
+        # ">=" re-reads the boundary row; upserts make that harmless
+        filters.append(["modified", ">=", _format_erp_datetime(watermark)])
+
+    stats = {"created": 0, "updated": 0, "deleted": 0}
+    seen = set()
+    start = 0
+    while True:
+        params = {
+            "fields": SYNC_FIELDS,
+            "filters": json.dumps(filters),
+            "order_by": "modified asc",
+            "limit_start": start,
+            "limit_page_length": SYNC_PAGE_SIZE,
+        }
+        r = erp.get(JOB_OPENING_ENDPOINT, params=params, read_timeout=60)
+        r.raise_for_status()
+        page = r.json().get("data", [])
+        if not page:
+            break
+
+        names = [d["name"] for d in page if d.get("name")]
+        existing = JobOpening.objects.in_bulk(names, field_name="name")
+        to_create, to_update = [], []
+        for d in page:
+            if not d.get("name"):
+                continue
+            d = normalize_job(d)
+            seen.add(d["name"])
+            job = existing.get(d["name"]) or JobOpening(name=d["name"])
+            job.designation = d.get("designation") or ""
+            job.status = d.get("status") or ""
+            job.territory = d["territory"]
+            job.qualification = d["qualification"]
+            job.no_of_vacancy = _as_int(d["no_of_vacancy"])
+            job.description = d.get("description") or ""
+            job.erp_modified = _parse_erp_datetime(d.get("modified"))
+            job.synced_at = timezone.now()
+            (to_update if job.pk else to_create).append(job)
+
+        with transaction.atomic():
+            JobOpening.objects.bulk_create(to_create)
+            JobOpening.objects.bulk_update(to_update, [
+                "designation", "status", "territory", "qualification",
+                "no_of_vacancy", "description", "erp_modified", "synced_at",
+            ])
+        stats["created"] += len(to_create)
+        stats["updated"] += len(to_update)
+
+        if len(page) < SYNC_PAGE_SIZE:
+            break
+        start += SYNC_PAGE_SIZE
+
+    if full:
+        stats["deleted"], _ = JobOpening.objects.exclude(name__in=seen).delete()
+    return stats
+
+
 def submit_applicant(payload: Dict, local_resume_path: Optional[str] = None) -> requests.Response:
     """
     Create a Job Applicant, then attach a PDF (resume) directly to that applicant
     using /api/method/upload_file like the curl example.
     """
-    base, headers = _get_erp()
+    erp = get_client()
 
     # 1) Create the Job Applicant
-    applicant_url = f"{base}/{JOB_APPLICANT_ENDPOINT}"
-    create_resp = requests.post(applicant_url, headers=headers, json=payload, timeout=20)
+    create_resp = erp.post(JOB_APPLICANT_ENDPOINT, json=payload, read_timeout=20)
     create_resp.raise_for_status()
     applicant = create_resp.json().get("data", {})
     applicant_name = applicant.get("name")
@@ -69,11 +371,6 @@ def submit_applicant(payload: Dict, local_resume_path: Optional[str] = None) ->
     # 2) If a resume path is given, attach it like in your curl example
     if applicant_name and local_resume_path and os.path.exists(local_resume_path):
         try:
-            upload_url = f"{base}/api/method/upload_file"
-            upload_headers = {
-                "Authorization": headers["Authorization"]
-            }
-
             with open(local_resume_path, "rb") as f:
                 files = {
                     "file": (os.path.basename(local_resume_path), f),
@@ -86,8 +383,8 @@ def submit_applicant(payload: Dict, local_resume_path: Optional[str] = None) ->
                     "fieldname": "resume_attachment",  # <--- add this
                 }
 
-                upload_resp = requests.post(
-                    upload_url, headers=upload_headers, data=data, files=files, timeout=30
+                upload_resp = erp.post(
+                    "api/method/upload_file", data=data, files=files, read_timeout=30
                 )
                 upload_resp.raise_for_status()
                 print("[INFO] File uploaded:", upload_resp.json())
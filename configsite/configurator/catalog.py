@@ -0,0 +1,100 @@
+# configurator/catalog.py
+"""
+Per-group catalog versions.
+
+ProductGroup.catalog_version is a durable, monotonic counter bumped whenever
+the group or anything hanging off it changes: items and their specs, images,
+documents and features, variants, questions, choices and impacts (see
+signals.py). Each bump moves it to max(previous + 1, now in microseconds), so
+the value doubles as the group's last-modified time.
+
+The value is mirrored into the shared cache as the page cache's "group:<id>"
+surrogate key, which is the invalidation token for every cached page of the
+group; views use the timestamp for Last-Modified / 304 responses.
+
+`refresh_group_summary()` keeps the group-list card fields on ProductGroup
+(hero_url, active_item_count) in step with the group's items and images, so
+the group list renders from the ProductGroup rows alone.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .images import best_url
+from .models import Item, ItemImage, ProductGroup
+from .pagecache import VERSION_NAMESPACE as SURROGATE_NAMESPACE
+from .versioning import set_version
+
+
+def group_key(group_id) -> str:
+    """Surrogate key carrying the group's catalog version."""
+    return f"group:{group_id}"
+
+
+def bump_catalog(*group_ids: Optional[int]) -> None:
+    """
+    Bump the catalog version of each group inside the current transaction and
+    publish the new value to the cache once it commits.
+    """
+    for group_id in {gid for gid in group_ids if gid}:
+        now_us = time.time_ns() // 1000
+        updated = ProductGroup.objects.filter(pk=group_id).update(
+            catalog_version=Greatest(F("catalog_version") + 1, Value(now_us))
+        )
+        if updated:
+            transaction.on_commit(lambda gid=group_id: _publish(gid))
+
+
+def group_summary(group: ProductGroup):
+    """
+    (hero_url, active_item_count) for one group: its own hero image, else the
+    first image of its first active item by name, at card width (images.py).
+    """
+    active = Item.objects.filter(group_id=group.pk, is_active=True)
+    hero_url = best_url(group.hero_image, group.hero_derivatives) if group.hero_image else ""
+    if not hero_url:
+        first = (
+            ItemImage.objects.filter(item__in=active)
+            .order_by("item__name", "item_id", "id")
+            .only("image", "derivatives")
+            .first()
+        )
+        if first:
+            hero_url = best_url(first.image, first.derivatives)
+    return hero_url, active.count()
+
+
+def refresh_group_summary(*group_ids: Optional[int]) -> None:
+    """Recompute the denormalized group-list fields; a plain UPDATE, so no signals fire."""
+    groups = ProductGroup.objects.filter(pk__in={gid for gid in group_ids if gid}).only(
+        "id", "hero_image", "hero_derivatives"
+    )
+    for group in groups:
+        hero_url, count = group_summary(group)
+        ProductGroup.objects.filter(pk=group.pk).update(hero_url=hero_url, active_item_count=count)
+
+
+def _publish(group_id: int) -> None:
+    version = ProductGroup.objects.filter(pk=group_id).values_list("catalog_version", flat=True).first()
+    if version is not None:
+        set_version(SURROGATE_NAMESPACE, group_key(group_id), version)
+
+
+def last_modified(*stamps) -> Optional[datetime]:
+    """
+    Latest of the given datetimes / catalog versions (µs since epoch), as an
+    aware datetime. None and 0 are ignored.
+    """
+    latest = None
+    for stamp in stamps:
+        if not stamp:
+            continue
+        if not isinstance(stamp, datetime):
+            stamp = datetime.fromtimestamp(stamp / 1_000_000, tz=dt_timezone.utc)
+        if latest is None or stamp > latest:
+            latest = stamp
+    return latest
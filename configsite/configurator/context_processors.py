@@ -1,6 +1,10 @@
-from .models import Page
+from django.utils.functional import SimpleLazyObject
+
+from .navigation import get_navigation
+
 
 def menu_pages(request):
+    # Lazy: templates that never render the menu (e.g. admin) cost nothing
     return {
-        "menu_pages": Page.objects.filter(is_active=True).order_by("menu_order")
+        "menu_pages": SimpleLazyObject(lambda: get_navigation().pages)
     }
@@ -0,0 +1,128 @@
+# configurator/erp.py
+"""
+Shared ERP (Frappe/ERPNext) HTTP client.
+
+All ERP traffic — careers, lead/visitor pushes from the outbox — goes through
+one per-process `requests.Session`, so connections are pooled and kept alive
+instead of paying a TCP+TLS handshake per call. Timeouts and pool size are
+configurable from settings:
+
+    ERP_CONNECT_TIMEOUT  (default 3.05s)
+    ERP_READ_TIMEOUT     (default 15s)
+    ERP_POOL_MAXSIZE     (default 10 connections per host)
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .models import ERPSettings
+from .versioning import bump_version_on_commit, get_version
+
+CONNECT_TIMEOUT = getattr(settings, "ERP_CONNECT_TIMEOUT", 3.05)
+READ_TIMEOUT = getattr(settings, "ERP_READ_TIMEOUT", 15)
+POOL_MAXSIZE = getattr(settings, "ERP_POOL_MAXSIZE", 10)
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
+
+def get_session() -> requests.Session:
+    """
+    Per-process pooled session. Rebuilt after a fork so pre-forking servers
+    never share sockets between workers.
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, pool_block=False)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+                _session, _session_pid = session, pid
+    return _session
+
+
+class ERPClient:
+    """Thin wrapper that knows the ERP base URL and auth; requests go through the shared session."""
+
+    def __init__(self, base_url: str, api_key: str, api_secret: str):
+        self.base_url = base_url.rstrip("/")
+        # Built once per credential set, reused for every call
+        self.auth_headers: Dict[str, str] = {"Authorization": f"token {api_key}:{api_secret}"}
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def resource_path(self, doctype: str, name: Optional[str] = None) -> str:
+        return f"api/resource/{doctype}" + (f"/{name}" if name else "")
+
+    @staticmethod
+    def timeout(read: Optional[float] = None) -> Tuple[float, float]:
+        return (CONNECT_TIMEOUT, read or READ_TIMEOUT)
+
+    def request(self, method: str, path: str, *, read_timeout: Optional[float] = None,
+                headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        merged = dict(self.auth_headers)
+        if headers:
+            merged.update(headers)
+        return get_session().request(
+            method, self.url(path), headers=merged, timeout=self.timeout(read_timeout), **kwargs
+        )
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+
+# -----------------------
+# Cached ERPSettings singleton
+# -----------------------
+SETTINGS_VERSION_NAMESPACE = "erp-settings"
+_MISSING = object()
+_settings_cache = {"version": None, "value": _MISSING}
+
+
+def get_erp_settings() -> Optional[ERPSettings]:
+    """
+    The admin-managed ERPSettings row (or None), cached per worker.
+    Normal traffic only reads the version counter; the row is re-read after
+    a save/delete bumps it (see signals.py), so admin edits reach every worker.
+    """
+    version = get_version(SETTINGS_VERSION_NAMESPACE)
+    if _settings_cache["version"] != version or _settings_cache["value"] is _MISSING:
+        _settings_cache["value"] = ERPSettings.objects.first()
+        _settings_cache["version"] = version
+    return _settings_cache["value"]
+
+
+def invalidate_erp_settings() -> None:
+    bump_version_on_commit(SETTINGS_VERSION_NAMESPACE)
+
+
+_clients: Dict[Tuple[str, str, str], ERPClient] = {}
+
+
+def client_for(erp: ERPSettings) -> ERPClient:
+    key = (erp.base_url, erp.api_key, erp.api_secret)
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = ERPClient(*key)
+    return client
+
+
+def get_client(erp: Optional[ERPSettings] = None) -> ERPClient:
+    """Client for the admin-managed ERP settings; RuntimeError if ERP is off."""
+    erp = erp or get_erp_settings()
+    if not erp or not erp.is_enabled:
+        raise RuntimeError("ERP disabled or not configured in admin.")
+    return client_for(erp)
@@ -0,0 +1,382 @@
+# configurator/facets.py
+"""
+In-memory facet index for the variant builder.
+
+For one Item, every active variant gets a bit position and every spec
+(label, value, unit) gets an integer bitset of the variants carrying it.
+A facet selection (AND across labels, OR within a label) is then a handful of
+bitwise operations, and counts for every remaining facet value are popcounts.
+Indexes are kept per worker and rebuilt only when the item's version is bumped
+by the ItemVariant/ItemVariantSpec signals (see signals.py).
+
+Labels whose values are all numeric in one canonical unit (see units.py) and
+have many distinct values become range facets instead: min/max bounds are
+resolved by an indexed value_num range query and ANDed in as one more bitset.
+
+When nothing matches, `FacetIndex.nearest()` ranks variants by similarity
+instead, vectorized over a variant × numeric-spec matrix built with the index.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.utils.text import slugify
+
+from .models import ItemVariant, ItemVariantSpec
+from .units import canonical_unit
+from .versioning import bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "facet-index"
+# Variant card content (name, description, images) for the builder's JSON API
+CARDS_VERSION_NAMESPACE = "variant-cards"
+
+# Numeric labels with at least this many distinct values get min/max inputs
+RANGE_FACET_MIN_VALUES = getattr(settings, "VARIANT_RANGE_FACET_MIN_VALUES", 8)
+# How many "closest matches" to offer when a selection has no exact match
+CLOSEST_MATCHES = getattr(settings, "VARIANT_CLOSEST_MATCHES", 6)
+
+ValueUnit = Tuple[str, str]
+Selection = Mapping[str, Iterable[ValueUnit]]  # label slug -> selected (value, unit) pairs
+Bound = Optional[float]
+Ranges = Mapping[str, Tuple[Bound, Bound]]     # label slug -> (min, max) in the facet's display unit
+
+
+@dataclass(frozen=True)
+class NumericRange:
+    unit: str          # canonical unit stored in unit_canonical
+    display_unit: str  # most common unit as entered, used for the min/max inputs
+    factor: float      # display unit -> canonical unit
+    low: float         # bounds over all active variants, canonical unit
+    high: float
+
+    def to_display(self, value: float) -> float:
+        return value / self.factor
+
+    def to_canonical(self, value: float) -> float:
+        return value * self.factor
+
+
+@dataclass(frozen=True)
+class Facet:
+    slug: str
+    label: str
+    values: Dict[ValueUnit, int]  # (value, unit) -> bitset, sorted for display
+    raw_labels: FrozenSet[str]    # ItemVariantSpec.label spellings behind this slug
+    range: Optional[NumericRange] = None  # set for range facets
+    column: Optional[int] = None  # FacetIndex.numeric column when every value is numeric
+    numbers: Optional[Dict[ValueUnit, float]] = None  # (value, unit) -> canonical number
+
+    def mask_for(self, pairs: Iterable[ValueUnit]) -> int:
+        """OR of the selected values; an empty unit matches the value in any unit."""
+        mask = 0
+        for value, unit in pairs:
+            if unit:
+                mask |= self.values.get((value, unit), 0)
+            else:
+                for (v, _), bits in self.values.items():
+                    if v == value:
+                        mask |= bits
+        return mask
+
+
+@dataclass(frozen=True)
+class FacetIndex:
+    item_id: int
+    version: int
+    variant_ids: Tuple[int, ...]  # bit position -> ItemVariant.id (display order)
+    all_mask: int                 # every active variant
+    facets: Dict[str, Facet]      # label slug -> facet, sorted by label
+    numeric: np.ndarray           # (V, N) canonical numbers per numeric facet column, NaN if missing
+    spans: np.ndarray             # (N,) max - min per column, for distance scaling
+
+    def match(self, selection: Selection, exclude: Optional[str] = None,
+              masks: Optional[Mapping[str, int]] = None) -> int:
+        """
+        Bitset of variants matching the selection (optionally ignoring one facet).
+        `masks` are pre-resolved per-facet bitsets, e.g. from range_masks().
+        """
+        mask = self.all_mask
+        for slug, bits in (masks or {}).items():
+            if slug != exclude:
+                mask &= bits
+        for slug, pairs in selection.items():
+            pairs = list(pairs)
+            if slug == exclude or not pairs:
+                continue
+            facet = self.facets.get(slug)
+            if facet is None:
+                continue
+            mask &= facet.mask_for(pairs)
+        return mask
+
+    def counts(self, selection: Selection,
+               masks: Optional[Mapping[str, int]] = None) -> Dict[str, Dict[ValueUnit, int]]:
+        """
+        Matching-variant count for every checkbox facet value under the selection.
+        A facet's own picks are ignored when counting its values, so siblings
+        of a checked value stay selectable (OR within a facet).
+        """
+        out: Dict[str, Dict[ValueUnit, int]] = {}
+        for slug, facet in self.facets.items():
+            if facet.range:
+                continue
+            base = self.match(selection, exclude=slug, masks=masks)
+            out[slug] = {vu: (bits & base).bit_count() for vu, bits in facet.values.items()}
+        return out
+
+    def ids(self, mask: int) -> List[int]:
+        return [vid for pos, vid in enumerate(self.variant_ids) if mask >> pos & 1]
+
+    def normalize(self, selection: Selection) -> Dict[str, Tuple[ValueUnit, ...]]:
+        """
+        Canonical form of a selection: unknown facets/values dropped, pairs
+        de-duplicated and sorted, empty facets removed. Equal selections give
+        equal results, so this is what cache keys are built from.
+        """
+        out: Dict[str, Tuple[ValueUnit, ...]] = {}
+        for slug in sorted(selection):
+            facet = self.facets.get(slug)
+            if facet is None:
+                continue
+            known = {
+                (value, unit) for value, unit in selection[slug]
+                if (value, unit) in facet.values
+                or (not unit and any(v == value for v, _ in facet.values))
+            }
+            if known:
+                out[slug] = tuple(sorted(known))
+        return out
+
+    def normalize_ranges(self, ranges: Ranges) -> Dict[str, Tuple[Bound, Bound]]:
+        """Canonical form of range bounds: range facets only, ordered, empty ones dropped."""
+        out: Dict[str, Tuple[Bound, Bound]] = {}
+        for slug in sorted(ranges):
+            facet = self.facets.get(slug)
+            if facet is None or facet.range is None:
+                continue
+            low, high = ranges[slug]
+            if low is None and high is None:
+                continue
+            if low is not None and high is not None and low > high:
+                low, high = high, low
+            out[slug] = (low, high)
+        return out
+
+    def mask_of(self, variant_ids: Iterable[int]) -> int:
+        mask = 0
+        for pos, vid in enumerate(self.variant_ids):
+            if vid in variant_ids:
+                mask |= 1 << pos
+        return mask
+
+    def _bits(self, mask: int) -> np.ndarray:
+        """Bitset -> (V,) bool vector in bit-position order."""
+        n = len(self.variant_ids)
+        raw = np.frombuffer(mask.to_bytes((n + 7) // 8 or 1, "little"), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:n].astype(bool)
+
+    def _closeness(self, column: int, low: float, high: float) -> np.ndarray:
+        """1 inside [low, high], falling linearly to 0 one column span away; 0 if missing."""
+        values = self.numeric[:, column]
+        span = self.spans[column]
+        distance = np.maximum(np.maximum(low - values, values - high), 0.0)
+        if span > 0:
+            closeness = 1.0 - distance / span
+        else:
+            closeness = (distance == 0).astype(np.float64)
+        return np.nan_to_num(np.clip(closeness, 0.0, 1.0), nan=0.0)
+
+    def nearest(self, selection: Selection, ranges: Optional[Ranges] = None,
+                k: int = CLOSEST_MATCHES) -> List[Tuple[int, float, int]]:
+        """
+        Top-k variants by similarity to the selection, best first:
+        [(variant_id, score, criteria), ...] where each constrained facet adds
+        up to 1 to score. Exact value hits count 1; numeric facets also give
+        partial credit by distance (scaled by the facet's span) to the nearest
+        selected value or range bound. Variants scoring 0 are left out.
+        """
+        selection = self.normalize(selection)
+        ranges = self.normalize_ranges(ranges or {})
+        scores = np.zeros(len(self.variant_ids), dtype=np.float64)
+        criteria = 0
+
+        for slug, pairs in selection.items():
+            facet = self.facets[slug]
+            part = self._bits(facet.mask_for(pairs)).astype(np.float64)
+            if facet.column is not None:
+                # A pair with an empty unit stands for that value in any unit
+                targets = [num for (v, u), num in facet.numbers.items() if (v, u) in pairs or (v, "") in pairs]
+                for target in targets:
+                    part = np.maximum(part, self._closeness(facet.column, target, target))
+            scores += part
+            criteria += 1
+
+        for slug, (low, high) in ranges.items():
+            facet = self.facets[slug]
+            if facet.column is None:
+                continue
+            rng = facet.range
+            low = rng.to_canonical(low) if low is not None else -np.inf
+            high = rng.to_canonical(high) if high is not None else np.inf
+            scores += self._closeness(facet.column, low, high)
+            criteria += 1
+
+        if not criteria or not scores.size:
+            return []
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Best score first; display order (bit position) breaks ties
+        top = top[np.lexsort((top, -scores[top]))]
+        return [
+            (self.variant_ids[pos], float(scores[pos]), criteria)
+            for pos in top if scores[pos] > 0
+        ]
+
+
+def _numeric_unit(rows) -> Optional[str]:
+    """The canonical unit when every value of a label is numeric in one unit, else None."""
+    units = {unit_canonical for _, _, _, unit_canonical in rows}
+    if len(units) != 1 or any(num is None for _, num, _, _ in rows):
+        return None
+    return units.pop()
+
+
+def _numeric_range(rows, unit: str) -> Optional[NumericRange]:
+    """Range metadata for a numeric label with enough distinct values."""
+    nums = [num for _, num, _, _ in rows]
+    if len(set(nums)) < RANGE_FACET_MIN_VALUES:
+        return None
+    display_unit = Counter(raw_unit for _, _, raw_unit, _ in rows).most_common(1)[0][0]
+    canonical, factor = canonical_unit(display_unit)
+    if canonical != unit:
+        display_unit, factor = unit, 1.0  # unit came from the value text; show the canonical one
+    return NumericRange(unit=unit, display_unit=display_unit, factor=factor, low=min(nums), high=max(nums))
+
+
+def compile_index(item_id: int, version: int = 0) -> FacetIndex:
+    """Build the index for one item in two flat queries."""
+    variant_ids = tuple(
+        ItemVariant.objects.filter(item_id=item_id, is_active=True)
+        .order_by("name", "id")
+        .values_list("id", flat=True)
+    )
+    position = {vid: pos for pos, vid in enumerate(variant_ids)}
+
+    labels: Dict[str, str] = {}
+    raw_labels: Dict[str, set] = {}
+    values: Dict[str, Dict[ValueUnit, int]] = {}
+    rows: Dict[str, list] = {}
+    numbers_by_slug: Dict[str, Dict[ValueUnit, float]] = {}
+    specs = (
+        ItemVariantSpec.objects
+        .filter(variant_id__in=variant_ids)
+        .values_list("variant_id", "label", "value", "unit", "value_num", "unit_canonical")
+    )
+    for variant_id, raw_label, value, unit, value_num, unit_canonical in specs:
+        label = (raw_label or "").strip()
+        value = (value or "").strip()
+        unit = (unit or "").strip()
+        if not label or not value:
+            continue
+        slug = slugify(label)
+        # Labels that slugify alike share one facet; keep the first spelling by sort order
+        if slug not in labels or label.lower() < labels[slug].lower():
+            labels[slug] = label
+        raw_labels.setdefault(slug, set()).add(raw_label)
+        bucket = values.setdefault(slug, {})
+        bucket[(value, unit)] = bucket.get((value, unit), 0) | (1 << position[variant_id])
+        rows.setdefault(slug, []).append((position[variant_id], value_num, unit, unit_canonical))
+        if value_num is not None:
+            numbers_by_slug.setdefault(slug, {})[(value, unit)] = value_num
+
+    facets = {}
+    columns: List[np.ndarray] = []
+    for slug in sorted(labels, key=lambda s: labels[s].lower()):
+        ordered = sorted(values[slug].items(), key=lambda kv: (kv[0][0].lower(), kv[0][1].lower()))
+        unit = _numeric_unit(rows[slug])
+        column = numbers = rng = None
+        if unit is not None:
+            col = np.full(len(variant_ids), np.nan)
+            for pos, num, _, _ in rows[slug]:
+                if np.isnan(col[pos]):
+                    col[pos] = num
+            numbers = numbers_by_slug[slug]
+            column = len(columns)
+            columns.append(col)
+            rng = _numeric_range(rows[slug], unit)
+        facets[slug] = Facet(
+            slug=slug,
+            label=labels[slug],
+            values=dict(ordered),
+            raw_labels=frozenset(raw_labels[slug]),
+            range=rng,
+            column=column,
+            numbers=numbers,
+        )
+
+    numeric = np.column_stack(columns) if columns else np.empty((len(variant_ids), 0))
+    spans = (np.nanmax(numeric, axis=0) - np.nanmin(numeric, axis=0)) if columns else np.empty(0)
+
+    return FacetIndex(
+        item_id=item_id,
+        version=version,
+        variant_ids=variant_ids,
+        all_mask=(1 << len(variant_ids)) - 1,
+        facets=facets,
+        numeric=numeric,
+        spans=spans,
+    )
+
+
+def range_masks(index: FacetIndex, ranges: Ranges) -> Dict[str, int]:
+    """
+    Resolve min/max bounds (display units) to variant bitsets, one indexed
+    (label, unit_canonical, value_num) range query per bounded facet.
+    """
+    masks: Dict[str, int] = {}
+    for slug, (low, high) in index.normalize_ranges(ranges).items():
+        facet = index.facets[slug]
+        rng = facet.range
+        qs = ItemVariantSpec.objects.filter(
+            variant__item_id=index.item_id,
+            label__in=facet.raw_labels,
+            unit_canonical=rng.unit,
+        )
+        # Small tolerance so a bound typed in another unit still hits its own value
+        if low is not None:
+            low = rng.to_canonical(low)
+            qs = qs.filter(value_num__gte=low - abs(low) * 1e-9)
+        if high is not None:
+            high = rng.to_canonical(high)
+            qs = qs.filter(value_num__lte=high + abs(high) * 1e-9)
+        masks[slug] = index.mask_of(set(qs.values_list("variant_id", flat=True)))
+    return masks
+
+
+# Per-worker cache: item_id -> FacetIndex
+_indexes: Dict[int, FacetIndex] = {}
+
+
+def get_index(item_id: int) -> FacetIndex:
+    version = get_version(VERSION_NAMESPACE, item_id)
+    index = _indexes.get(item_id)
+    if index is None or index.version != version:
+        index = compile_index(item_id, version)
+        _indexes[item_id] = index
+    return index
+
+
+def invalidate_item(item_id: int) -> None:
+    if item_id:
+        bump_version_on_commit(VERSION_NAMESPACE, item_id)
+
+
+def invalidate_cards(item_id: int) -> None:
+    if item_id:
+        bump_version_on_commit(CARDS_VERSION_NAMESPACE, item_id)
+
+
+def cards_version(item_id: int) -> int:
+    return get_version(CARDS_VERSION_NAMESPACE, item_id)
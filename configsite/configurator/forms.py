@@ -2,7 +2,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
 import re
-from .models import ProductGroup, Question,  Choice
+from .models import ProductGroup, Question
+from .quiz_graph import get_graph
 
 class ContactForm(forms.Form):
     name = forms.CharField(max_length=140)
@@ -52,53 +53,94 @@ class JobApplicationForm(forms.Form):
         return f
 
 
+class GraphChoiceField(forms.ChoiceField):
+    """
+    Single-choice field over pre-loaded Choice instances (from the question graph).
+    Cleans to a Choice without touching the database. `queryset` is kept as an
+    alias of the options so templates written for ModelChoiceField still work.
+    """
+    def __init__(self, options, **kwargs):
+        self.options = tuple(options)
+        self._by_id = {str(c.pk): c for c in self.options}
+        super().__init__(choices=[(c.pk, c.text) for c in self.options], **kwargs)
+
+    @property
+    def queryset(self):
+        return self.options
+
+    def _lookup(self, value):
+        try:
+            return self._by_id[str(value)]
+        except KeyError:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        return self._lookup(value)
+
+    def validate(self, value):
+        forms.Field.validate(self, value)
+
+
+class GraphMultipleChoiceField(GraphChoiceField, forms.MultipleChoiceField):
+    """Multi-choice twin of GraphChoiceField; cleans to a list of Choice."""
+    def to_python(self, value):
+        if not value:
+            return []
+        if not isinstance(value, (list, tuple)):
+            raise ValidationError(self.error_messages["invalid_list"], code="invalid_list")
+        return [self._lookup(v) for v in value]
+
+    def validate(self, value):
+        if self.required and not value:
+            raise ValidationError(self.error_messages["required"], code="required")
+
+
 class QuizForm(forms.Form):
     def __init__(self, group: ProductGroup, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.group = group
 
-        # Build queryset with deps ready
-        qs = (
-            group.questions.filter(is_active=True)
-            .order_by("order", "id")
-            .prefetch_related("choices", "trigger_choices", "depends_on")
-        )
-
+        # Compiled per worker; no queries unless the group's questions changed
+        self.graph = graph = get_graph(group.id)
         id_to_question = {}
 
         # -------------------------
         # PASS 1: build the fields
         # -------------------------
-        for q in qs:
-            choices_qs = q.choices.filter(is_active=True).order_by("order", "id")
+        for q in graph.active_questions():
+            options = graph.choices[q.id]
 
-            if getattr(Question, "INPUT_MULTI", None) and q.input_type == Question.INPUT_MULTI:
-                field = forms.ModelMultipleChoiceField(
+            if q.input_type == Question.INPUT_MULTI:
+                field = GraphMultipleChoiceField(
+                    options,
                     label=q.text,
-                    queryset=choices_qs,
                     widget=forms.CheckboxSelectMultiple,
                     required=False,  # we'll set based on visibility in pass 2
                 )
                 field.widget.attrs["data_multi"] = "1"
             else:
-                field = forms.ModelChoiceField(
+                field = GraphChoiceField(
+                    options,
                     label=q.text,
-                    queryset=choices_qs,
                     widget=forms.RadioSelect,
                     required=False,  # we'll set based on visibility in pass 2
-                    empty_label=None,
                 )
                 field.widget.attrs["data_multi"] = "0"
 
-            # <-- YOU ADD THE DEPENDENCY ATTRS **HERE**, inside the loop
-            if getattr(q, "depends_on_id", None):
+            if q.depends_on_id:
                 parent_field_name = f"q_{q.depends_on_id}"
                 parent_panel_id = f"wrap_{parent_field_name}"
 
                 # HTML data-* (hyphen) for JS
                 field.widget.attrs["data-depends-on"] = parent_panel_id
-                trig_ids = list(q.trigger_choices.values_list("id", flat=True))
-                field.widget.attrs["data-trigger-choices"] = ",".join(map(str, trig_ids)) if trig_ids else ""
+                trig_ids = sorted(graph.triggers[q.id])
+                field.widget.attrs["data-trigger-choices"] = ",".join(map(str, trig_ids))
 
                 # Underscore twins for Django template access
                 field.widget.attrs["data_depends_on"] = parent_panel_id
@@ -111,9 +153,10 @@ class QuizForm(forms.Form):
         # PASS 2: compute visibility
         # -------------------------
         selected_choice_ids = self._selected_choice_ids(id_to_question)
+        visible_ids = graph.visible_ids(selected_choice_ids)
 
         for qid, q in id_to_question.items():
-            visible = self._is_triggered_by(q, selected_choice_ids)
+            visible = qid in visible_ids
             f = self.fields[f"q_{qid}"]
 
             # Provide both hyphen and underscore variants for the template/JS
@@ -157,26 +200,6 @@ class QuizForm(forms.Form):
                     pass
         return out
 
-    def _is_triggered_by(self, q: Question, selected_choice_ids: set[int]) -> bool:
-        """
-        True if question q should be visible given selected choices.
-        - No dependency -> visible
-        - Dependency with trigger choices -> visible if any of those are selected
-        - Dependency without trigger choices -> visible if parent has any selection
-        """
-        if not getattr(q, "depends_on_id", None):
-            return True
-
-        trig_ids = set(q.trigger_choices.values_list("id", flat=True))
-        if trig_ids:
-            return bool(trig_ids & selected_choice_ids)
-
-        # No explicit trigger list: any selection in parent reveals it
-        parent_choice_ids = set(
-            Choice.objects.filter(question_id=q.depends_on_id).values_list("id", flat=True)
-        )
-        return bool(parent_choice_ids & selected_choice_ids)
-
 
 
 
@@ -194,51 +217,107 @@ class ParticipantForm(forms.Form):
 
 
 # forms.py
+import math
+
 from django import forms
-from django.utils.text import slugify
+from .facets import get_index, range_masks
 from .models import Item
 
+
+def _to_float(raw):
+    try:
+        value = float(raw) if raw not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+    return value if value is None or math.isfinite(value) else None  # "nan"/"inf" parse too
+
+
+class RangeWidget(forms.MultiWidget):
+    def __init__(self, attrs=None):
+        super().__init__([forms.NumberInput(attrs={"step": "any"}), forms.NumberInput(attrs={"step": "any"})], attrs)
+
+    def decompress(self, value):
+        return list(value) if value else [None, None]
+
+
+class RangeField(forms.MultiValueField):
+    """Optional (min, max) pair for a numeric facet, in the facet's display unit."""
+    widget = RangeWidget
+    is_range = True
+
+    def __init__(self, *args, **kwargs):
+        fields = (forms.FloatField(required=False), forms.FloatField(required=False))
+        super().__init__(fields, *args, require_all_fields=False, required=False, **kwargs)
+
+    def compress(self, data_list):
+        return tuple(data_list) if data_list else (None, None)
+
+
 class VariantFacetForm(forms.Form):
     """
     Builds checkbox fields from ItemVariantSpec values of an item's active variants.
-    For each spec label, we create a multi-select of unique values (value+unit).
+    For each spec label, we create a multi-select of unique values (value+unit);
+    numeric labels with many values get a min/max RangeField instead.
+    Fields come from the item's cached FacetIndex; each checkbox field also carries
+    `facet_options` [(stored, display, count)] for the current selection.
     """
     def __init__(self, item: Item, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.item = item
+        self.index = get_index(item.id)
+
+        for slug, facet in self.index.facets.items():
+            if facet.range:
+                rng = facet.range
+                low, high = rng.to_display(rng.low), rng.to_display(rng.high)
+                field = RangeField(label=facet.label, help_text=f"{low:g} – {high:g} {rng.display_unit}".strip())
+                field.widget.widgets[0].attrs.update({"placeholder": f"min {low:g}", "min": f"{low:g}", "max": f"{high:g}"})
+                field.widget.widgets[1].attrs.update({"placeholder": f"max {high:g}", "min": f"{low:g}", "max": f"{high:g}"})
+                field.range_unit = rng.display_unit
+                self.fields[f"range__{slug}"] = field
+                continue
 
-        variants = (item.variants
-                        .filter(is_active=True)
-                        .prefetch_related("specs"))
-
-        # label -> set of (value, unit)
-        facets = {}
-        for v in variants:
-            for s in v.specs.all():
-                label = (s.label or "").strip()
-                value = (s.value or "").strip()
-                unit  = (s.unit or "").strip()
-                if not label or not value:
-                    continue
-                facets.setdefault(label, set()).add((value, unit))
-
-        for label, vu_set in sorted(facets.items(), key=lambda kv: kv[0].lower()):
             # store value as "value||unit" so we can split cleanly later
             choices = []
-            for (val, unit) in sorted(vu_set, key=lambda t: (t[0].lower(), t[1].lower())):
+            for (val, unit) in facet.values:
                 stored = f"{val}||{unit}"
                 display = f"{val} {unit}".strip()
                 choices.append((stored, display))
 
-            field_name = f"facet__{slugify(label)}"
+            field_name = f"facet__{slug}"
             self.fields[field_name] = forms.MultipleChoiceField(
-                label=label,
+                label=facet.label,
                 choices=choices,
                 required=False,
                 widget=forms.CheckboxSelectMultiple,
                 help_text="Leave empty for any"
             )
 
+        selection, ranges = self._raw_selection()
+        counts = self.index.counts(selection, masks=range_masks(self.index, ranges))
+        for slug, values in counts.items():
+            self.fields[f"facet__{slug}"].facet_options = [
+                (f"{val}||{unit}", f"{val} {unit}".strip(), n)
+                for (val, unit), n in values.items()
+            ]
+
+    @staticmethod
+    def _split(tokens):
+        return [tuple(t.split("||", 1)) for t in tokens if "||" in t]
+
+    def _raw_selection(self):
+        """Selection straight from submitted data, so counts render even on invalid input."""
+        selection, ranges = {}, {}
+        if not self.is_bound:
+            return selection, ranges
+        for name, field in self.fields.items():
+            raw = field.widget.value_from_datadict(self.data, self.files, self.add_prefix(name))
+            if name.startswith("range__"):
+                ranges[name[len("range__"):]] = tuple(_to_float(v) for v in (raw or [None, None])[:2])
+            else:
+                selection[name[len("facet__"):]] = self._split(raw or [])
+        return selection, ranges
+
     def selected_facets(self):
         """
         Returns: { label_slug: [(value, unit), ...], ... }
@@ -247,10 +326,23 @@ class VariantFacetForm(forms.Form):
         for name in self.fields:
             if not name.startswith("facet__"):
                 continue
-            tokens = self.cleaned_data.get(name) or []
-            pairs = []
-            for token in tokens:
-                val, unit = token.split("||", 1)
-                pairs.append((val, unit))
-            out[name[len("facet__"):]] = pairs
-        return out
\ No newline at end of file
+            out[name[len("facet__"):]] = self._split(self.cleaned_data.get(name) or [])
+        return out
+
+    def selected_ranges(self):
+        """
+        Returns: { label_slug: (min, max), ... } with None for an open bound
+        """
+        return {
+            name[len("range__"):]: self.cleaned_data.get(name) or (None, None)
+            for name in self.fields
+            if name.startswith("range__")
+        }
+
+    def matching_mask(self) -> int:
+        """Bitset of variants matching the cleaned selection (see FacetIndex.ids)."""
+        return self.index.match(self.selected_facets(), masks=range_masks(self.index, self.selected_ranges()))
+
+    def closest_matches(self):
+        """[(variant_id, score, criteria), ...] ranked by similarity; see FacetIndex.nearest."""
+        return self.index.nearest(self.selected_facets(), self.selected_ranges())
@@ -0,0 +1,251 @@
+# configurator/images.py
+"""
+Responsive image derivatives.
+
+Every uploaded catalog image (ItemImage, ItemVariantImage, ProductGroup and
+Page heroes) gets resized copies at a few width presets, encoded as AVIF (when
+this Pillow build can write it), WebP and a JPEG fallback. Files are stored
+content-addressed under IMAGE_DERIVATIVES_DIR/<sha256 of the original>/, so
+re-saving a row or uploading the same picture twice never re-encodes anything.
+
+What was generated is recorded on the row itself as a small JSON manifest
+(`derivatives` / `hero_derivatives`), so templates build `srcset` from the
+already-loaded row without extra queries or storage lookups (see
+templatetags/configurator_images.py). Rows without a manifest simply fall back
+to the original file. Manifests are (re)built after commit by the signals in
+signals.py and in bulk by the `build_image_derivatives` management command.
+"""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .models import ItemImage, ItemVariantImage, Page, ProductGroup
+
+log = logging.getLogger(__name__)
+
+WIDTHS: Tuple[int, ...] = tuple(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", (320, 640, 960, 1440)))
+QUALITY: Dict[str, int] = {"avif": 55, "webp": 78, "jpeg": 82, **getattr(settings, "IMAGE_DERIVATIVE_QUALITY", {})}
+DERIVATIVES_DIR = getattr(settings, "IMAGE_DERIVATIVES_DIR", "derivatives")
+# Width used where only one URL fits (CSS backgrounds of cards)
+CARD_WIDTH = getattr(settings, "IMAGE_CARD_WIDTH", 640)
+# Encode in a background thread after commit; False encodes inline after commit
+BACKGROUND_THREAD = getattr(settings, "IMAGE_DERIVATIVES_THREAD", True)
+
+MANIFEST_VERSION = 1
+
+# model -> (image field, manifest field)
+IMAGE_FIELDS = {
+    ItemImage: ("image", "derivatives"),
+    ItemVariantImage: ("image", "derivatives"),
+    ProductGroup: ("hero_image", "hero_derivatives"),
+    Page: ("hero_image", "hero_derivatives"),
+}
+
+# format -> (Pillow format, file extension, MIME type), best first
+_FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif"),
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+}
+
+
+def available_formats() -> List[str]:
+    """Formats this Pillow build can write, best first; JPEG is always last."""
+    Image.init()
+    return [fmt for fmt, (pil_format, _, _) in _FORMATS.items() if pil_format in Image.SAVE]
+
+
+def mime_type(fmt: str) -> str:
+    return _FORMATS[fmt][2]
+
+
+def target_widths(source_width: int) -> List[int]:
+    """Presets narrower than the source, plus the source width itself when below the largest preset."""
+    widths = [w for w in WIDTHS if w < source_width]
+    if source_width < max(WIDTHS):
+        widths.append(source_width)
+    return widths or [source_width]
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGB on white for JPEG; transparency would otherwise turn black."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        canvas = Image.new("RGB", rgba.size, (255, 255, 255))
+        canvas.paste(rgba, mask=rgba.getchannel("A"))
+        return canvas
+    return img.convert("RGB")
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    pil_format = _FORMATS[fmt][0]
+    buf = BytesIO()
+    if fmt == "jpeg":
+        _flatten(img).save(buf, pil_format, quality=QUALITY[fmt], optimize=True, progressive=True)
+    else:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        img.save(buf, pil_format, quality=QUALITY[fmt])
+    return buf.getvalue()
+
+
+def build_manifest(field_file) -> dict:
+    """
+    Generate (or reuse) the derivatives of one stored image and return its
+    manifest: {"v", "source", "digest", "width", "height",
+    "sources": {fmt: [[width, storage name], ...]}}.
+    """
+    field_file.open("rb")
+    try:
+        data = field_file.read()
+    finally:
+        field_file.close()
+    digest = hashlib.sha256(data).hexdigest()
+    folder = f"{DERIVATIVES_DIR}/{digest[:2]}/{digest}"
+
+    with Image.open(BytesIO(data)) as opened:
+        img = ImageOps.exif_transpose(opened)
+        img.load()
+    width, height = img.size
+
+    sources: Dict[str, List[List]] = {}
+    for fmt in available_formats():
+        ext = _FORMATS[fmt][1]
+        entries = []
+        for w in target_widths(width):
+            name = f"{folder}/{w}.{ext}"
+            if not default_storage.exists(name):
+                resized = img if w >= width else img.resize((w, max(1, round(height * w / width))), Image.LANCZOS)
+                default_storage.save(name, ContentFile(_encode(resized, fmt)))
+            entries.append([w, name])
+        sources[fmt] = entries
+
+    return {
+        "v": MANIFEST_VERSION,
+        "source": field_file.name,
+        "digest": digest,
+        "width": width,
+        "height": height,
+        "sources": sources,
+    }
+
+
+def is_current(manifest: Optional[dict], field_file) -> bool:
+    return bool(
+        manifest
+        and manifest.get("v") == MANIFEST_VERSION
+        and manifest.get("source") == field_file.name
+        and set(manifest.get("sources", {})) == set(available_formats())
+    )
+
+
+def refresh_derivatives(model, pk, force: bool = False) -> bool:
+    """
+    Bring one row's manifest in line with its image. Saves with update_fields,
+    so the usual catalog/page-cache signals re-render pages with the new
+    srcset. Returns True when the manifest changed.
+    """
+    image_field, manifest_field = IMAGE_FIELDS[model]
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return False
+    field_file = getattr(obj, image_field)
+    current = getattr(obj, manifest_field) or {}
+
+    if not field_file:
+        manifest = {}
+    elif not force and is_current(current, field_file):
+        return False
+    else:
+        try:
+            manifest = build_manifest(field_file)
+        except Exception:
+            log.exception("Could not build image derivatives for %s %s", model.__name__, pk)
+            return False
+
+    if manifest == current:
+        return False
+    setattr(obj, manifest_field, manifest)
+    obj.save(update_fields=[manifest_field])
+    return True
+
+
+# -----------------------
+# Background encoding
+# -----------------------
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """One encoding thread per process, recreated after a fork."""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-derivatives")
+                _executor_pid = pid
+    return _executor
+
+
+def _run(model, pk) -> None:
+    try:
+        refresh_derivatives(model, pk)
+    except Exception:
+        log.exception("Image derivative job failed for %s %s", model.__name__, pk)
+    finally:
+        connections.close_all()  # this thread owns its own DB connection
+
+
+def schedule(model, pk) -> None:
+    """Refresh one row's derivatives once the current transaction commits."""
+    if BACKGROUND_THREAD:
+        transaction.on_commit(lambda: _get_executor().submit(_run, model, pk))
+    else:
+        transaction.on_commit(lambda: refresh_derivatives(model, pk))
+
+
+def needs_refresh(instance) -> bool:
+    """Cheap check from a post_save handler: is there anything (re)buildable?"""
+    image_field, manifest_field = IMAGE_FIELDS[type(instance)]
+    field_file = getattr(instance, image_field)
+    manifest = getattr(instance, manifest_field)
+    if not field_file:
+        return bool(manifest)
+    if is_current(manifest, field_file):
+        return False
+    return field_file.storage.exists(field_file.name)
+
+
+# -----------------------
+# Read side (templates, views)
+# -----------------------
+def srcset(manifest: Optional[dict], fmt: str) -> str:
+    entries = (manifest or {}).get("sources", {}).get(fmt) or []
+    return ", ".join(f"{default_storage.url(name)} {w}w" for w, name in entries)
+
+
+def best_url(field_file, manifest: Optional[dict], width: int = CARD_WIDTH, fmt: str = "jpeg") -> str:
+    """
+    URL of the narrowest `fmt` derivative at least `width` wide (the widest one
+    if none is), falling back to the original file when there is no manifest.
+    """
+    entries = (manifest or {}).get("sources", {}).get(fmt) or []
+    if not entries:
+        return field_file.url if field_file else ""
+    for w, name in entries:
+        if w >= width:
+            return default_storage.url(name)
+    return default_storage.url(entries[-1][1])
@@ -0,0 +1,58 @@
+# configurator/imaging.py
+"""
+Pure Pillow helpers for the quiz image worker pool (see quiz_media.py).
+
+Nothing here imports Django, so pool worker processes start without loading
+settings or models, and arguments/results are plain bytes, strings and ints.
+"""
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+JPEG_QUALITY = 88
+
+
+def downscale_to_box(img: Image.Image, max_w: int, max_h: int) -> Image.Image:
+    """Return copy downscaled to fit in (max_w, max_h) preserving aspect ratio."""
+    w, h = img.size
+    if w <= max_w and h <= max_h:
+        return img
+    img = img.copy()
+    img.thumbnail((max_w, max_h), Image.LANCZOS)
+    return img
+
+
+def encode(img: Image.Image, name: str, quality: int = JPEG_QUALITY) -> Tuple[bytes, str]:
+    """
+    Encode for storage: PNG if the original name ends with .png, JPEG otherwise.
+    Returns (bytes, new file name).
+    """
+    buf = BytesIO()
+    fmt = "PNG" if str(name).lower().endswith(".png") else "JPEG"
+    save_params = {"format": fmt}
+    if fmt == "JPEG":
+        save_params.update({"optimize": True, "quality": quality})
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+    img.save(buf, **save_params)
+
+    stem = Path(Path(name or "upload").name).stem or "image"
+    ext = ".png" if fmt == "PNG" else ".jpg"
+    return buf.getvalue(), f"{stem}_resized{ext}"
+
+
+def downscale(data: bytes, name: str, max_w: int, max_h: int) -> Tuple[Optional[bytes], str, int, int]:
+    """
+    Worker entry point: (resized bytes or None if already within the box,
+    file name for the resized copy, final width, final height).
+    """
+    with Image.open(BytesIO(data)) as img:
+        img.load()
+        resized = downscale_to_box(img, max_w, max_h)
+        width, height = resized.size
+        if resized is img:
+            return None, name, width, height
+        content, new_name = encode(resized, name)
+    return content, new_name, width, height
@@ -0,0 +1,186 @@
+# configurator/import_jobs.py
+"""
+Background catalog imports.
+
+The admin import views store the upload as an ImportJob (in the private
+IMPORT_UPLOAD_ROOT storage, deleted once the job is done or the job row is
+deleted; a failed job keeps it for a re-queue) and return at once;
+`run_due()` runs queued jobs, from the `run_import_jobs` management command
+and, unless disabled, from a daemon thread kicked after the job commits.
+Importers commit chunk by chunk, each chunk with its own cache invalidations,
+and the job row records progress, counts, errors (and dry-run diffs) after
+every chunk, which is what the admin progress page polls. Progress is saved inside each chunk's transaction, so a
+resumed job never replays a committed chunk. A job whose worker died keeps its
+lease only for IMPORT_JOB_LEASE seconds; it is then claimed again and resumes
+after the last recorded chunk. Every write to the job row is conditional on
+the worker's claim stamp (locked_at), so a worker that outlived its lease
+stops at its next write instead of racing the new owner.
+"""
+import logging
+import threading
+from datetime import timedelta
+from itertools import islice
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .importers import ImportResult, ItemImporter, QuestionImporter, VariantImporter, count_rows, read_rows
+from .models import ImportJob
+
+log = logging.getLogger(__name__)
+
+LEASE_SECONDS = getattr(settings, "IMPORT_JOB_LEASE", 300)
+INLINE_THREAD = getattr(settings, "IMPORT_JOBS_THREAD", True)
+
+IMPORTERS = {
+    ImportJob.KIND_ITEMS: ItemImporter,
+    ImportJob.KIND_QUESTIONS: QuestionImporter,
+    ImportJob.KIND_VARIANTS: VariantImporter,
+}
+
+
+def enqueue(kind: str, uploaded_file, options: dict, dry_run: bool = False, user=None) -> ImportJob:
+    """Store an upload as a queued job; the worker is kicked once the transaction commits."""
+    job = ImportJob(
+        kind=kind, original_name=uploaded_file.name or "", options=options, dry_run=dry_run,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    job.file.save(uploaded_file.name, uploaded_file, save=False)
+    job.save()
+    transaction.on_commit(kick)
+    return job
+
+
+def _claim(job_id: int) -> bool:
+    """Atomically take a queued job, or one whose worker stopped renewing its lease."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    claimable = (
+        ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_QUEUED)
+        | ImportJob.objects.filter(pk=job_id, status=ImportJob.STATUS_RUNNING, locked_at__lt=stale)
+    )
+    return claimable.update(status=ImportJob.STATUS_RUNNING, locked_at=now) == 1
+
+
+class LeaseLost(Exception):
+    """Another worker has claimed the job since this one did."""
+
+
+def _write(job: ImportJob, **fields) -> None:
+    """Update the job row only while it still carries this worker's claim stamp."""
+    if not ImportJob.objects.filter(pk=job.pk, locked_at=job.locked_at).update(**fields):
+        raise LeaseLost(job.pk)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def _count_rows(job: ImportJob) -> Optional[int]:
+    job.file.open("rb")
+    try:
+        return count_rows(job.file)
+    finally:
+        job.file.close()
+
+
+def _save_progress(job: ImportJob, rows_done: int, result: ImportResult) -> None:
+    _write(
+        job, rows_done=rows_done,
+        created_count=result.created, updated_count=result.updated, skipped_count=result.skipped,
+        error_count=result.error_count, errors=result.errors, diffs=result.diffs,
+        locked_at=timezone.now(),  # renew the lease
+    )
+
+
+def run_job(job: ImportJob) -> None:
+    """
+    Run (or resume) one job claimed with `job.locked_at` as its stamp to the
+    end, recording the outcome on the row.
+    """
+    try:
+        if job.started_at is None:
+            now = timezone.now()
+            _write(job, started_at=now, locked_at=now)
+        if job.total_rows is None:
+            total_rows = _count_rows(job)
+            _write(job, total_rows=total_rows, locked_at=timezone.now())
+
+        importer = IMPORTERS[job.kind](dry_run=job.dry_run, **job.options)
+        resumed = ImportResult(
+            created=job.created_count, updated=job.updated_count, skipped=job.skipped_count,
+            errors=list(job.errors), diffs=list(job.diffs), error_count=job.error_count,
+        )
+        job.file.open("rb")
+        try:
+            rows = islice(read_rows(job.file), job.rows_done, None)
+            importer.run(
+                rows, first_line=2 + job.rows_done, result=resumed,
+                on_chunk=lambda line, res: _save_progress(job, line - 1, res),
+            )
+        finally:
+            job.file.close()
+        status, last_error = ImportJob.STATUS_DONE, ""
+    except LeaseLost:
+        log.warning("Import job %s was claimed by another worker; stopping", job.pk)
+        return
+    except Exception as e:
+        log.exception("Import job %s failed", job.pk)
+        status, last_error = ImportJob.STATUS_FAILED, str(e)[:2000] or e.__class__.__name__
+    try:
+        _write(job, status=status, last_error=last_error, finished_at=timezone.now(), locked_at=None)
+    except LeaseLost:
+        log.warning("Import job %s was claimed by another worker; not recording its outcome", job.pk)
+        return
+    if status == ImportJob.STATUS_DONE and job.file:
+        job.file.delete(save=False)  # a failed job keeps its upload so it can be re-queued
+        ImportJob.objects.filter(pk=job.pk).update(file="")
+
+
+def run_due() -> int:
+    """Run every job that is due, oldest first. Returns how many were run."""
+    ran = 0
+    while True:
+        stale = timezone.now() - timedelta(seconds=LEASE_SECONDS)
+        job_id = (
+            (
+                ImportJob.objects.filter(status=ImportJob.STATUS_QUEUED)
+                | ImportJob.objects.filter(status=ImportJob.STATUS_RUNNING, locked_at__lt=stale)
+            )
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return ran
+        if _claim(job_id):
+            run_job(ImportJob.objects.get(pk=job_id))
+            ran += 1
+
+
+# -----------------------
+# In-process kick
+# -----------------------
+_thread_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _drain():
+    try:
+        run_due()
+    except Exception:
+        log.exception("Import job thread failed")
+    finally:
+        connections.close_all()  # this thread owns its own DB connection
+
+
+def kick():
+    """Start a background worker unless one is already running (or threads are disabled)."""
+    global _thread
+    if not INLINE_THREAD:
+        return
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_drain, name="import-jobs", daemon=True)
+        _thread.start()
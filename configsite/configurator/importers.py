@@ -0,0 +1,1003 @@
+# configurator/importers.py
+"""
+Set-based catalog importers behind the admin CSV/XLSX import views.
+
+Uploads are streamed (`read_rows`): CSV is decoded line by line and XLSX is
+read from a read-only sheet, so only the current chunk of rows is held in
+memory. Rows are handled in chunks of IMPORT_BATCH_SIZE, each committed in its
+own transaction; a chunk the database rejects is rolled back on its own and
+reported, earlier chunks stay. For each chunk the importer
+parses every row, preloads the existing rows the chunk can touch into dicts
+keyed by natural key (group name; item code or (group, item name); feature
+text and spec label per item; (group, question text) and choice text per
+question; (item code, variant code) and spec label per variant), works out creates/updates/deletes in memory
+with the same row-by-row semantics the old per-row loop had, and applies them
+with a few bulk_create / bulk_update / delete queries. Query count grows with
+the number of chunks, not rows.
+
+Bulk writes bypass Model.save() and signals, so importers normalize spec
+values themselves and publish the invalidations the signals would have sent
+once per chunk, inside the chunk's transaction (see `_publish_catalog` /
+`_publish_quiz`): version and summary rows commit with the chunk and the cache
+bumps go out on commit, so a run that dies mid-file leaves no committed chunk
+unpublished.
+They also skip the Question/Choice image hooks: imported rows carry no image,
+so their image_status stays at its "no image" default.
+
+A dry run (`dry_run=True`) goes through the same code but rolls every chunk
+back and publishes nothing; the result carries the counts plus field-level
+diffs ({"row", "object", "action", "changes": {field: [old, new]}}). Chunks
+are rolled back one at a time so a dry run never holds a long write lock; the
+flip side is that a row matching an object created by an earlier chunk of the
+same file is reported as a create again.
+"""
+import codecs
+import csv
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import facets, quiz_graph, scoring
+from .catalog import bump_catalog, refresh_group_summary
+from .models import (
+    Answer, Choice, ChoiceImpact, Item, ItemFeature, ItemSpec, ItemVariant, ItemVariantSpec, ProductGroup, Question,
+)
+from .navigation import invalidate_navigation
+from .pagecache import purge
+from .units import normalize_spec
+
+BATCH_SIZE = getattr(settings, "IMPORT_BATCH_SIZE", 500)
+# Errors and dry-run diffs kept per run; counters keep counting past it
+REPORT_LIMIT = getattr(settings, "IMPORT_REPORT_LIMIT", 1000)
+
+MODES = ("upsert", "create", "update")
+UPLOAD_EXTENSIONS = ("csv", "xlsx")
+TRUE_VALUES = ("true", "1", "yes", "y")
+FALSE_VALUES = ("false", "0", "no", "n")
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+    diffs: List[dict] = field(default_factory=list)
+    error_count: int = 0
+
+    def error(self, line: int, message) -> None:
+        self.add_error(f"Row {line}: {message}")
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < REPORT_LIMIT:
+            self.errors.append(message)
+
+    def merge(self, other: "ImportResult") -> None:
+        self.created += other.created
+        self.updated += other.updated
+        self.skipped += other.skipped
+        self.error_count += other.error_count
+        self.errors.extend(other.errors[:REPORT_LIMIT - len(self.errors)])
+        self.diffs.extend(other.diffs[:REPORT_LIMIT - len(self.diffs)])
+
+    def merged(self, other: "ImportResult") -> "ImportResult":
+        """A copy of this result with `other` merged in; this one is left as is."""
+        out = replace(self, errors=list(self.errors), diffs=list(self.diffs))
+        out.merge(other)
+        return out
+
+    @property
+    def summary(self) -> str:
+        return f"created: {self.created}, updated: {self.updated}, skipped: {self.skipped}"
+
+
+# -----------------------
+# Reading uploads
+# -----------------------
+def read_rows(uploaded_file) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield one dict per data row of a .csv or .xlsx upload (any Django
+    File). Unsupported types and a missing openpyxl raise RuntimeError here,
+    before the first row is read.
+    """
+    name = (uploaded_file.name or "").lower()
+    if name.endswith(".csv"):
+        return _csv_rows(uploaded_file)
+    if name.endswith(".xlsx"):
+        try:
+            import openpyxl
+        except ImportError:
+            raise RuntimeError("openpyxl is required for .xlsx files. Install with: pip install openpyxl")
+        return _xlsx_rows(openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True))
+    raise RuntimeError("Unsupported file type. Please upload .csv or .xlsx")
+
+
+def count_rows(uploaded_file) -> Optional[int]:
+    """
+    Data rows in an upload, for progress reporting; None when unknown. XLSX
+    uses the sheet's recorded dimension rather than a second parse, and a file
+    that cannot be read is left to the import, which reports where it broke.
+    """
+    name = (uploaded_file.name or "").lower()
+    try:
+        if name.endswith(".xlsx"):
+            import openpyxl
+            wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+            try:
+                max_row = wb.active.max_row
+            finally:
+                wb.close()
+            return max(max_row - 1, 0) if max_row else None
+        return sum(1 for _ in read_rows(uploaded_file))
+    except (ImportError, RuntimeError, csv.Error, UnicodeDecodeError):
+        return None
+
+
+def _csv_rows(uploaded_file) -> Iterator[Dict[str, str]]:
+    # File.__iter__ reads chunk by chunk and yields lines with their endings,
+    # which is what csv needs for quoted multi-line cells
+    yield from csv.DictReader(codecs.iterdecode(uploaded_file, "utf-8-sig"))
+
+
+def _xlsx_rows(wb) -> Iterator[Dict[str, str]]:
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        headers = ["" if c is None else str(c).strip() for c in header]
+        for r in rows:
+            yield {headers[i]: ("" if val is None else str(val)) for i, val in enumerate(r) if i < len(headers)}
+    finally:
+        wb.close()  # read-only workbooks keep the file open
+
+
+# -----------------------
+# Cell parsing
+# -----------------------
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def cell(row: dict, key: str) -> str:
+    return str(row.get(key) or "").strip()
+
+
+def parse_bool(val, default: bool = False) -> bool:
+    s = str(val or "").strip().lower()
+    if s in TRUE_VALUES:
+        return True
+    if s in FALSE_VALUES:
+        return False
+    return default
+
+
+def parse_int(val, default: int = 0) -> int:
+    try:
+        return int(str(val).strip())
+    except Exception:
+        return default
+
+
+def split_features(raw: str, sep: str) -> List[str]:
+    """Split on the chosen separator and on newlines; blanks and repeats dropped, order kept."""
+    pattern = r"[\r\n]+" + (f"|{re.escape(sep)}" if sep else "")
+    parts = []
+    for p in re.split(pattern, str(raw or "")):
+        p = p.strip()
+        if p and p not in parts:
+            parts.append(p)
+    return parts
+
+
+def parse_specs(raw: str) -> List[Dict[str, str]]:
+    """
+    Parse a 'specs' cell into dicts. Specs are separated by ';', each is
+    pipe-separated k=v with required label and value and optional unit,
+    order, highlight:
+        label=CPU|value=Intel i5|unit=—|order=1|highlight=0
+    """
+    specs = []
+    raw = (raw or "").strip()
+    if not raw:
+        return specs
+    for it in (p.strip() for p in raw.split(";")):
+        if not it:
+            continue
+        kv = {}
+        for part in (p.strip() for p in it.split("|")):
+            if "=" in part:
+                k, v = part.split("=", 1)
+                kv[k.strip().lower()] = v.strip()
+        if kv.get("label") and "value" in kv:
+            specs.append(kv)
+    return specs
+
+
+def parse_choices(raw: str, sep: str) -> List[Dict[str, str]]:
+    """
+    Parse a 'choices' cell into dicts. Choices are separated by `sep` (default
+    ';') or newlines, each is pipe-separated k=v with a required label and
+    optional order and active; a bare part is taken as the label:
+        label=13-inch|order=1|active=1; label=14-inch|order=2|active=1
+    """
+    out = []
+    for chunk in split_features(raw, sep):
+        spec = {}
+        for part in (p.strip() for p in chunk.split("|")):
+            if "=" in part:
+                k, v = part.split("=", 1)
+                spec[k.strip().lower()] = v.strip()
+            elif part:
+                spec.setdefault("label", part)
+        if spec.get("label"):
+            out.append(spec)
+    return out
+
+
+def apply_spec(spec, sp: Dict[str, str]) -> None:
+    """Copy one parsed spec onto a row; unspecified optional keys keep their value."""
+    spec.value = sp.get("value", "")
+    if "unit" in sp:
+        spec.unit = sp["unit"]
+    if "order" in sp:
+        spec.order = parse_int(sp["order"], spec.order)
+    if "highlight" in sp:
+        spec.highlight = parse_bool(sp["highlight"])
+    # What ItemSpec/ItemVariantSpec.save() would do; bulk writes skip it
+    spec.value_num, spec.unit_canonical = normalize_spec(spec.value, spec.unit)
+
+
+SPEC_FIELDS = ["value", "unit", "order", "highlight", "value_num", "unit_canonical"]
+
+
+def _spec_values(spec) -> tuple:
+    return tuple(getattr(spec, f) for f in SPEC_FIELDS)
+
+
+def _spec_text(spec) -> str:
+    return f"{spec.value} {spec.unit}".strip()
+
+
+def _publish_catalog(group_ids: Set[int], item_ids: Set[int]) -> None:
+    """Once per chunk: what the Item/ProductGroup/ItemSpec/ItemFeature signals do per row."""
+    group_ids = {gid for gid in group_ids if gid}
+    if not group_ids and not item_ids:
+        return
+    bump_catalog(*group_ids)
+    refresh_group_summary(*group_ids)
+    for group_id in group_ids:
+        scoring.invalidate_group(group_id)
+    invalidate_navigation()
+    purge("group-list", *(f"item:{pk}" for pk in item_ids))
+
+
+def _publish_quiz(group_ids: Set[int], new_group_ids: Set[int]) -> None:
+    """Once per chunk: what the Question/Choice (and new ProductGroup) signals do per row."""
+    group_ids = {gid for gid in group_ids if gid}
+    if new_group_ids:
+        _publish_catalog(new_group_ids, set())
+    bump_catalog(*group_ids)
+    for group_id in group_ids:
+        scoring.invalidate_group(group_id)
+        quiz_graph.invalidate_group(group_id)
+
+
+def _publish_variants(group_ids: Set[int], item_ids: Set[int]) -> None:
+    """Once per chunk: what the ItemVariant/ItemVariantSpec signals do per row."""
+    bump_catalog(*group_ids)
+    for item_id in item_ids:
+        facets.invalidate_item(item_id)
+        facets.invalidate_cards(item_id)
+    if item_ids:
+        purge(*(f"item:{pk}" for pk in item_ids))
+
+
+class ChunkedImporter(ABC):
+    """
+    Shared driver: parse/diff/apply one chunk at a time (`import_chunk`), each
+    in its own transaction together with the `publish` of what it touched.
+    """
+
+    def __init__(self, mode: str = "upsert", batch_size: int = BATCH_SIZE, dry_run: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown import mode {mode!r}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self._diffs: Dict[int, dict] = {}
+
+    def run(self, rows: Iterable[dict], first_line: int = 2, result: Optional[ImportResult] = None,
+            on_chunk: Optional[Callable[[int, ImportResult], None]] = None) -> ImportResult:
+        """
+        Import all rows (header assumed on line 1), committing chunk by chunk.
+        `on_chunk(last_line, result)` records progress after each chunk; for a
+        chunk that is written it runs inside that chunk's transaction, so the
+        progress and the rows commit (or roll back) together, and an exception
+        it raises undoes the chunk. Pass `result` and `first_line` to continue
+        an earlier, interrupted run.
+        """
+        result = result if result is not None else ImportResult()
+        line = first_line - 1
+        try:
+            for chunk in chunked(enumerate(rows, start=first_line), self.batch_size):
+                self.run_chunk(chunk, result, on_chunk)
+                line = chunk[-1][0]
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Rows are read lazily, so a malformed file surfaces mid-import
+            result.add_error(f"Could not read the file after row {line}: {e}")
+            if on_chunk:
+                on_chunk(line, result)
+        return result
+
+    def run_chunk(self, chunk: List[Tuple[int, dict]], result: ImportResult,
+                  on_chunk: Optional[Callable[[int, ImportResult], None]] = None) -> None:
+        part = ImportResult()
+        self._diffs = {}
+        last_line = chunk[-1][0]
+        try:
+            with transaction.atomic():
+                self.import_chunk(chunk, part)
+                if self.dry_run:
+                    transaction.set_rollback(True)
+                else:
+                    self.publish()
+                    if on_chunk:
+                        on_chunk(last_line, result.merged(part))
+        except DatabaseError as e:
+            result.add_error(f"Rows {chunk[0][0]}–{chunk[-1][0]} not imported: {e}")
+        else:
+            for entry in self._diffs.values():
+                entry["changes"] = {f: c for f, c in entry["changes"].items() if c[0] != c[1]}
+                if entry["changes"] or entry["action"] == "create":
+                    part.diffs.append(entry)
+            result.merge(part)
+            if not self.dry_run:
+                return  # progress was recorded with the chunk
+        # Dry runs and rolled-back chunks wrote nothing: record progress past them
+        if on_chunk:
+            on_chunk(last_line, result)
+
+    def note(self, key: int, line: int, label: str, changes: Dict[str, tuple], created: bool = False) -> None:
+        """Dry runs: record field -> (old, new) for one object (keyed by id()) of this chunk."""
+        if not self.dry_run:
+            return
+        entry = self._diffs.setdefault(key, {
+            "row": line, "object": label, "action": "create" if created else "update", "changes": {},
+        })
+        for name, (old, new) in changes.items():
+            if name in entry["changes"]:
+                entry["changes"][name][1] = new
+            else:
+                entry["changes"][name] = [old, new]
+
+    @abstractmethod
+    def import_chunk(self, chunk: List[Tuple[int, dict]], result: ImportResult) -> None:
+        """Parse, diff and write one chunk of (line, row) pairs, counting into `result`."""
+
+    def apply_specs(self, model, owner: str, owners: Dict[int, object], ops: Dict[int, list], clear: bool,
+                    describe: Callable[[object], str]) -> None:
+        """
+        Upsert the parsed `specs` of each row in `ops` onto its owner (an Item
+        for ItemSpec, an ItemVariant for ItemVariantSpec), matching on
+        (owner, label). `clear` drops the owner's other specs first.
+        """
+        fk = f"{owner}_id"
+        existing = {
+            (getattr(spec, fk), spec.label): spec
+            for spec in model.objects.filter(**{f"{fk}__in": [o.pk for o in owners.values()]})
+        }
+        before = {spec.pk: _spec_values(spec) for spec in existing.values()}
+        before_text = {spec.pk: _spec_text(spec) for spec in existing.values()} if self.dry_run else {}
+
+        cleared: Set[int] = set()
+        create: list = []
+        update: Dict[int, object] = {}
+        for key, rows in ops.items():
+            obj = owners[key]
+            current: Dict[str, object] = {}  # label -> spec touched by this import
+            is_cleared = False
+            for r in rows:
+                if clear:
+                    cleared.add(obj.pk)
+                    is_cleared, current = True, {}
+                for sp in r.specs:
+                    label = sp["label"]
+                    spec = current.get(label) or (None if is_cleared else existing.get((obj.pk, label)))
+                    if spec is None:
+                        spec = model(**{owner: obj, "label": label})
+                    apply_spec(spec, sp)
+                    current[label] = spec
+            for spec in current.values():
+                if spec.pk:
+                    if _spec_values(spec) != before[spec.pk]:
+                        update[spec.pk] = spec
+                else:
+                    create.append(spec)
+            if self.dry_run:
+                changes = {f"spec:{label}": (before_text.get(spec.pk), _spec_text(spec))
+                           for label, spec in current.items()}
+                if is_cleared:
+                    for (owner_id, label), spec in existing.items():
+                        if owner_id == obj.pk and label not in current:
+                            changes[f"spec:{label}"] = (before_text[spec.pk], None)
+                self.note(key, rows[0].line, describe(obj), changes)
+
+        if cleared:
+            # Plain DELETE: specs have no dependents, and signals are replaced by publish()
+            model.objects.filter(**{f"{fk}__in": cleared})._raw_delete(model.objects.db)
+        if update:
+            model.objects.bulk_update(list(update.values()), SPEC_FIELDS, batch_size=self.batch_size)
+        if create:
+            model.objects.bulk_create(create, batch_size=self.batch_size)
+
+    @abstractmethod
+    def publish(self) -> None:
+        """Send the invalidations for what the current chunk touched (runs inside its transaction)."""
+
+
+# -----------------------
+# Items
+# -----------------------
+def _item_label(item: Item) -> str:
+    return f"{item.group.name} / {item.name}"
+
+
+@dataclass
+class ItemRow:
+    line: int
+    group_name: str
+    name: str
+    code: Optional[str]
+    description: str
+    is_active: bool
+    features: List[str]
+    specs: List[Dict[str, str]]
+
+
+class ItemImporter(ChunkedImporter):
+    """
+    Upsert Items (+ features and specs) from rows with the columns
+    group_name, item_name, item_code, description, is_active, features, specs.
+    Items match on item_code when given, else on (group, name).
+    """
+
+    ITEM_FIELDS = ["group", "name", "item_code", "description", "is_active", "updated_at"]
+
+    def __init__(self, mode: str = "upsert", clear_features: bool = False, clear_specs: bool = False,
+                 feature_separator: str = ";", batch_size: int = BATCH_SIZE, dry_run: bool = False):
+        super().__init__(mode, batch_size, dry_run)
+        self.clear_features = clear_features
+        self.clear_specs = clear_specs
+        self.sep = (feature_separator or ";").strip()
+        self.touched_groups: Set[int] = set()
+        self.touched_items: Set[int] = set()
+
+    def publish(self) -> None:
+        _publish_catalog(self.touched_groups, self.touched_items)
+
+    def parse(self, line: int, row: dict) -> Optional[ItemRow]:
+        group_name, name = cell(row, "group_name"), cell(row, "item_name")
+        if not group_name or not name:
+            return None
+        return ItemRow(
+            line=line,
+            group_name=group_name,
+            name=name,
+            code=cell(row, "item_code") or None,
+            description=cell(row, "description"),
+            is_active=parse_bool(row.get("is_active"), default=True),
+            features=split_features(row.get("features") or "", self.sep),
+            specs=parse_specs(cell(row, "specs")),
+        )
+
+    def import_chunk(self, chunk: List[Tuple[int, dict]], result: ImportResult) -> None:
+        self.touched_groups, self.touched_items = set(), set()
+        parsed: List[ItemRow] = []
+        for line, row in chunk:
+            try:
+                rec = self.parse(line, row)
+            except Exception as e:
+                result.error(line, e)
+                continue
+            if rec is None:
+                result.skipped += 1
+            else:
+                parsed.append(rec)
+        if not parsed:
+            return
+
+        # ---- preload ----
+        group_names = {r.group_name for r in parsed}
+        groups: Dict[str, ProductGroup] = {g.name: g for g in ProductGroup.objects.filter(name__in=group_names)}
+        codes = {r.code for r in parsed if r.code}
+        names = {r.name for r in parsed}
+        existing = (
+            Item.objects.filter(item_code__in=codes)
+            | Item.objects.filter(group__name__in=group_names, name__in=names)
+        ).select_related("group")
+        by_code: Dict[str, Item] = {}
+        by_key: Dict[Tuple[str, str], Item] = {}
+        for item in existing:
+            if item.item_code:
+                by_code[item.item_code] = item
+            by_key[(item.group.name, item.name)] = item
+
+        # ---- diff (row order, like the old per-row loop) ----
+        new_groups: List[ProductGroup] = []
+        new_items: List[Item] = []
+        dirty: Dict[int, Item] = {}          # id(item) -> existing item with changes
+        ops: Dict[int, List[ItemRow]] = {}    # id(item) -> rows touching its features/specs
+        items: Dict[int, Item] = {}
+
+        for r in parsed:
+            item = (by_code.get(r.code) if r.code else None) or by_key.get((r.group_name, r.name))
+            if (item is not None and self.mode == "create") or (item is None and self.mode == "update"):
+                result.skipped += 1
+                continue
+
+            holder = by_key.get((r.group_name, r.name))
+            if item is not None and holder is not None and holder is not item:
+                result.error(r.line, f"another item is already named {r.name!r} in {r.group_name!r}")
+                continue
+
+            group = groups.get(r.group_name)
+            if group is None:
+                group = groups[r.group_name] = ProductGroup(name=r.group_name, slug=slugify(r.group_name))
+                new_groups.append(group)
+
+            label = f"{r.group_name} / {r.name}"
+            if item is None:
+                item = Item(group=group, name=r.name, item_code=r.code,
+                            description=r.description, is_active=r.is_active)
+                new_items.append(item)
+                result.created += 1
+                self.note(id(item), r.line, label, {
+                    "group": (None, r.group_name), "name": (None, r.name), "item_code": (None, r.code),
+                    "description": (None, r.description), "is_active": (None, r.is_active),
+                }, created=True)
+            else:
+                self.note(id(item), r.line, label, {
+                    "group": (item.group.name, r.group_name), "name": (item.name, r.name),
+                    "item_code": (item.item_code, r.code or item.item_code),
+                    "description": (item.description, r.description), "is_active": (item.is_active, r.is_active),
+                })
+                by_key.pop((item.group.name, item.name), None)
+                if item.pk and item.group_id:
+                    self.touched_groups.add(item.group_id)  # the group it may be leaving
+                changed = (
+                    item.group_id != group.pk or item.name != r.name or item.description != r.description
+                    or item.is_active != r.is_active or (r.code and item.item_code != r.code)
+                )
+                item.group, item.name = group, r.name
+                item.description, item.is_active = r.description, r.is_active
+                if r.code:
+                    item.item_code = r.code
+                if item.pk and changed:
+                    dirty[id(item)] = item
+                result.updated += 1
+
+            by_key[(r.group_name, r.name)] = item
+            if item.item_code:
+                by_code[item.item_code] = item
+            items[id(item)] = item
+            ops.setdefault(id(item), []).append(r)
+
+        # ---- apply ----
+        if new_groups:
+            ProductGroup.objects.bulk_create(new_groups, batch_size=self.batch_size)
+        if new_items:
+            Item.objects.bulk_create(new_items, batch_size=self.batch_size)
+        if dirty:
+            now = timezone.now()
+            for item in dirty.values():
+                item.updated_at = now
+            Item.objects.bulk_update(list(dirty.values()), self.ITEM_FIELDS, batch_size=self.batch_size)
+
+        for item in items.values():
+            self.touched_groups.add(item.group.pk)
+            self.touched_items.add(item.pk)
+        self._apply_features(items, ops)
+        self.apply_specs(ItemSpec, "item", items, ops, self.clear_specs, _item_label)
+
+    def _apply_features(self, items: Dict[int, Item], ops: Dict[int, List[ItemRow]]) -> None:
+        item_ids = [item.pk for item in items.values()]
+        existing: Dict[int, Set[str]] = {}
+        for item_id, text in ItemFeature.objects.filter(item_id__in=item_ids).values_list("item_id", "text"):
+            existing.setdefault(item_id, set()).add(text)
+
+        cleared: Set[int] = set()
+        create: List[ItemFeature] = []
+        for key, rows in ops.items():
+            item = items[key]
+            have = set(existing.get(item.pk, ()))
+            pending: List[ItemFeature] = []
+            for r in rows:
+                if self.clear_features:
+                    cleared.add(item.pk)
+                    have, pending = set(), []
+                for text in r.features:
+                    if text not in have:
+                        have.add(text)
+                        pending.append(ItemFeature(item=item, text=text))
+            create.extend(pending)
+            self.note(key, rows[0].line, _item_label(item), {
+                "features": (sorted(existing.get(item.pk, ())), sorted(have)),
+            })
+
+        if cleared:
+            # Plain DELETE: features have no dependents, and signals are replaced by _publish_catalog
+            ItemFeature.objects.filter(item_id__in=cleared)._raw_delete(ItemFeature.objects.db)
+        if create:
+            ItemFeature.objects.bulk_create(create, batch_size=self.batch_size)
+
+
+# -----------------------
+# Questions
+# -----------------------
+def _choice_text(order: int, is_active: bool) -> str:
+    return f"order {order}, {'active' if is_active else 'inactive'}"
+
+
+@dataclass
+class QuestionRow:
+    line: int
+    group_name: str
+    text: str
+    input_type: str
+    is_required: bool
+    is_active: bool
+    affects_score: bool
+    order: int
+    question_tag: str
+    choices: List[Dict[str, str]]
+
+
+class QuestionImporter(ChunkedImporter):
+    """
+    Upsert Questions (+ choices) from rows with the columns group_name, text,
+    input_type, choices, is_required, is_active, affects_score, order,
+    question_tag. Questions match on (group, text), choices on (question, text).
+    """
+
+    QUESTION_FIELDS = ["input_type", "is_required", "is_active", "affects_score", "order", "question_tag",
+                       "updated_at"]
+    CHOICE_FIELDS = ["order", "is_active", "updated_at"]
+    MULTI_VALUES = ("multi", "multiple", "checkbox", "checkboxes")
+
+    def __init__(self, mode: str = "upsert", clear_choices: bool = False, choices_separator: str = ";",
+                 batch_size: int = BATCH_SIZE, dry_run: bool = False):
+        super().__init__(mode, batch_size, dry_run)
+        self.clear_choices = clear_choices
+        self.sep = (choices_separator or ";").strip()
+        self.touched_groups: Set[int] = set()
+        self.new_groups: Set[int] = set()
+
+    def publish(self) -> None:
+        _publish_quiz(self.touched_groups, self.new_groups)
+
+    def parse(self, line: int, row: dict) -> Optional[QuestionRow]:
+        group_name, text = cell(row, "group_name"), cell(row, "text")
+        if not group_name or not text:
+            return None
+        multi = cell(row, "input_type").lower() in self.MULTI_VALUES
+        return QuestionRow(
+            line=line,
+            group_name=group_name,
+            text=text,
+            input_type=Question.INPUT_MULTI if multi else Question.INPUT_SINGLE,
+            is_required=parse_bool(row.get("is_required")),
+            is_active=parse_bool(row.get("is_active")),
+            affects_score=parse_bool(row.get("affects_score")),
+            order=parse_int(row.get("order"), default=0),
+            question_tag=cell(row, "question_tag"),
+            choices=parse_choices(row.get("choices") or "", self.sep),
+        )
+
+    def _values(self, r: QuestionRow) -> dict:
+        return {f: getattr(r, f) for f in self.QUESTION_FIELDS if f != "updated_at"}
+
+    def import_chunk(self, chunk: List[Tuple[int, dict]], result: ImportResult) -> None:
+        self.touched_groups, self.new_groups = set(), set()
+        parsed: List[QuestionRow] = []
+        for line, row in chunk:
+            try:
+                rec = self.parse(line, row)
+            except Exception as e:
+                result.error(line, e)
+                continue
+            if rec is None:
+                result.skipped += 1
+            else:
+                parsed.append(rec)
+        if not parsed:
+            return
+
+        # ---- preload ----
+        group_names = {r.group_name for r in parsed}
+        groups: Dict[str, ProductGroup] = {g.name: g for g in ProductGroup.objects.filter(name__in=group_names)}
+        by_key: Dict[Tuple[str, str], Question] = {}
+        existing = (
+            Question.objects.filter(group__name__in=group_names, text__in={r.text for r in parsed})
+            .select_related("group").order_by("order", "id")
+        )
+        for q in existing:
+            by_key.setdefault((q.group.name, q.text), q)  # first match, as .first() picked
+
+        # ---- diff ----
+        new_groups: List[ProductGroup] = []
+        new_questions: List[Question] = []
+        dirty: Dict[int, Question] = {}
+        ops: Dict[int, List[QuestionRow]] = {}
+        questions: Dict[int, Question] = {}
+
+        for r in parsed:
+            q = by_key.get((r.group_name, r.text))
+            if (q is not None and self.mode == "create") or (q is None and self.mode == "update"):
+                result.skipped += 1
+                continue
+
+            values = self._values(r)
+            label = f"{r.group_name} / {r.text}"
+            if q is None:
+                group = groups.get(r.group_name)
+                if group is None:
+                    group = groups[r.group_name] = ProductGroup(name=r.group_name, slug=slugify(r.group_name))
+                    new_groups.append(group)
+                q = by_key[(r.group_name, r.text)] = Question(group=group, text=r.text, **values)
+                new_questions.append(q)
+                result.created += 1
+                self.note(id(q), r.line, label, {f: (None, v) for f, v in values.items()}, created=True)
+            else:
+                self.note(id(q), r.line, label, {f: (getattr(q, f), v) for f, v in values.items()})
+                if any(getattr(q, f) != v for f, v in values.items()):
+                    for f, v in values.items():
+                        setattr(q, f, v)
+                    if q.pk:
+                        dirty[id(q)] = q
+                result.updated += 1
+
+            questions[id(q)] = q
+            ops.setdefault(id(q), []).append(r)
+
+        # ---- apply ----
+        if new_groups:
+            ProductGroup.objects.bulk_create(new_groups, batch_size=self.batch_size)
+            self.new_groups.update(g.pk for g in new_groups)
+        if new_questions:
+            Question.objects.bulk_create(new_questions, batch_size=self.batch_size)
+        if dirty:
+            now = timezone.now()
+            for q in dirty.values():
+                q.updated_at = now
+            Question.objects.bulk_update(list(dirty.values()), self.QUESTION_FIELDS, batch_size=self.batch_size)
+
+        for q in questions.values():
+            self.touched_groups.add(q.group.pk)
+        self._apply_choices(questions, ops, result)
+
+    def _apply_choices(self, questions: Dict[int, Question], ops: Dict[int, List[QuestionRow]],
+                       result: ImportResult) -> None:
+        question_ids = [q.pk for q in questions.values()]
+        existing: Dict[Tuple[int, str], Choice] = {}
+        duplicates: Set[Tuple[int, str]] = set()
+        for ch in Choice.objects.filter(question_id__in=question_ids):
+            key = (ch.question_id, ch.text)
+            if key in existing:
+                duplicates.add(key)
+            existing[key] = ch
+        before = {ch.pk: (ch.order, ch.is_active) for ch in existing.values()}
+        answered: Set[int] = set()
+        if self.clear_choices:
+            # Answers PROTECT their choice; such questions keep their choices
+            answered = set(Answer.objects.filter(choice__question_id__in=question_ids)
+                           .values_list("choice__question_id", flat=True))
+
+        cleared: Set[int] = set()
+        create: List[Choice] = []
+        update: Dict[int, Choice] = {}
+        for key, rows in ops.items():
+            q = questions[key]
+            current: Dict[str, Choice] = {}  # text -> choice touched by this import
+            is_cleared = False
+            for r in rows:
+                if self.clear_choices:
+                    if q.pk in answered:
+                        result.error(r.line, f"choices of {q.text!r} have quiz answers and cannot be cleared")
+                        continue
+                    cleared.add(q.pk)
+                    is_cleared, current = True, {}
+                for spec in r.choices:
+                    label = spec["label"]
+                    ch = current.get(label)
+                    if ch is None and not is_cleared:
+                        if (q.pk, label) in duplicates:
+                            result.error(r.line, f"{q.text!r} has several choices named {label!r}")
+                            continue
+                        ch = existing.get((q.pk, label))
+                    if ch is None:
+                        ch = Choice(question=q, text=label)
+                    ch.order = parse_int(spec.get("order"), default=0)
+                    ch.is_active = parse_bool(spec.get("active"))
+                    current[label] = ch
+            for ch in current.values():
+                if ch.pk:
+                    if (ch.order, ch.is_active) != before[ch.pk]:
+                        update[ch.pk] = ch
+                else:
+                    create.append(ch)
+            if self.dry_run:
+                changes = {f"choice:{text}": (_choice_text(*before[ch.pk]) if ch.pk else None,
+                                              _choice_text(ch.order, ch.is_active))
+                           for text, ch in current.items()}
+                if is_cleared:
+                    for (question_id, text), ch in existing.items():
+                        if question_id == q.pk and text not in current:
+                            changes[f"choice:{text}"] = (_choice_text(*before[ch.pk]), None)
+                self.note(key, rows[0].line, f"{q.group.name} / {q.text}", changes)
+
+        if cleared:
+            # Plain DELETEs of the cascade Choice.delete() would run; Answer rows
+            # were ruled out above and signals are replaced by _publish_quiz
+            db = Choice.objects.db
+            Question.trigger_choices.through.objects.filter(choice__question_id__in=cleared)._raw_delete(db)
+            ChoiceImpact.objects.filter(choice__question_id__in=cleared)._raw_delete(db)
+            Choice.objects.filter(question_id__in=cleared)._raw_delete(db)
+        if update:
+            now = timezone.now()
+            for ch in update.values():
+                ch.updated_at = now
+            Choice.objects.bulk_update(list(update.values()), self.CHOICE_FIELDS, batch_size=self.batch_size)
+        if create:
+            Choice.objects.bulk_create(create, batch_size=self.batch_size)
+
+
+# -----------------------
+# Variants
+# -----------------------
+@dataclass
+class VariantRow:
+    line: int
+    item_code: str
+    code: str
+    name: str
+    description: Optional[str]  # None: column absent, keep the current text
+    is_active: bool
+    specs: List[Dict[str, str]]
+
+
+class VariantImporter(ChunkedImporter):
+    """
+    Upsert ItemVariants (+ specs) from rows with the columns item_code,
+    variant_code, variant_name, description, is_active, specs. Variants match
+    on (item, variant code); the item must already exist. A blank name keeps
+    the current one (new variants are named after their code).
+    """
+
+    VARIANT_FIELDS = ["name", "description", "is_active", "updated_at"]
+
+    def __init__(self, mode: str = "upsert", clear_specs: bool = False, batch_size: int = BATCH_SIZE,
+                 dry_run: bool = False):
+        super().__init__(mode, batch_size, dry_run)
+        self.clear_specs = clear_specs
+        self.touched_groups: Set[int] = set()
+        self.touched_items: Set[int] = set()
+
+    def publish(self) -> None:
+        _publish_variants(self.touched_groups, self.touched_items)
+
+    def parse(self, line: int, row: dict) -> Optional[VariantRow]:
+        item_code, code = cell(row, "item_code"), cell(row, "variant_code")
+        if not item_code or not code:
+            return None
+        return VariantRow(
+            line=line,
+            item_code=item_code,
+            code=code,
+            name=cell(row, "variant_name"),
+            description=cell(row, "description") if "description" in row else None,
+            is_active=parse_bool(row.get("is_active"), default=True),
+            specs=parse_specs(cell(row, "specs")),
+        )
+
+    def import_chunk(self, chunk: List[Tuple[int, dict]], result: ImportResult) -> None:
+        self.touched_groups, self.touched_items = set(), set()
+        parsed: List[VariantRow] = []
+        for line, row in chunk:
+            try:
+                rec = self.parse(line, row)
+            except Exception as e:
+                result.error(line, e)
+                continue
+            if rec is None:
+                result.skipped += 1
+            else:
+                parsed.append(rec)
+        if not parsed:
+            return
+
+        # ---- preload ----
+        item_codes = {r.item_code for r in parsed}
+        items: Dict[str, Item] = {
+            item.item_code: item
+            for item in Item.objects.filter(item_code__in=item_codes).only("id", "group_id", "item_code")
+        }
+        items_by_id = {item.pk: item for item in items.values()}
+        by_code: Dict[Tuple[int, str], ItemVariant] = {}
+        by_name: Dict[Tuple[int, str], ItemVariant] = {}
+        for v in ItemVariant.objects.filter(item_id__in=items_by_id).order_by("id"):
+            v.item = items_by_id[v.item_id]
+            if v.code:
+                by_code.setdefault((v.item_id, v.code), v)
+            by_name[(v.item_id, v.name)] = v
+
+        # ---- diff ----
+        new_variants: List[ItemVariant] = []
+        dirty: Dict[int, ItemVariant] = {}
+        ops: Dict[int, List[VariantRow]] = {}
+        variants: Dict[int, ItemVariant] = {}
+
+        for r in parsed:
+            item = items.get(r.item_code)
+            if item is None:
+                result.error(r.line, f"no item with item_code {r.item_code!r}")
+                continue
+            v = by_code.get((item.pk, r.code))
+            if (v is not None and self.mode == "create") or (v is None and self.mode == "update"):
+                result.skipped += 1
+                continue
+
+            name = r.name or (v.name if v is not None else r.code)
+            holder = by_name.get((item.pk, name))
+            if holder is not None and holder is not v:
+                result.error(r.line, f"another variant of {r.item_code!r} is already named {name!r}")
+                continue
+
+            values = {"name": name, "is_active": r.is_active}
+            if r.description is not None:
+                values["description"] = r.description
+            label = f"{r.item_code} / {r.code}"
+            if v is None:
+                v = ItemVariant(item=item, code=r.code, **values)
+                new_variants.append(v)
+                result.created += 1
+                self.note(id(v), r.line, label, {f: (None, val) for f, val in values.items()}, created=True)
+            else:
+                self.note(id(v), r.line, label, {f: (getattr(v, f), val) for f, val in values.items()})
+                if any(getattr(v, f) != val for f, val in values.items()):
+                    by_name.pop((item.pk, v.name), None)
+                    for f, val in values.items():
+                        setattr(v, f, val)
+                    if v.pk:
+                        dirty[id(v)] = v
+                result.updated += 1
+
+            by_code[(item.pk, r.code)] = by_name[(item.pk, name)] = v
+            variants[id(v)] = v
+            ops.setdefault(id(v), []).append(r)
+            self.touched_groups.add(item.group_id)
+            self.touched_items.add(item.pk)
+
+        # ---- apply ----
+        if new_variants:
+            ItemVariant.objects.bulk_create(new_variants, batch_size=self.batch_size)
+        if dirty:
+            now = timezone.now()
+            for v in dirty.values():
+                v.updated_at = now
+            ItemVariant.objects.bulk_update(list(dirty.values()), self.VARIANT_FIELDS, batch_size=self.batch_size)
+        self.apply_specs(ItemVariantSpec, "variant", variants, ops, self.clear_specs,
+                         lambda v: f"{v.item.item_code} / {v.code}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from configurator.images import IMAGE_FIELDS, refresh_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/AVIF/JPEG derivatives for catalog images that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild manifests even when they look current.")
+
+    def handle(self, *args, force, **options):
+        for model, (image_field, _) in IMAGE_FIELDS.items():
+            pks = list(
+                model.objects.exclude(**{image_field: ""}).exclude(**{f"{image_field}__isnull": True})
+                .order_by("pk").values_list("pk", flat=True)
+            )
+            changed = sum(refresh_derivatives(model, pk, force=force) for pk in pks)
+            self.stdout.write(f"{model.__name__}: {changed} of {len(pks)} updated")
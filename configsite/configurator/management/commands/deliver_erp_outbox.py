@@ -0,0 +1,28 @@
+# configurator/management/commands/deliver_erp_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from configurator.outbox import deliver_due
+
+
+class Command(BaseCommand):
+    help = "Deliver queued ERP leads/visitor records from the outbox (retries with backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of running once.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, batch_size, loop, interval, **options):
+        while True:
+            stats = deliver_due(batch_size=batch_size)
+            if any(stats.values()):
+                self.stdout.write(
+                    f"delivered={stats['delivered']} failed={stats['failed']} skipped={stats['skipped']}"
+                )
+            if not loop:
+                break
+            # Drain back-to-back while there is work; otherwise sleep
+            if not stats["delivered"] and not stats["failed"]:
+                time.sleep(interval)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from configurator.models import IMAGE_STATUS_CHOICES, Choice, Question
+from configurator.quiz_media import WORKERS, reprocess
+
+
+class Command(BaseCommand):
+    help = "Downscale every Question/Choice image in parallel and record its status and dimensions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (default: %(default)s).")
+        parser.add_argument(
+            "--status", action="append", choices=[value for value, _ in IMAGE_STATUS_CHOICES if value],
+            help="Only rows with this image status (repeatable), e.g. --status failed --status pending.",
+        )
+
+    def handle(self, *args, workers, status, **options):
+        def rows():
+            for model in (Question, Choice):
+                qs = model.objects.exclude(image="").exclude(image__isnull=True)
+                if status:
+                    qs = qs.filter(image_status__in=status)
+                yield from qs.order_by("pk").iterator()
+
+        ok = failed = 0
+        for obj, success in reprocess(rows(), workers=workers):
+            if success:
+                ok += 1
+            else:
+                failed += 1
+                self.stderr.write(f"{type(obj).__name__} {obj.pk}: {obj.image.name} failed")
+        self.stdout.write(f"processed={ok} failed={failed}")
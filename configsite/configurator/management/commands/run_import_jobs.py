@@ -0,0 +1,24 @@
+# configurator/management/commands/run_import_jobs.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from configurator.import_jobs import run_due
+
+
+class Command(BaseCommand):
+    help = "Run queued catalog import jobs (and resume ones whose worker died)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of running once.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop.")
+
+    def handle(self, *args, loop, interval, **options):
+        while True:
+            ran = run_due()
+            if ran:
+                self.stdout.write(f"ran={ran}")
+            if not loop:
+                break
+            if not ran:
+                time.sleep(interval)
@@ -0,0 +1,23 @@
+# configurator/management/commands/sync_job_openings.py
+from django.core.management.base import BaseCommand, CommandError
+
+from configurator.careers_api import sync_job_openings
+
+
+class Command(BaseCommand):
+    help = "Mirror ERP Job Openings into the local JobOpening table (incremental by `modified`)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Ignore the watermark, re-pull everything and drop rows deleted in the ERP.",
+        )
+
+    def handle(self, *args, full, **options):
+        try:
+            stats = sync_job_openings(full=full)
+        except Exception as e:
+            raise CommandError(f"Job opening sync failed: {e}")
+        self.stdout.write(
+            f"created={stats['created']} updated={stats['updated']} deleted={stats['deleted']}"
+        )
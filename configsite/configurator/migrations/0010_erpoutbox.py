@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0009_question_depends_on_question_trigger_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ERPOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Contact form'), ('quote', 'Item quote'), ('quiz_lead', 'Quiz lead')], max_length=20)),
+                ('doctype', models.CharField(help_text='ERP resource the payload is POSTed to', max_length=60)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('delivered', 'Delivered'), ('dead', 'Dead-lettered')], default='pending', max_length=12)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('response_status', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+                ('contact_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='configurator.contactmessage')),
+                ('quiz_session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='configurator.quizsession')),
+            ],
+            options={
+                'verbose_name': 'ERP outbox message',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='configurato_status_4d4404_idx')],
+            },
+        ),
+    ]
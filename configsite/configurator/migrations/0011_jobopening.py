@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0010_erpoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobOpening',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='ERP document name (job id)', max_length=140, unique=True)),
+                ('designation', models.CharField(blank=True, db_index=True, max_length=140)),
+                ('status', models.CharField(blank=True, db_index=True, max_length=40)),
+                ('territory', models.CharField(blank=True, db_index=True, max_length=140)),
+                ('qualification', models.CharField(blank=True, max_length=255)),
+                ('no_of_vacancy', models.PositiveIntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('erp_modified', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['designation', 'name'],
+                'indexes': [models.Index(fields=['status', 'designation', 'territory'], name='configurato_status_91975b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:47
+
+import math
+import re
+from typing import Dict, Optional, Tuple
+
+from django.db import migrations, models
+
+
+# Frozen copy of configurator.units as of this migration, so later changes to
+# the live parser do not change what this backfill does.
+
+# unit alias -> (canonical unit, factor to canonical). Exact spelling wins;
+# the case-insensitive table only keeps aliases that are unambiguous
+# ("mW" and "MW" differ, "KG" and "kg" do not).
+_UNITS: Dict[str, Tuple[str, float]] = {}
+_UNITS_CI: Dict[str, Optional[Tuple[str, float]]] = {}
+
+
+def _define(canonical: str, *aliases: Tuple[str, float]):
+    for alias, factor in ((canonical, 1.0),) + aliases:
+        entry = (canonical, factor)
+        _UNITS[alias] = entry
+        key = alias.lower()
+        _UNITS_CI[key] = entry if _UNITS_CI.get(key, entry) == entry else None
+
+
+# Length
+_define("m", ("mm", 1e-3), ("cm", 1e-2), ("km", 1e3), ("in", 0.0254), ("inch", 0.0254),
+        ("inches", 0.0254), ('"', 0.0254), ("ft", 0.3048), ("feet", 0.3048), ("µm", 1e-6), ("um", 1e-6))
+# Mass
+_define("kg", ("g", 1e-3), ("mg", 1e-6), ("t", 1e3), ("ton", 1e3), ("tonne", 1e3), ("lb", 0.45359237),
+        ("lbs", 0.45359237))
+# Power
+_define("W", ("mW", 1e-3), ("kW", 1e3), ("MW", 1e6), ("hp", 745.699872), ("VA", 1.0), ("kVA", 1e3))
+# Electrical
+_define("V", ("mV", 1e-3), ("kV", 1e3), ("VAC", 1.0), ("VDC", 1.0))
+_define("A", ("mA", 1e-3), ("kA", 1e3))
+_define("Ah", ("mAh", 1e-3))
+_define("Wh", ("kWh", 1e3))
+_define("ohm", ("Ω", 1.0), ("kohm", 1e3), ("kΩ", 1e3), ("Mohm", 1e6), ("MΩ", 1e6))
+# Frequency / speed
+_define("Hz", ("kHz", 1e3), ("MHz", 1e6), ("GHz", 1e9))
+_define("rpm", ("r/min", 1.0))
+# Pressure
+_define("Pa", ("kPa", 1e3), ("MPa", 1e6), ("bar", 1e5), ("mbar", 1e2), ("psi", 6894.757))
+# Volume / flow
+_define("l", ("L", 1.0), ("litre", 1.0), ("liter", 1.0), ("ml", 1e-3), ("m3", 1e3), ("m³", 1e3))
+_define("l/min", ("lpm", 1.0), ("l/h", 1 / 60), ("m3/h", 1e3 / 60), ("m³/h", 1e3 / 60))
+# Time
+_define("s", ("sec", 1.0), ("ms", 1e-3), ("min", 60.0), ("h", 3600.0), ("hr", 3600.0), ("hrs", 3600.0))
+# Temperature (differences and limits are compared in °C only; no offset conversion)
+_define("°C", ("c", 1.0), ("degc", 1.0), ("deg c", 1.0))
+# Ratios
+_define("%", ("percent", 1.0))
+
+# "1,200.5", "-3", ".5", "2e3"; optional trailing unit text
+_NUMBER_RE = re.compile(r"^\s*([-+]?(?:\d{1,3}(?:,\d{3})+|\d+)?(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*(.*?)\s*$")
+
+
+def _lookup(unit: str) -> Optional[Tuple[str, float]]:
+    return _UNITS.get(unit) or _UNITS_CI.get(unit.lower())
+
+
+def canonical_unit(unit: str) -> Tuple[str, float]:
+    unit = (unit or "").strip()
+    if not unit:
+        return "", 1.0
+    return _lookup(unit) or (unit, 1.0)
+
+
+def parse_number(text: str) -> Tuple[Optional[float], str]:
+    m = _NUMBER_RE.match(text or "")
+    if not m or not m.group(1) or not re.search(r"\d", m.group(1)):
+        return None, ""
+    try:
+        number = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return None, ""
+    if not math.isfinite(number):  # e.g. "1e999"
+        return None, ""
+    return number, m.group(2)
+
+
+def normalize_spec(value: str, unit: str = "") -> Tuple[Optional[float], str]:
+    number, trailing = parse_number(value)
+    if number is None:
+        return None, canonical_unit(unit)[0]
+    unit = (unit or "").strip()
+    if trailing:
+        if unit or _lookup(trailing) is None:
+            return None, canonical_unit(unit)[0]
+        unit = trailing
+    canonical, factor = canonical_unit(unit)
+    return number * factor, canonical
+
+
+def backfill_numeric_specs(apps, schema_editor):
+    for model_name in ("ItemSpec", "ItemVariantSpec"):
+        model = apps.get_model("configurator", model_name)
+        batch = []
+        for spec in model.objects.only("id", "value", "unit").iterator(chunk_size=2000):
+            spec.value_num, spec.unit_canonical = normalize_spec(spec.value, spec.unit)
+            batch.append(spec)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ["value_num", "unit_canonical"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["value_num", "unit_canonical"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0011_jobopening'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemspec',
+            name='unit_canonical',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='itemspec',
+            name='value_num',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='itemvariantspec',
+            name='unit_canonical',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='itemvariantspec',
+            name='value_num',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='itemspec',
+            index=models.Index(fields=['label', 'unit_canonical', 'value_num'], name='cfg_itemspec_num_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='itemvariantspec',
+            index=models.Index(fields=['label', 'unit_canonical', 'value_num'], name='cfg_variantspec_num_idx'),
+        ),
+        migrations.RunPython(backfill_numeric_specs, migrations.RunPython.noop),
+    ]
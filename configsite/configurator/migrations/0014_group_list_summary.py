@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:10
+
+from django.db import migrations, models
+
+
+def backfill_group_summary(apps, schema_editor):
+    ProductGroup = apps.get_model("configurator", "ProductGroup")
+    Item = apps.get_model("configurator", "Item")
+    ItemImage = apps.get_model("configurator", "ItemImage")
+    image_storage = ItemImage._meta.get_field("image").storage
+
+    for group in ProductGroup.objects.all():
+        active = Item.objects.filter(group_id=group.pk, is_active=True)
+        hero_url = group.hero_image.url if group.hero_image else ""
+        if not hero_url:
+            first = (
+                ItemImage.objects.filter(item__in=active)
+                .order_by("item__name", "item_id", "id")
+                .values_list("image", flat=True)
+                .first()
+            )
+            if first:
+                hero_url = image_storage.url(first)
+        ProductGroup.objects.filter(pk=group.pk).update(hero_url=hero_url, active_item_count=active.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0013_catalog_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productgroup',
+            name='hero_url',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='productgroup',
+            name='active_item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_group_summary, migrations.RunPython.noop),
+    ]
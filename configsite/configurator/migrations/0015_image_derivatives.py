@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0014_group_list_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='itemvariantimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='page',
+            name='hero_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productgroup',
+            name='hero_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
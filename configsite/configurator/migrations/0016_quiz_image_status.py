@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:00
+
+from django.db import migrations, models
+
+
+def backfill_image_status(apps, schema_editor):
+    # Images resized on save already carry their dimensions; the rest are left
+    # for `manage.py reprocess_quiz_images --status pending`.
+    for model_name in ("Question", "Choice"):
+        model = apps.get_model("configurator", model_name)
+        with_image = model.objects.exclude(image="").exclude(image__isnull=True)
+        with_image.filter(image_width__gt=0).update(image_status="done")
+        with_image.filter(image_width=0).update(image_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0015_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='image_error',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='choice',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Processing'), ('done', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='image_error',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Processing'), ('done', 'Ready'), ('failed', 'Failed')], default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(backfill_image_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0017_import_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='kind',
+            field=models.CharField(choices=[('items', 'Items'), ('questions', 'Questions'), ('variants', 'Item variants')], max_length=20),
+        ),
+    ]
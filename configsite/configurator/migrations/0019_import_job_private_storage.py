@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:25
+
+import configurator.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0018_import_job_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(help_text='Removed once the job is done or deleted', storage=configurator.models.import_storage, upload_to='imports/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+import re
+
+from django.db import migrations
+
+# What 0012 normalized wrongly: VA/kVA as W, a bare "c" as °C
+_APPARENT_POWER = {"va": 1.0, "kva": 1e3}
+_BARE_CELSIUS = "c"
+_TRAILING_UNIT_RE = re.compile(r"^\s*[-+]?[\d,]*(?:\.\d+)?(?:[eE][-+]?\d+)?\s*(.*?)\s*$")
+
+
+def _effective_unit(spec) -> str:
+    unit = (spec.unit or "").strip()
+    if unit:
+        return unit
+    m = _TRAILING_UNIT_RE.match(spec.value or "")
+    return m.group(1) if m else ""
+
+
+def renormalize_specs(apps, schema_editor):
+    for model_name in ("ItemSpec", "ItemVariantSpec"):
+        model = apps.get_model("configurator", model_name)
+        batch = []
+        specs = model.objects.filter(unit_canonical__in=("W", "°C")).only("id", "value", "unit", "value_num")
+        for spec in specs.iterator(chunk_size=2000):
+            unit = _effective_unit(spec)
+            if unit.lower() in _APPARENT_POWER and spec.unit_canonical == "W":
+                spec.unit_canonical = "VA"  # same factors relative to VA as they had to W
+            elif unit.lower() == _BARE_CELSIUS and spec.unit_canonical == "°C":
+                # Now an unknown unit: kept as spelled in the unit field; embedded
+                # in the value it makes the value non-numeric
+                if (spec.unit or "").strip():
+                    spec.unit_canonical = spec.unit.strip()
+                else:
+                    spec.value_num, spec.unit_canonical = None, ""
+            else:
+                continue
+            batch.append(spec)
+        model.objects.bulk_update(batch, ["value_num", "unit_canonical"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configurator', '0019_import_job_private_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_specs, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,16 @@
 # configurator/models.py
 from __future__ import annotations
-from io import BytesIO
-from pathlib import Path
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from PIL import Image
 from ckeditor_uploader.fields import RichTextUploadingField
 
+from .units import normalize_spec
+
 
 
 
@@ -46,6 +48,8 @@ class Page(models.Model):
     hero_image = models.ImageField(upload_to="page_heroes/", blank=True, null=True)
     hero_alt = models.CharField(max_length=200, blank=True)
     hero_caption = models.CharField(max_length=200, blank=True)
+    # Responsive derivatives manifest (see images.py)
+    hero_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     # External redirect (e.g., WordPress)
     external_url = models.URLField(blank=True, help_text="If set, this page redirects to this URL")
@@ -60,6 +64,8 @@ class Page(models.Model):
     #  NEW: page-specific CSS editable from admin
     custom_css = models.TextField(blank=True, help_text="Optional CSS for this page only.")
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         ordering = ["menu_order", "title"]
 
@@ -111,36 +117,47 @@ def _validate_img_dimensions(img: Image.Image, max_w: int, max_h: int, label: st
         )
 
 
-def _downscale_to_box(img: Image.Image, max_w: int, max_h: int) -> Image.Image:
-    """Return copy downscaled to fit in (max_w, max_h) preserving aspect ratio."""
-    w, h = img.size
-    if w <= max_w and h <= max_h:
-        return img
-    img = img.copy()
-    img.thumbnail((max_w, max_h), Image.LANCZOS)
-    return img
+# Downscaling to the boxes above runs after commit in a worker pool (see quiz_media.py)
+IMAGE_STATUS_NONE = ""
+IMAGE_STATUS_PENDING = "pending"
+IMAGE_STATUS_DONE = "done"
+IMAGE_STATUS_FAILED = "failed"
+IMAGE_STATUS_CHOICES = [
+    (IMAGE_STATUS_NONE, "No image"),
+    (IMAGE_STATUS_PENDING, "Processing"),
+    (IMAGE_STATUS_DONE, "Ready"),
+    (IMAGE_STATUS_FAILED, "Failed"),
+]
 
 
-def _save_resized_to_field(img: Image.Image, field: models.ImageField, fmt_hint: str = "JPEG", quality: int = 88):
+def _mark_image_pending(obj, save_kwargs: dict):
     """
-    Encode Image into field (in-place, without calling model.save()).
-    Default to JPEG with quality, keep PNG if the original name ends with .png.
+    Flag a freshly uploaded (or removed) image for the worker pool instead of
+    resizing it inside the request; already-processed files are left alone.
+    """
+    if obj.image and obj.image._committed:
+        return
+    obj.image_status = IMAGE_STATUS_PENDING if obj.image else IMAGE_STATUS_NONE
+    # Transient: tells the post_save hook that this save, not an earlier one, brought the file
+    obj._image_uploaded = bool(obj.image)
+    obj.image_width = obj.image_height = 0
+    obj.image_error = ""
+    update_fields = save_kwargs.get("update_fields")
+    if update_fields is not None and "image" in update_fields:
+        save_kwargs["update_fields"] = set(update_fields) | {
+            "image_status", "image_width", "image_height", "image_error",
+        }
+
+
+def _normalize_spec_fields(spec, save_kwargs: dict):
     """
-    buf = BytesIO()
-    fmt = "PNG" if str(fmt_hint).lower().endswith(".png") else "JPEG"
-    save_params = {"format": fmt}
-    if fmt == "JPEG":
-        save_params.update({"optimize": True, "quality": quality})
-        if img.mode not in ("RGB", "L"):
-            img = img.convert("RGB")
-    img.save(buf, **save_params)
-
-    content = ContentFile(buf.getvalue())
-    original_name = Path(field.name or "upload").name
-    stem = Path(original_name).stem or "image"
-    ext = ".png" if fmt == "PNG" else ".jpg"
-    new_name = f"{stem}_resized{ext}"
-    field.save(new_name, content, save=False)
+    Fill value_num/unit_canonical from value/unit before saving a spec row,
+    keeping them in update_fields when a partial save touches value or unit.
+    """
+    spec.value_num, spec.unit_canonical = normalize_spec(spec.value, spec.unit)
+    update_fields = save_kwargs.get("update_fields")
+    if update_fields is not None and {"value", "unit"} & set(update_fields):
+        save_kwargs["update_fields"] = set(update_fields) | {"value_num", "unit_canonical"}
 
 
 # =========================
@@ -152,6 +169,15 @@ class ProductGroup(models.Model):
     slug = models.SlugField(max_length=140, unique=True, blank=True)
     is_active = models.BooleanField(default=True)
     hero_image = models.ImageField(upload_to="group_heroes/", blank=True, null=True)
+    # Responsive derivatives manifest (see images.py)
+    hero_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped (monotonic, µs timestamp) whenever anything in the group changes; see catalog.py
+    catalog_version = models.BigIntegerField(default=0, editable=False)
+    # Group-list card summary, kept current by signals (see catalog.refresh_group_summary)
+    hero_url = models.CharField(max_length=500, blank=True, editable=False)
+    active_item_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["name"]
@@ -175,6 +201,8 @@ class Item(models.Model):
     # NEW
     item_code = models.CharField(max_length=50, unique=True, blank=True, null=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         unique_together = ("group", "name")
         ordering = ["name"]
@@ -224,6 +252,12 @@ class Question(models.Model):
     image = models.ImageField(upload_to="question_images/", blank=True, null=True)
     image_width = models.PositiveIntegerField(default=0, editable=False)
     image_height = models.PositiveIntegerField(default=0, editable=False)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_STATUS_NONE, blank=True, editable=False
+    )
+    image_error = models.CharField(max_length=300, blank=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["group", "order", "id"]
@@ -246,17 +280,8 @@ class Question(models.Model):
             _validate_img_dimensions(img, QUESTION_MAX_W, QUESTION_MAX_H, "Question")
 
     def save(self, *args, **kwargs):
-        # Auto-downscale to limits to avoid heavy images in the quiz
-        if self.image and hasattr(self.image, "file"):
-            try:
-                img = Image.open(self.image)
-                img.load()
-                img = _downscale_to_box(img, QUESTION_MAX_W, QUESTION_MAX_H)
-                _save_resized_to_field(img, self.image, fmt_hint=self.image.name)
-                self.image_width, self.image_height = img.size
-            except Exception:
-                # If anything fails during processing, proceed with original file
-                pass
+        # Auto-downscale to limits happens after commit, off the request (quiz_media.py)
+        _mark_image_pending(self, kwargs)
         super().save(*args, **kwargs)
 
     depends_on = models.ForeignKey(
@@ -288,10 +313,11 @@ class Question(models.Model):
         - If no dependency: always True
         - If dependency set but no trigger choices selected: False
         """
-        if not self.depends_on:
+        if not self.depends_on_id:
             return True
-        need = set(self.trigger_choices.values_list("id", flat=True))
-        return bool(need & selected_choice_ids)
+        from .quiz_graph import get_graph  # local import: quiz_graph imports models
+        graph = get_graph(self.group_id)
+        return graph.is_triggered_by(self.pk, set(selected_choice_ids), any_parent_choice=False)
 
 
 
@@ -306,6 +332,12 @@ class Choice(models.Model):
     image = models.ImageField(upload_to="choice_images/", blank=True, null=True)
     image_width = models.PositiveIntegerField(default=0, editable=False)
     image_height = models.PositiveIntegerField(default=0, editable=False)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES, default=IMAGE_STATUS_NONE, blank=True, editable=False
+    )
+    image_error = models.CharField(max_length=300, blank=True, editable=False)
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["question", "order", "id"]
@@ -326,15 +358,7 @@ class Choice(models.Model):
             _validate_img_dimensions(img, CHOICE_MAX_W, CHOICE_MAX_H, "Choice")
 
     def save(self, *args, **kwargs):
-        if self.image and hasattr(self.image, "file"):
-            try:
-                img = Image.open(self.image)
-                img.load()
-                img = _downscale_to_box(img, CHOICE_MAX_W, CHOICE_MAX_H)
-                _save_resized_to_field(img, self.image, fmt_hint=self.image.name)
-                self.image_width, self.image_height = img.size
-            except Exception:
-                pass
+        _mark_image_pending(self, kwargs)
         super().save(*args, **kwargs)
 
 
@@ -381,6 +405,8 @@ class ItemImage(models.Model):
     item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="item_images/")  # requires Pillow
     alt_text = models.CharField(max_length=200, blank=True)
+    # Responsive derivatives manifest (see images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -399,12 +425,20 @@ class ItemSpec(models.Model):
     value = models.CharField(max_length=400, blank=True)
     unit  = models.CharField(max_length=40, blank=True)
     order = models.PositiveIntegerField(default=0)
+    # Parsed from value/unit on save (see units.normalize_spec); drives range facets
+    value_num = models.FloatField(null=True, blank=True, editable=False)
+    unit_canonical = models.CharField(max_length=40, blank=True, editable=False)
     highlight = models.BooleanField(default=False, help_text="Emphasize this spec in UI")
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["label", "unit_canonical", "value_num"], name="cfg_itemspec_num_idx")]
         unique_together = [("item", "label")]
 
+    def save(self, *args, **kwargs):
+        _normalize_spec_fields(self, kwargs)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         v = f"{self.value}{(' ' + self.unit) if self.unit else ''}"
         return f"{self.label}: {v}" if v else self.label
@@ -447,6 +481,160 @@ class ERPSettings(models.Model):
         return f"ERP Settings ({'enabled' if self.is_enabled else 'disabled'})"
 
 
+# --- ERP outbox: leads/visitors recorded with the local write, delivered by a worker ---
+class ERPOutbox(models.Model):
+    KIND_CONTACT = "contact"
+    KIND_QUOTE = "quote"
+    KIND_QUIZ_LEAD = "quiz_lead"
+    KINDS = [
+        (KIND_CONTACT, "Contact form"),
+        (KIND_QUOTE, "Item quote"),
+        (KIND_QUIZ_LEAD, "Quiz lead"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_DELIVERED = "delivered"
+    STATUS_DEAD = "dead"
+    STATUSES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_DELIVERED, "Delivered"),
+        (STATUS_DEAD, "Dead-lettered"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    doctype = models.CharField(max_length=60, help_text="ERP resource the payload is POSTed to")
+    payload = models.JSONField()
+
+    status = models.CharField(max_length=12, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    response_status = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    # Optional links back to the local record
+    contact_message = models.ForeignKey(ContactMessage, on_delete=models.SET_NULL, null=True, blank=True)
+    quiz_session = models.ForeignKey("QuizSession", on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        verbose_name = "ERP outbox message"
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_delivered(self) -> bool:
+        return self.status == self.STATUS_DELIVERED
+
+
+# --- Catalog imports: uploaded from the admin, run by a background worker ---
+def import_storage():
+    """Uploaded sheets live outside MEDIA_ROOT, so they are never served."""
+    return FileSystemStorage(location=settings.IMPORT_UPLOAD_ROOT)
+
+
+class ImportJob(models.Model):
+    KIND_ITEMS = "items"
+    KIND_QUESTIONS = "questions"
+    KIND_VARIANTS = "variants"
+    KINDS = [
+        (KIND_ITEMS, "Items"),
+        (KIND_QUESTIONS, "Questions"),
+        (KIND_VARIANTS, "Item variants"),
+    ]
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUSES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    file = models.FileField(upload_to="imports/%Y/%m/", storage=import_storage,
+                            help_text="Removed once the job is done or deleted")
+    original_name = models.CharField(max_length=255, blank=True)
+    options = models.JSONField(default=dict, blank=True, help_text="Importer keyword arguments (mode, separators…)")
+    dry_run = models.BooleanField(default=False, help_text="Report counts and diffs without writing anything")
+
+    status = models.CharField(max_length=12, choices=STATUSES, default=STATUS_QUEUED)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_done = models.PositiveIntegerField(default=0, help_text="Data rows finished; a resumed job skips them")
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    diffs = models.JSONField(default=list, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "locked_at"])]
+
+    def __str__(self):
+        label = f"{self.get_kind_display()} import #{self.pk}"
+        return f"{label} (dry run)" if self.dry_run else label
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    @property
+    def percent(self) -> int | None:
+        if not self.total_rows:
+            return 100 if self.is_finished else None
+        return min(100, self.rows_done * 100 // self.total_rows)
+
+
+# --- Careers: local mirror of the ERP "Job Opening" doctype ---
+class JobOpeningQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(status=JobOpening.STATUS_OPEN)
+
+
+class JobOpening(models.Model):
+    STATUS_OPEN = "Open"
+
+    name = models.CharField(max_length=140, unique=True, help_text="ERP document name (job id)")
+    designation = models.CharField(max_length=140, blank=True, db_index=True)
+    status = models.CharField(max_length=40, blank=True, db_index=True)
+    territory = models.CharField(max_length=140, blank=True, db_index=True)
+    qualification = models.CharField(max_length=255, blank=True)
+    no_of_vacancy = models.PositiveIntegerField(null=True, blank=True)
+    description = models.TextField(blank=True)
+
+    # Sync bookkeeping: ERP `modified` is the incremental-sync watermark
+    erp_modified = models.DateTimeField(null=True, blank=True, db_index=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    objects = JobOpeningQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["designation", "name"]
+        indexes = [models.Index(fields=["status", "designation", "territory"])]
+
+    def __str__(self):
+        return f"{self.designation or '-'} ({self.name})"
+
+
 
 
 
@@ -467,6 +655,8 @@ class ItemVariant(models.Model):
     # Optional: variant-specific description (falls back to item.description in templates if blank)
     description = RichTextUploadingField(blank=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         unique_together = (("item", "name"),)
         ordering = ["name"]
@@ -479,6 +669,8 @@ class ItemVariantImage(models.Model):
     variant = models.ForeignKey(ItemVariant, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="item_variant_images/")
     alt_text = models.CharField(max_length=200, blank=True)
+    # Responsive derivatives manifest (see images.py)
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -494,12 +686,20 @@ class ItemVariantSpec(models.Model):
     value = models.CharField(max_length=400, blank=True)
     unit  = models.CharField(max_length=40, blank=True)
     order = models.PositiveIntegerField(default=0)
+    # Parsed from value/unit on save (see units.normalize_spec); drives range facets
+    value_num = models.FloatField(null=True, blank=True, editable=False)
+    unit_canonical = models.CharField(max_length=40, blank=True, editable=False)
     highlight = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["order", "id"]
+        indexes = [models.Index(fields=["label", "unit_canonical", "value_num"], name="cfg_variantspec_num_idx")]
         unique_together = [("variant", "label")]
 
+    def save(self, *args, **kwargs):
+        _normalize_spec_fields(self, kwargs)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         v = f"{self.value}{(' ' + self.unit) if self.unit else ''}"
         return f"{self.label}: {v}" if v else self.label
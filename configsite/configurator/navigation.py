@@ -0,0 +1,88 @@
+# configurator/navigation.py
+"""
+Cached site navigation.
+
+One compiled snapshot serves both the header menu (menu_pages context
+processor) and /api/product-menu/. It is kept per worker and rebuilt only when
+a Page/ProductGroup/Item save bumps the navigation version (see signals.py).
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Max, Prefetch
+
+from .models import Item, Page, ProductGroup
+from .versioning import bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "navigation"
+
+
+@dataclass(frozen=True)
+class MenuPage:
+    title: str
+    slug: str
+    external_url: str
+
+
+@dataclass(frozen=True)
+class Navigation:
+    version: int
+    pages: Tuple[MenuPage, ...]
+    product_menu: Dict[str, List[dict]]  # JSON body of /api/product-menu/
+    etag: str                            # quoted strong ETag of product_menu
+    pages_modified: Optional[datetime]   # latest Page.updated_at, for Last-Modified
+
+
+def compile_navigation(version: int = 0) -> Navigation:
+    pages = tuple(
+        MenuPage(title=p.title, slug=p.slug, external_url=p.external_url)
+        for p in Page.objects.filter(is_active=True)
+        .order_by("menu_order")
+        .only("title", "slug", "external_url")
+    )
+
+    groups = (
+        ProductGroup.objects.filter(is_active=True)
+        .order_by("name")
+        .only("name", "slug")
+        .prefetch_related(
+            Prefetch(
+                "items",
+                queryset=Item.objects.filter(is_active=True)
+                .only("id", "name", "group_id")
+                .order_by("name"),
+                to_attr="menu_items",
+            )
+        )
+    )
+    data = []
+    for g in groups:
+        items = [{"name": it.name} for it in g.menu_items]
+        if items:
+            data.append({"name": g.name, "slug": g.slug, "items": items})
+    product_menu = {"groups": data}
+
+    body = json.dumps(product_menu, sort_keys=True, separators=(",", ":")).encode()
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    pages_modified = Page.objects.aggregate(latest=Max("updated_at"))["latest"]
+    return Navigation(
+        version=version, pages=pages, product_menu=product_menu, etag=etag, pages_modified=pages_modified,
+    )
+
+
+_navigation: Optional[Navigation] = None
+
+
+def get_navigation() -> Navigation:
+    global _navigation
+    version = get_version(VERSION_NAMESPACE)
+    if _navigation is None or _navigation.version != version:
+        _navigation = compile_navigation(version)
+    return _navigation
+
+
+def invalidate_navigation() -> None:
+    bump_version_on_commit(VERSION_NAMESPACE)
@@ -0,0 +1,172 @@
+# configurator/outbox.py
+"""
+Transactional ERP outbox.
+
+Views call `enqueue()` inside the same transaction as their local write, so a
+lead is never lost and never sent for a rolled-back row. Delivery happens out
+of band: `deliver_due()` is run by the `deliver_erp_outbox` management command
+and, unless disabled, by a small daemon thread kicked after each commit.
+Failed sends are retried with exponential backoff and dead-lettered after
+ERP_OUTBOX_MAX_ATTEMPTS.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .erp import client_for, get_erp_settings
+from .models import ERPOutbox, ERPSettings
+
+log = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "ERP_OUTBOX_MAX_ATTEMPTS", 8)
+BACKOFF_BASE_SECONDS = getattr(settings, "ERP_OUTBOX_BACKOFF_BASE", 30)
+BACKOFF_MAX_SECONDS = getattr(settings, "ERP_OUTBOX_BACKOFF_MAX", 6 * 60 * 60)
+LEASE_SECONDS = getattr(settings, "ERP_OUTBOX_LEASE", 120)
+INLINE_THREAD = getattr(settings, "ERP_OUTBOX_THREAD", True)
+
+# 4xx answers that are still worth retrying
+RETRYABLE_CLIENT_ERRORS = {408, 409, 425, 429}
+
+
+def enqueue(kind: str, doctype: str, payload: dict, **links) -> ERPOutbox:
+    """
+    Record a payload for delivery. Call inside the transaction that writes the
+    local row; delivery is kicked once that transaction commits.
+    """
+    msg = ERPOutbox.objects.create(kind=kind, doctype=doctype, payload=payload, **links)
+    transaction.on_commit(kick)
+    return msg
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """30s, 60s, 120s, ... capped at BACKOFF_MAX_SECONDS."""
+    seconds = BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, BACKOFF_MAX_SECONDS))
+
+
+def _claim(msg_id: int) -> bool:
+    """Atomically move one message to 'sending' so concurrent workers never double-send."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    claimable = (
+        ERPOutbox.objects.filter(pk=msg_id, status=ERPOutbox.STATUS_PENDING)
+        | ERPOutbox.objects.filter(pk=msg_id, status=ERPOutbox.STATUS_SENDING, locked_at__lt=stale)
+    )
+    return claimable.update(status=ERPOutbox.STATUS_SENDING, locked_at=now) == 1
+
+
+def _send(msg: ERPOutbox, erp: ERPSettings) -> requests.Response:
+    client = client_for(erp)
+    return client.post(client.resource_path(msg.doctype), json=msg.payload, allow_redirects=False)
+
+
+def _record(msg: ERPOutbox, *, ok: bool, retry: bool, status_code: Optional[int], error: str = ""):
+    now = timezone.now()
+    msg.attempts += 1
+    msg.response_status = status_code
+    msg.last_error = error[:2000]
+    msg.locked_at = None
+    if ok:
+        msg.status = ERPOutbox.STATUS_DELIVERED
+        msg.delivered_at = now
+    elif retry and msg.attempts < MAX_ATTEMPTS:
+        msg.status = ERPOutbox.STATUS_PENDING
+        msg.next_attempt_at = now + backoff_delay(msg.attempts)
+    else:
+        msg.status = ERPOutbox.STATUS_DEAD
+    msg.save(update_fields=[
+        "attempts", "response_status", "last_error", "locked_at",
+        "status", "delivered_at", "next_attempt_at",
+    ])
+
+
+def deliver(msg: ERPOutbox, erp: Optional[ERPSettings] = None) -> bool:
+    """Try one claimed message. Returns True when delivered."""
+    erp = erp or get_erp_settings()
+    if not erp or not erp.is_enabled:
+        # Not an attempt: keep it queued until ERP is switched back on.
+        msg.status = ERPOutbox.STATUS_PENDING
+        msg.locked_at = None
+        msg.next_attempt_at = timezone.now() + timedelta(seconds=BACKOFF_BASE_SECONDS)
+        msg.last_error = "ERP disabled or not configured"
+        msg.save(update_fields=["status", "locked_at", "next_attempt_at", "last_error"])
+        return False
+    try:
+        resp = _send(msg, erp)
+    except requests.RequestException as e:
+        _record(msg, ok=False, retry=True, status_code=None, error=str(e))
+        return False
+
+    code = resp.status_code
+    if 200 <= code < 300:
+        _record(msg, ok=True, retry=False, status_code=code)
+        return True
+    retry = code >= 500 or code in RETRYABLE_CLIENT_ERRORS
+    _record(msg, ok=False, retry=retry, status_code=code, error=resp.text[:2000])
+    return False
+
+
+def deliver_due(batch_size: int = 50) -> dict:
+    """Deliver up to batch_size due messages. Returns counters for logging."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=LEASE_SECONDS)
+    due_ids = list(
+        (
+            ERPOutbox.objects.filter(status=ERPOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+            | ERPOutbox.objects.filter(status=ERPOutbox.STATUS_SENDING, locked_at__lt=stale)
+        )
+        .order_by("next_attempt_at", "id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    stats = {"delivered": 0, "failed": 0, "skipped": 0}
+    if not due_ids:
+        return stats
+
+    erp = get_erp_settings()
+    for msg_id in due_ids:
+        if not _claim(msg_id):
+            stats["skipped"] += 1
+            continue
+        msg = ERPOutbox.objects.get(pk=msg_id)
+        if deliver(msg, erp):
+            stats["delivered"] += 1
+        else:
+            stats["failed"] += 1
+    return stats
+
+
+# -----------------------
+# In-process kick
+# -----------------------
+_thread_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+
+
+def _drain():
+    try:
+        while True:
+            stats = deliver_due()
+            if not stats["delivered"] and not stats["failed"]:
+                break
+    except Exception:
+        log.exception("ERP outbox delivery thread failed")
+    finally:
+        connections.close_all()  # this thread owns its own DB connection
+
+
+def kick():
+    """Start a background drain unless one is already running (or threads are disabled)."""
+    global _thread
+    if not INLINE_THREAD:
+        return
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_drain, name="erp-outbox", daemon=True)
+        _thread.start()
@@ -0,0 +1,136 @@
+# configurator/pagecache.py
+"""
+Full-page response cache for the public catalog views.
+
+`cached_page(surrogate_keys, query_params)` wraps a view's GET. Anonymous
+responses are stored under the request URL (reduced to the query parameters
+the view reads, so utm_* tags and cache busters share one entry) plus the
+site-wide version, together with the
+version of every surrogate key the page depends on ("page:3", "group:2",
+"item:7", ...). A hit is served only while all those versions are unchanged;
+signals purge a key by bumping its version (see signals.py), so an admin
+save drops exactly the pages that show the changed row.
+
+Surrogate-key versions are read before the view renders, so a change that
+commits mid-render always invalidates the entry it produced. CSRF tokens are
+swapped for a placeholder when storing and re-minted per request when
+serving; pages carrying a form are therefore marked private, the rest public
+so an upstream proxy can cache them as well (Surrogate-Key lists the tags).
+Whether a response is cached depends on the session and messages cookies,
+so every served response carries Vary: Cookie.
+A Last-Modified set by the view is kept and honoured for If-Modified-Since.
+
+"group:<id>" keys carry the group's catalog version (see catalog.py).
+"""
+import hashlib
+import re
+from functools import wraps
+from typing import Callable, Iterable, List
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import parse_http_date_safe, urlencode
+
+from .versioning import bump_version_on_commit, get_version, get_versions
+
+VERSION_NAMESPACE = "surrogate"
+SITE_KEY = "site"  # every entry depends on it (header menu); bumped by Page saves
+
+PAGE_CACHE_TTL = getattr(settings, "PAGE_CACHE_TTL", 60 * 60)
+PAGE_CACHE_MAX_AGE = getattr(settings, "PAGE_CACHE_MAX_AGE", 60)
+
+CSRF_PLACEHOLDER = b"__configurator_csrf_token__"
+_CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def purge(*keys) -> None:
+    """Invalidate every cached page tagged with any of these surrogate keys."""
+    for key in keys:
+        if key:
+            bump_version_on_commit(VERSION_NAMESPACE, key)
+
+
+def _cacheable(request) -> bool:
+    # Anonymous, side-effect free requests only. Cookies are checked instead of
+    # request.user / messages so caching never touches (and Varies on) the session.
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _cache_key(request, query_params: Iterable[str]) -> str:
+    query = urlencode(sorted(
+        (name, value) for name in set(query_params) for value in request.GET.getlist(name)
+    ))
+    url = f"{request.scheme}://{request.get_host()}{request.path}?{query}".encode()
+    site_version = get_version(VERSION_NAMESPACE, SITE_KEY)
+    return f"configurator:page:{site_version}:{hashlib.sha1(url).hexdigest()}"
+
+
+def _respond(request, entry: dict, content: bytes, status: str) -> HttpResponse:
+    response = HttpResponse(content, content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    if entry["last_modified"]:
+        response["Last-Modified"] = entry["last_modified"]
+    response["Surrogate-Key"] = " ".join(entry["versions"])
+    response["X-Page-Cache"] = status
+    patch_vary_headers(response, ("Cookie",))  # logged-in visitors bypass the cache
+    if entry["csrf"]:
+        # Token is bound to this visitor's cookie: browsers may keep it, proxies may not
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=PAGE_CACHE_MAX_AGE)
+    return get_conditional_response(
+        request,
+        etag=entry["etag"],
+        last_modified=parse_http_date_safe(entry["last_modified"] or ""),
+        response=response,
+    )
+
+
+def cached_page(surrogate_keys: Callable[..., Iterable[str]], query_params: Iterable[str] = ()):
+    """
+    Decorate a class-based view's `get`. `surrogate_keys(request, **kwargs)`
+    names what the page shows; it runs only on a miss, before rendering.
+    `query_params` lists the GET parameters the view reads; others are
+    ignored for the cache key.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if not _cacheable(request):
+                return view_method(self, request, *args, **kwargs)
+
+            key = _cache_key(request, query_params)
+            entry = cache.get(key)
+            if entry is not None and get_versions(VERSION_NAMESPACE, entry["versions"]) == entry["versions"]:
+                content = entry["content"]
+                if entry["csrf"]:
+                    content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+                return _respond(request, entry, content, "hit")
+
+            tags: List[str] = [SITE_KEY, *surrogate_keys(request, **kwargs)]
+            versions = get_versions(VERSION_NAMESPACE, tags)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+
+            stored, tokens = _CSRF_INPUT_RE.subn(rb"\1" + CSRF_PLACEHOLDER + rb"\2", response.content)
+            entry = {
+                "content": stored,
+                "content_type": response["Content-Type"],
+                "etag": '"%s"' % hashlib.sha1(stored).hexdigest(),
+                "csrf": bool(tokens),
+                "last_modified": response.get("Last-Modified"),
+                "versions": versions,
+            }
+            cache.set(key, entry, PAGE_CACHE_TTL)
+            return _respond(request, entry, response.content, "miss")
+        return wrapper
+    return decorator
@@ -0,0 +1,158 @@
+# configurator/quiz_graph.py
+"""
+Compiled question graph per ProductGroup.
+
+Everything QuizForm needs — active questions, their active choices, dependency
+edges, trigger sets and a topological order — is loaded in three queries and
+kept per worker. The graph is rebuilt only when the group's version is bumped
+by the Question/Choice/trigger_choices signals (see signals.py).
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .models import Choice, Question
+from .versioning import bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "question-graph"
+
+
+@dataclass(frozen=True)
+class QuestionGraph:
+    group_id: int
+    version: int
+    questions: Dict[int, Question]             # every question of the group
+    active_ids: Tuple[int, ...]                # active questions, display order (order, id)
+    topo_order: Tuple[int, ...]                # active questions, parents before children
+    choices: Dict[int, Tuple[Choice, ...]]     # question_id -> active choices (order, id)
+    choice_ids: Dict[int, FrozenSet[int]]      # question_id -> all choice ids, active or not
+    depends_on: Dict[int, Optional[int]]       # question_id -> parent question_id
+    triggers: Dict[int, FrozenSet[int]]        # question_id -> trigger choice ids
+    children: Dict[int, Tuple[int, ...]]       # question_id -> dependent question ids
+
+    def active_questions(self) -> List[Question]:
+        return [self.questions[qid] for qid in self.active_ids]
+
+    def question_tags(self) -> List[str]:
+        return [self.questions[qid].question_tag for qid in self.active_ids]
+
+    def is_triggered_by(self, question_id: int, selected_choice_ids: Set[int],
+                        any_parent_choice: bool = True) -> bool:
+        """
+        Direct trigger check for one question.
+        - No dependency -> True
+        - Trigger choices set -> True if any of them is selected
+        - No trigger choices -> any selection in the parent reveals it,
+          unless any_parent_choice is False
+        """
+        parent_id = self.depends_on.get(question_id)
+        if not parent_id:
+            return True
+        need = self.triggers.get(question_id, frozenset())
+        if need:
+            return bool(need & selected_choice_ids)
+        if not any_parent_choice:
+            return False
+        return bool(self.choice_ids.get(parent_id, frozenset()) & selected_choice_ids)
+
+    def visible_ids(self, selected_choice_ids: Set[int]) -> Set[int]:
+        """
+        Active questions visible for the selection. Walks the topological order so
+        a child of a hidden parent stays hidden, matching the quiz page's JS.
+        """
+        visible: Set[int] = set()
+        for qid in self.topo_order:
+            parent_id = self.depends_on[qid]
+            if parent_id is None:
+                visible.add(qid)
+            elif parent_id in visible and self.is_triggered_by(qid, selected_choice_ids):
+                visible.add(qid)
+        return visible
+
+
+def _topological_order(active_ids: Iterable[int], depends_on: Dict[int, Optional[int]],
+                       children: Dict[int, Tuple[int, ...]]) -> Tuple[int, ...]:
+    active = list(active_ids)
+    active_set = set(active)
+    placed: Set[int] = set()
+    out: List[int] = []
+
+    def place(qid):
+        stack = [qid]
+        while stack:
+            cur = stack.pop()
+            if cur in placed:
+                continue
+            placed.add(cur)
+            out.append(cur)
+            stack.extend(reversed([c for c in children.get(cur, ()) if c in active_set]))
+
+    # Roots first (no parent, or parent not active), in display order
+    for qid in active:
+        parent_id = depends_on[qid]
+        if parent_id is None or parent_id not in active_set:
+            place(qid)
+    # Anything left sits on a dependency cycle; keep display order for those
+    for qid in active:
+        place(qid)
+    return tuple(out)
+
+
+def compile_graph(group_id: int, version: int = 0) -> QuestionGraph:
+    questions = {
+        q.id: q
+        for q in Question.objects.filter(group_id=group_id).order_by("order", "id")
+    }
+
+    choices: Dict[int, List[Choice]] = {qid: [] for qid in questions}
+    choice_ids: Dict[int, Set[int]] = {qid: set() for qid in questions}
+    for ch in Choice.objects.filter(question__group_id=group_id).order_by("order", "id"):
+        q = questions[ch.question_id]
+        ch.question = q  # avoid a lazy FK fetch when templates touch choice.question
+        choice_ids[q.id].add(ch.id)
+        if ch.is_active:
+            choices[q.id].append(ch)
+
+    triggers: Dict[int, Set[int]] = {qid: set() for qid in questions}
+    through = Question.trigger_choices.through
+    for qid, cid in through.objects.filter(question__group_id=group_id).values_list("question_id", "choice_id"):
+        triggers[qid].add(cid)
+
+    depends_on = {qid: q.depends_on_id for qid, q in questions.items()}
+    children: Dict[int, List[int]] = {qid: [] for qid in questions}
+    for qid, parent_id in depends_on.items():
+        if parent_id in children:
+            children[parent_id].append(qid)
+
+    active_ids = tuple(qid for qid, q in questions.items() if q.is_active)
+    frozen_children = {qid: tuple(ids) for qid, ids in children.items()}
+
+    return QuestionGraph(
+        group_id=group_id,
+        version=version,
+        questions=questions,
+        active_ids=active_ids,
+        topo_order=_topological_order(active_ids, depends_on, frozen_children),
+        choices={qid: tuple(chs) for qid, chs in choices.items()},
+        choice_ids={qid: frozenset(ids) for qid, ids in choice_ids.items()},
+        depends_on=depends_on,
+        triggers={qid: frozenset(ids) for qid, ids in triggers.items()},
+        children=frozen_children,
+    )
+
+
+# Per-worker cache: group_id -> QuestionGraph
+_graphs: Dict[int, QuestionGraph] = {}
+
+
+def get_graph(group_id: int) -> QuestionGraph:
+    version = get_version(VERSION_NAMESPACE, group_id)
+    graph = _graphs.get(group_id)
+    if graph is None or graph.version != version:
+        graph = compile_graph(group_id, version)
+        _graphs[group_id] = graph
+    return graph
+
+
+def invalidate_group(group_id: int) -> None:
+    if group_id:
+        bump_version_on_commit(VERSION_NAMESPACE, group_id)
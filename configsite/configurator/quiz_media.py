@@ -0,0 +1,184 @@
+# configurator/quiz_media.py
+"""
+Background downscaling of Question/Choice images.
+
+Question.save / Choice.save only flag a new upload as pending
+(models._mark_image_pending). Once the transaction commits, signals hand the
+row to a small dispatcher thread, which reads the file and runs the resize in
+a pool of worker processes: LANCZOS resampling and re-encoding are CPU-bound
+and would otherwise hold the GIL of the web worker. The resized file, its
+final dimensions and the status are written back with save(update_fields=...),
+so the usual quiz-graph/catalog signals refresh cached quiz pages, and the
+full-size upload is then deleted from storage. Failures are logged and
+recorded in image_status / image_error instead of being swallowed.
+
+The pool is per process and started on the first upload that process sees:
+each web worker that handles one holds QUIZ_IMAGE_WORKERS spawned processes
+plus as many dispatcher threads (see settings.py).
+
+`reprocess_quiz_images` pushes every existing image through the same pool.
+
+    QUIZ_IMAGE_WORKERS  (default min(4, CPU count)) worker processes
+    QUIZ_IMAGE_POOL     (default True); False resizes inline after commit
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+from . import imaging
+from .models import (
+    CHOICE_MAX_H, CHOICE_MAX_W, IMAGE_STATUS_DONE, IMAGE_STATUS_FAILED, QUESTION_MAX_H, QUESTION_MAX_W,
+    Choice, Question,
+)
+
+log = logging.getLogger(__name__)
+
+WORKERS = getattr(settings, "QUIZ_IMAGE_WORKERS", min(4, os.cpu_count() or 1))
+USE_POOL = getattr(settings, "QUIZ_IMAGE_POOL", True)
+
+# model -> bounding box the image is downscaled into
+BOXES = {
+    Question: (QUESTION_MAX_W, QUESTION_MAX_H),
+    Choice: (CHOICE_MAX_W, CHOICE_MAX_H),
+}
+
+Result = Tuple[Optional[bytes], str, int, int]  # see imaging.downscale
+
+
+def new_pool(workers: int = WORKERS) -> ProcessPoolExecutor:
+    # Spawned (not forked) workers: the parent holds DB connections and threads,
+    # and imaging.py needs neither Django nor settings.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_dispatcher: Optional[ThreadPoolExecutor] = None
+_pool_pid: Optional[int] = None
+
+
+def _executors() -> Tuple[ProcessPoolExecutor, ThreadPoolExecutor]:
+    """Per-process pool + dispatcher, recreated after a fork."""
+    global _pool, _dispatcher, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = new_pool()
+                _dispatcher = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="quiz-images")
+                _pool_pid = pid
+    return _pool, _dispatcher
+
+
+def _read(obj) -> bytes:
+    obj.image.open("rb")
+    try:
+        return obj.image.read()
+    finally:
+        obj.image.close()
+
+
+def apply_result(model, pk, source_name: str, result: Optional[Result] = None,
+                 error: Optional[BaseException] = None) -> bool:
+    """
+    Record a finished job on the row, unless its image was replaced while the
+    job ran (the newer upload has its own job). Returns True when written.
+    """
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None or obj.image.name != source_name:
+        return False
+    fields = ["image_status", "image_width", "image_height", "image_error"]
+    if error is not None:
+        log.error("Resizing %s %s image %s failed: %s", model.__name__, pk, source_name, error)
+        obj.image_status = IMAGE_STATUS_FAILED
+        obj.image_error = str(error)[:300] or error.__class__.__name__
+    else:
+        content, new_name, width, height = result
+        if content is not None:
+            obj.image.save(new_name, ContentFile(content), save=False)
+            fields.append("image")
+        obj.image_status = IMAGE_STATUS_DONE
+        obj.image_width, obj.image_height = width, height
+        obj.image_error = ""
+    obj.save(update_fields=fields)
+    if "image" in fields and obj.image.name != source_name:
+        obj.image.storage.delete(source_name)  # the full-size upload is not kept
+    return True
+
+
+def submit(pool: ProcessPoolExecutor, model, obj) -> Future:
+    """Queue one row's current image on the pool."""
+    max_w, max_h = BOXES[model]
+    return pool.submit(imaging.downscale, _read(obj), obj.image.name, max_w, max_h)
+
+
+def _outcome(future: Future) -> dict:
+    error = future.exception()
+    return {"error": error} if error is not None else {"result": future.result()}
+
+
+def _process(model, pk) -> None:
+    """Dispatcher job: read, resize in the pool, write back."""
+    try:
+        obj = model.objects.filter(pk=pk).first()
+        if obj is None or not obj.image:
+            return
+        try:
+            if USE_POOL:
+                pool, _ = _executors()
+                outcome = _outcome(submit(pool, model, obj))  # blocks this thread only
+            else:
+                max_w, max_h = BOXES[model]
+                outcome = {"result": imaging.downscale(_read(obj), obj.image.name, max_w, max_h)}
+        except Exception as e:
+            outcome = {"error": e}
+        apply_result(model, pk, obj.image.name, **outcome)
+    except Exception:
+        log.exception("Quiz image job failed for %s %s", model.__name__, pk)
+    finally:
+        if USE_POOL:
+            connections.close_all()  # dispatcher threads own their DB connections
+
+
+def schedule(model, pk) -> None:
+    """Resize one row's image once the current transaction commits."""
+    if USE_POOL:
+        transaction.on_commit(lambda: _executors()[1].submit(_process, model, pk))
+    else:
+        transaction.on_commit(lambda: _process(model, pk))
+
+
+def reprocess(objects: Iterable, workers: int = WORKERS) -> Iterator[Tuple[object, bool]]:
+    """
+    Run many rows through a fresh pool in parallel, keeping at most a few
+    files per worker in memory. Yields (row, ok) as jobs finish.
+    """
+    window = max(workers * 4, 1)
+    with new_pool(workers) as pool:
+        pending = {}
+
+        def drain(limit):
+            done = as_completed(list(pending))
+            while len(pending) > limit:
+                future = next(done)
+                obj = pending.pop(future)
+                outcome = _outcome(future)
+                apply_result(type(obj), obj.pk, obj.image.name, **outcome)
+                yield obj, "error" not in outcome
+
+        for obj in objects:
+            try:
+                pending[submit(pool, type(obj), obj)] = obj
+            except Exception as e:
+                apply_result(type(obj), obj.pk, obj.image.name, error=e)
+                yield obj, False
+                continue
+            yield from drain(window)
+        yield from drain(0)
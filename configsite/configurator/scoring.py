@@ -0,0 +1,110 @@
+# configurator/scoring.py
+"""
+Precompiled score matrices for quiz recommendations.
+
+Each ProductGroup's ChoiceImpact rows are compiled once into a dense
+choice × item NumPy matrix. Scoring a set of selected choices is then a single
+vectorized row-sum, with no ORM traffic per answer. Matrices are kept per
+worker and rebuilt only when the group's version is bumped (see signals.py).
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+import numpy as np
+
+from .models import Choice, ChoiceImpact, Item
+from .versioning import bump_version_on_commit, get_version
+
+VERSION_NAMESPACE = "score-matrix"
+
+
+@dataclass(frozen=True)
+class ScoreMatrix:
+    group_id: int
+    version: int
+    choice_index: Dict[int, int]  # Choice.id -> row
+    item_ids: np.ndarray          # (I,) Item.id per column
+    weights: np.ndarray           # (C, I) summed ChoiceImpact.score
+    linked: np.ndarray            # (C, I) True where a ChoiceImpact row exists
+    affects_score: np.ndarray     # (C,) Question.affects_score per row
+    item_active: np.ndarray       # (I,) Item.is_active per column
+
+    def score(self, choice_ids: Iterable[int]) -> Dict[int, float]:
+        """
+        Return {item_id: score} for the selected choices.
+        Only active items touched by at least one scoring choice are included,
+        so an explicit 0.0 impact still puts the item in the running.
+        """
+        rows = [self.choice_index[cid] for cid in set(choice_ids) if cid in self.choice_index]
+        if not rows:
+            return {}
+        rows = np.asarray(rows, dtype=np.intp)
+        rows = rows[self.affects_score[rows]]
+        if not rows.size:
+            return {}
+
+        totals = self.weights[rows].sum(axis=0)
+        hit = self.linked[rows].any(axis=0) & self.item_active
+        return {int(iid): float(sc) for iid, sc in zip(self.item_ids[hit], totals[hit])}
+
+
+def compile_matrix(group_id: int, version: int = 0) -> ScoreMatrix:
+    """Build the matrix for one group in three flat queries."""
+    choices = list(
+        Choice.objects.filter(question__group_id=group_id)
+        .order_by("id")
+        .values_list("id", "question__affects_score")
+    )
+    items = list(
+        Item.objects.filter(group_id=group_id)
+        .order_by("id")
+        .values_list("id", "is_active")
+    )
+    impacts = (
+        ChoiceImpact.objects
+        .filter(choice__question__group_id=group_id, item__group_id=group_id)
+        .values_list("choice_id", "item_id", "score")
+    )
+
+    choice_index = {cid: row for row, (cid, _) in enumerate(choices)}
+    item_index = {iid: col for col, (iid, _) in enumerate(items)}
+
+    weights = np.zeros((len(choices), len(items)), dtype=np.float64)
+    linked = np.zeros((len(choices), len(items)), dtype=bool)
+    for choice_id, item_id, score in impacts:
+        row, col = choice_index[choice_id], item_index[item_id]
+        weights[row, col] += score
+        linked[row, col] = True
+
+    return ScoreMatrix(
+        group_id=group_id,
+        version=version,
+        choice_index=choice_index,
+        item_ids=np.fromiter((iid for iid, _ in items), dtype=np.int64, count=len(items)),
+        weights=weights,
+        linked=linked,
+        affects_score=np.fromiter((bool(a) for _, a in choices), dtype=bool, count=len(choices)),
+        item_active=np.fromiter((bool(a) for _, a in items), dtype=bool, count=len(items)),
+    )
+
+
+# Per-worker cache: group_id -> ScoreMatrix
+_matrices: Dict[int, ScoreMatrix] = {}
+
+
+def get_matrix(group_id: int) -> ScoreMatrix:
+    version = get_version(VERSION_NAMESPACE, group_id)
+    matrix = _matrices.get(group_id)
+    if matrix is None or matrix.version != version:
+        matrix = compile_matrix(group_id, version)
+        _matrices[group_id] = matrix
+    return matrix
+
+
+def score_choices(group_id: int, choice_ids: Iterable[int]) -> Dict[int, float]:
+    return get_matrix(group_id).score(choice_ids)
+
+
+def invalidate_group(group_id: int) -> None:
+    if group_id:
+        bump_version_on_commit(VERSION_NAMESPACE, group_id)
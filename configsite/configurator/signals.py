@@ -0,0 +1,244 @@
+# configurator/signals.py
+"""
+Cache invalidation hooks. Connected in ConfiguratorConfig.ready().
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import facets, images, quiz_graph, quiz_media, scoring
+from .catalog import bump_catalog, refresh_group_summary
+from .erp import invalidate_erp_settings
+from .models import (
+    Choice, ChoiceImpact, ERPSettings, ImportJob, Item, ItemDocument, ItemFeature, ItemImage,
+    ItemSpec, ItemVariant, ItemVariantDocument, ItemVariantImage, ItemVariantSpec, Page, ProductGroup, Question,
+)
+from .navigation import invalidate_navigation
+from .pagecache import SITE_KEY, purge
+
+
+def _group_of_item(item_id):
+    return Item.objects.filter(pk=item_id).values_list("group_id", flat=True).first()
+
+
+def _group_of_question(question_id):
+    return Question.objects.filter(pk=question_id).values_list("group_id", flat=True).first()
+
+
+def _item_of_variant(variant_id):
+    return ItemVariant.objects.filter(pk=variant_id).values_list("item_id", flat=True).first()
+
+
+# -----------------------
+# Score matrices
+# -----------------------
+@receiver([post_save, post_delete], sender=ChoiceImpact)
+def _impact_changed(sender, instance, **kwargs):
+    # Only impacts whose item sits in the choice's own group are compiled,
+    # so the item's group is the one to rebuild.
+    scoring.invalidate_group(_group_of_item(instance.item_id))
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def _choice_changed(sender, instance, **kwargs):
+    group_id = _group_of_question(instance.question_id)
+    scoring.invalidate_group(group_id)
+    quiz_graph.invalidate_group(group_id)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def _question_changed(sender, instance, **kwargs):
+    scoring.invalidate_group(instance.group_id)
+    quiz_graph.invalidate_group(instance.group_id)
+
+
+@receiver([post_save, post_delete], sender=Item)
+def _item_changed(sender, instance, **kwargs):
+    scoring.invalidate_group(instance.group_id)
+    # An item moved between groups still has a column in its old group's matrix.
+    old_groups = (
+        ChoiceImpact.objects.filter(item_id=instance.pk)
+        .values_list("choice__question__group_id", flat=True)
+        .distinct()
+    )
+    for group_id in old_groups:
+        if group_id != instance.group_id:
+            scoring.invalidate_group(group_id)
+
+
+# -----------------------
+# Question graphs
+# -----------------------
+@receiver(m2m_changed, sender=Question.trigger_choices.through)
+def _triggers_changed(sender, instance, action, reverse, **kwargs):
+    if not action.startswith("post_"):
+        return
+    # Trigger choices belong to the parent question, so both ends share a group
+    group_id = _group_of_question(instance.question_id) if reverse else instance.group_id
+    quiz_graph.invalidate_group(group_id)
+
+
+# -----------------------
+# ERP settings
+# -----------------------
+@receiver([post_save, post_delete], sender=ERPSettings)
+def _erp_settings_changed(sender, instance, **kwargs):
+    invalidate_erp_settings()
+
+
+# -----------------------
+# Navigation (header menu + product-menu API)
+# -----------------------
+@receiver([post_save, post_delete], sender=Page)
+@receiver([post_save, post_delete], sender=ProductGroup)
+@receiver([post_save, post_delete], sender=Item)
+def _navigation_changed(sender, instance, **kwargs):
+    invalidate_navigation()
+
+
+# -----------------------
+# Variant facet index
+# -----------------------
+@receiver([post_save, post_delete], sender=ItemVariant)
+def _variant_changed(sender, instance, **kwargs):
+    facets.invalidate_item(instance.item_id)
+    facets.invalidate_cards(instance.item_id)
+
+
+@receiver([post_save, post_delete], sender=ItemVariantSpec)
+def _variant_spec_changed(sender, instance, **kwargs):
+    facets.invalidate_item(_item_of_variant(instance.variant_id))
+
+
+@receiver([post_save, post_delete], sender=ItemVariantImage)
+def _variant_image_changed(sender, instance, **kwargs):
+    facets.invalidate_cards(_item_of_variant(instance.variant_id))
+
+
+# -----------------------
+# Catalog versions + page cache surrogate keys
+# -----------------------
+@receiver([post_save, post_delete], sender=Page)
+def _page_purge(sender, instance, **kwargs):
+    # Every cached page renders the header menu
+    purge(SITE_KEY, f"page:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=ProductGroup)
+def _group_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(instance.pk)
+    purge("group-list")
+
+
+@receiver(pre_save, sender=Item)
+def _item_remember_group(sender, instance, **kwargs):
+    instance._previous_group_id = (
+        Item.objects.filter(pk=instance.pk).values_list("group_id", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver([post_save, post_delete], sender=Item)
+def _item_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(instance.group_id, getattr(instance, "_previous_group_id", None))
+    purge("group-list", f"item:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=ItemImage)
+def _item_image_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(_group_of_item(instance.item_id))
+    # Item images double as group heroes on the group list
+    purge("group-list", f"item:{instance.item_id}")
+
+
+@receiver([post_save, post_delete], sender=ItemFeature)
+@receiver([post_save, post_delete], sender=ItemSpec)
+@receiver([post_save, post_delete], sender=ItemDocument)
+@receiver([post_save, post_delete], sender=ItemVariant)
+def _item_child_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(_group_of_item(instance.item_id))
+    purge(f"item:{instance.item_id}")
+
+
+@receiver([post_save, post_delete], sender=ItemVariantSpec)
+@receiver([post_save, post_delete], sender=ItemVariantImage)
+@receiver([post_save, post_delete], sender=ItemVariantDocument)
+def _variant_child_catalog_changed(sender, instance, **kwargs):
+    item_id = _item_of_variant(instance.variant_id)
+    bump_catalog(_group_of_item(item_id))
+    purge(f"item:{item_id}")
+
+
+@receiver([post_save, post_delete], sender=Question)
+def _question_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(instance.group_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def _choice_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(_group_of_question(instance.question_id))
+
+
+@receiver([post_save, post_delete], sender=ChoiceImpact)
+def _impact_catalog_changed(sender, instance, **kwargs):
+    bump_catalog(_group_of_item(instance.item_id))
+
+
+@receiver(m2m_changed, sender=Question.trigger_choices.through)
+def _triggers_catalog_changed(sender, instance, action, reverse, **kwargs):
+    if action.startswith("post_"):
+        bump_catalog(_group_of_question(instance.question_id) if reverse else instance.group_id)
+
+
+# -----------------------
+# Group-list summary (hero image + active item count)
+# -----------------------
+@receiver(post_save, sender=ProductGroup)
+def _group_summary_changed(sender, instance, **kwargs):
+    # A full save writes back whatever the instance held; recompute after it
+    refresh_group_summary(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Item)
+def _item_summary_changed(sender, instance, **kwargs):
+    refresh_group_summary(instance.group_id, getattr(instance, "_previous_group_id", None))
+
+
+@receiver([post_save, post_delete], sender=ItemImage)
+def _item_image_summary_changed(sender, instance, **kwargs):
+    refresh_group_summary(_group_of_item(instance.item_id))
+
+
+# -----------------------
+# Responsive image derivatives
+# -----------------------
+@receiver(post_save, sender=ItemImage)
+@receiver(post_save, sender=ItemVariantImage)
+@receiver(post_save, sender=ProductGroup)
+@receiver(post_save, sender=Page)
+def _image_derivatives_changed(sender, instance, update_fields=None, **kwargs):
+    _, manifest_field = images.IMAGE_FIELDS[sender]
+    if update_fields and set(update_fields) <= {manifest_field}:
+        return  # the manifest write itself
+    if images.needs_refresh(instance):
+        images.schedule(sender, instance.pk)
+
+
+# -----------------------
+# Question/Choice image downscaling (worker pool)
+# -----------------------
+@receiver(post_save, sender=Question)
+@receiver(post_save, sender=Choice)
+def _quiz_image_uploaded(sender, instance, **kwargs):
+    # Only the save that brought a new file; later saves while it is pending must not resize again
+    if instance.__dict__.pop("_image_uploaded", False):
+        quiz_media.schedule(sender, instance.pk)
+
+
+# -----------------------
+# Catalog import uploads
+# -----------------------
+@receiver(post_delete, sender=ImportJob)
+def _import_job_deleted(sender, instance, **kwargs):
+    # Failed jobs keep their upload for a re-queue; it goes with the row
+    if instance.file:
+        transaction.on_commit(lambda: instance.file.delete(save=False))
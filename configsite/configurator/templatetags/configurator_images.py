@@ -0,0 +1,55 @@
+# configurator/templatetags/configurator_images.py
+"""
+Responsive image tags backed by the derivative manifests from images.py.
+
+    {% load configurator_images %}
+    {% picture img.image img.derivatives sizes="(max-width: 700px) 100vw, 50vw" alt=img.alt_text class="gallery__img" %}
+    style="--bg: url('{% image_url it.images.all.0.image it.images.all.0.derivatives 640 %}')"
+"""
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from ..images import CARD_WIDTH, best_url, mime_type, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(field_file, manifest, sizes="100vw", alt="", **attrs):
+    """
+    <picture> with AVIF/WebP <source>s and a JPEG <img srcset>; a plain <img>
+    of the original when the image has no derivatives yet. Extra keyword
+    arguments become <img> attributes (class, loading, ...).
+    """
+    if not field_file:
+        return ""
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    sources = (manifest or {}).get("sources") or {}
+    if not sources.get("jpeg"):
+        return format_html('<img src="{}" alt="{}"{}>', field_file.url, alt, flatatt(attrs))
+
+    attrs.update({"width": manifest["width"], "height": manifest["height"]})
+    modern = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime_type(fmt), srcset(manifest, fmt), sizes) for fmt in sources if fmt != "jpeg"),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        modern,
+        best_url(field_file, manifest, max(w for w, _ in sources["jpeg"])),
+        srcset(manifest, "jpeg"),
+        sizes,
+        alt,
+        flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def image_url(field_file, manifest, width=CARD_WIDTH):
+    """Single JPEG derivative URL at least `width` wide, for CSS backgrounds."""
+    if not field_file:
+        return ""
+    return best_url(field_file, manifest, int(width))
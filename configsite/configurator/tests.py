@@ -1,3 +1,733 @@
-from django.test import TestCase
+import re
+import shutil
+from datetime import timedelta
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.middleware.csrf import _does_token_match
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import facets, forms, import_jobs, outbox, pagecache, quiz_graph, quiz_media, scoring, units, views
+from .erp import ERPClient
+from .importers import ItemImporter, QuestionImporter, VariantImporter
+from .models import (
+    Answer,
+    Choice,
+    ChoiceImpact,
+    ERPOutbox,
+    ERPSettings,
+    ImportJob,
+    Item,
+    ItemDocument,
+    ItemFeature,
+    ItemImage,
+    ItemSpec,
+    ItemVariant,
+    ItemVariantSpec,
+    ProductGroup,
+    Question,
+    QuizSession,
+)
+from .versioning import get_version
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResultPageQueryCountTests(TestCase):
+    """The quiz result page must not issue queries per recommended/family item."""
+
+    def setUp(self):
+        cache.clear()  # fresh clock-seeded versions, so no compiled graph/matrix from another test is reused
+        self.group = ProductGroup.objects.create(name="Pumps")
+        self.question = Question.objects.create(group=self.group, text="Use?", order=1)
+        self.choice = Choice.objects.create(question=self.question, text="Water", order=1)
+        self.url = reverse("configurator:quiz", kwargs={"slug": self.group.slug})
+        self._n = 0
+
+    def _item(self, matched: bool, with_variant: bool = False) -> Item:
+        # Run the on_commit version bumps so per-worker scoring picks the item up
+        with self.captureOnCommitCallbacks(execute=True):
+            return self._create_item(matched, with_variant)
+
+    def _create_item(self, matched: bool, with_variant: bool) -> Item:
+        self._n += 1
+        item = Item.objects.create(group=self.group, name=f"Item {self._n:02d}")
+        for i in range(2):
+            ItemImage.objects.create(item=item, image=f"item_images/{self._n}_{i}.jpg")
+            ItemFeature.objects.create(item=item, text=f"Feature {i}")
+            ItemSpec.objects.create(item=item, label=f"Spec {i}", value=str(i + 1), unit="kW")
+        ItemDocument.objects.create(item=item, file=f"item_docs/{self._n}.pdf", title="Datasheet")
+        if with_variant:
+            ItemVariant.objects.create(item=item, name=f"{item.name} V1")
+        if matched:
+            ChoiceImpact.objects.create(choice=self.choice, item=item, score=1.0)
+        return item
+
+    def _post_answers(self):
+        return self.client.post(self.url, {"step": "answers", f"q_{self.question.id}": self.choice.id})
+
+    def _count_queries(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._post_answers()
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "configurator/result.html")
+        return len(ctx.captured_queries)
+
+    def test_answers_step_query_count_is_independent_of_item_count(self):
+        self._item(matched=True, with_variant=True)
+        self._item(matched=False)
+        self._post_answers()  # warm per-worker graph/scoring/navigation caches
+        few = self._count_queries()
+
+        for _ in range(5):
+            self._item(matched=True)
+        for _ in range(5):
+            self._item(matched=False)
+        response = self._post_answers()
+        self.assertEqual(len(response.context["recommended_items"]), 6)
+        self.assertEqual(len(response.context["family_items"]), 6)
+        many = self._count_queries()
+
+        self.assertEqual(few, many)
+
+    def test_result_read_model_is_prefetched(self):
+        with_variant = self._item(matched=True, with_variant=True)
+        self._item(matched=True)
+        self._item(matched=False)
+
+        response = self._post_answers()
+        items = response.context["recommended_items"]
+        self.assertEqual(len(items), 2)
+        self.assertTrue(response.context["recommended_item"].has_variants)
+        self.assertEqual([it.has_variants for it in items], [it.id == with_variant.id for it in items])
+        self.assertEqual(len(response.context["family_items"]), 1)
+
+        with self.assertNumQueries(0):
+            for it in items:
+                list(it.images.all()), list(it.features.all()), list(it.documents.all()), list(it.specs.all())
+            for it in response.context["family_items"]:
+                list(it.images.all())
+        self.assertContains(
+            response,
+            reverse("configurator:variant_builder", kwargs={"slug": self.group.slug, "item_id": with_variant.id}),
+        )
+
+
+class ImporterTestMixin:
+    """
+    Checks every importer shares: modes, dry runs and publishing. Subclasses
+    set `importer_class` and describe one importable object per `key`.
+    """
+    importer_class = None
+    changed_field = ""  # field a changed row updates, as named in dry-run diffs
+
+    def row(self, key: str, changed: bool = False) -> dict:
+        raise NotImplementedError
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def is_changed(self, obj) -> bool:
+        raise NotImplementedError
+
+    def published_versions(self) -> list:
+        """(namespace, key) pairs a publish must bump besides the group's catalog version."""
+        raise NotImplementedError
+
+    def setUp(self):
+        cache.clear()
+        self.group = ProductGroup.objects.create(name="Pumps")
+
+    def _run(self, rows, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.importer_class(**options).run(rows)
+
+    def _catalog_version(self) -> int:
+        return ProductGroup.objects.get(pk=self.group.pk).catalog_version
+
+    def test_upsert_creates_then_updates(self):
+        result = self._run([self.row("A")])
+        self.assertEqual((result.created, result.updated, result.error_count), (1, 0, 0))
+        self.assertFalse(self.is_changed(self.get("A")))
+
+        result = self._run([self.row("A", changed=True)])
+        self.assertEqual((result.created, result.updated, result.error_count), (0, 1, 0))
+        self.assertTrue(self.is_changed(self.get("A")))
+
+    def test_create_mode_skips_existing(self):
+        self._run([self.row("A")])
+        result = self._run([self.row("A", changed=True), self.row("B")], mode="create")
+        self.assertEqual((result.created, result.updated, result.skipped), (1, 0, 1))
+        self.assertFalse(self.is_changed(self.get("A")))
+        self.assertIsNotNone(self.get("B"))
+
+    def test_update_mode_skips_missing(self):
+        self._run([self.row("A")])
+        result = self._run([self.row("A", changed=True), self.row("B")], mode="update")
+        self.assertEqual((result.created, result.updated, result.skipped), (0, 1, 1))
+        self.assertTrue(self.is_changed(self.get("A")))
+        self.assertIsNone(self.get("B"))
+
+    def test_dry_run_writes_nothing(self):
+        self._run([self.row("A")])
+        catalog_version = self._catalog_version()
+
+        result = self._run([self.row("A", changed=True), self.row("B")], dry_run=True)
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertFalse(self.is_changed(self.get("A")))
+        self.assertIsNone(self.get("B"))
+        self.assertEqual(self._catalog_version(), catalog_version)
+
+        actions = {d["action"]: d for d in result.diffs}
+        self.assertEqual(set(actions), {"create", "update"})
+        self.assertIn(self.changed_field, actions["update"]["changes"])
+
+    def test_publish_bumps_versions(self):
+        self._run([self.row("A")])
+        catalog_version = self._catalog_version()
+        versions = {pair: get_version(*pair) for pair in self.published_versions()}
+
+        self._run([self.row("A", changed=True)])
+        self.assertGreater(self._catalog_version(), catalog_version)
+        for pair, version in versions.items():
+            self.assertNotEqual(get_version(*pair), version, pair)
+
+
+def _item_row(group="Pumps", name="P1", code="", description="", is_active="1", features="", specs=""):
+    return {
+        "group_name": group, "item_name": name, "item_code": code, "description": description,
+        "is_active": is_active, "features": features, "specs": specs,
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ItemImporterTests(ImporterTestMixin, TestCase):
+    importer_class = ItemImporter
+    changed_field = "description"
+
+    def row(self, key, changed=False):
+        return _item_row(name=key, code=f"P-{key}", description="changed" if changed else "")
+
+    def get(self, key):
+        return Item.objects.filter(item_code=f"P-{key}").first()
+
+    def is_changed(self, obj):
+        return obj.description == "changed"
+
+    def published_versions(self):
+        return [(scoring.VERSION_NAMESPACE, self.group.pk)]
+
+    def test_blank_rows_are_skipped(self):
+        result = self._run([_item_row(group="", name="")])
+        self.assertEqual((result.created, result.skipped), (0, 1))
+
+    def test_publish_refreshes_active_item_count(self):
+        self._run([self.row("A"), self.row("B")])
+        self.assertEqual(ProductGroup.objects.get(pk=self.group.pk).active_item_count, 2)
+
+    def test_rename_onto_another_item_is_a_row_error(self):
+        self._run([_item_row(name="P1", code="P-1"), _item_row(name="P2", code="P-2")])
+        result = self._run([_item_row(name="P2", code="P-1")])
+        self.assertEqual(result.error_count, 1)
+        self.assertIn("already named 'P2'", result.errors[0])
+        self.assertEqual(Item.objects.get(item_code="P-1").name, "P1")
+
+    def test_clear_specs_and_features(self):
+        self._run([_item_row(code="P-1", features="Quiet",
+                             specs="label=Power|value=1|unit=kW; label=Weight|value=5|unit=kg")])
+        self._run([_item_row(code="P-1", features="Sealed", specs="label=Power|value=2|unit=kW")],
+                  clear_specs=True, clear_features=True)
+        item = Item.objects.get(item_code="P-1")
+        self.assertEqual(list(item.features.values_list("text", flat=True)), ["Sealed"])
+        self.assertEqual(list(item.specs.values_list("label", "value")), [("Power", "2")])
+
+    def test_specs_are_normalized(self):
+        self._run([_item_row(code="P-1", specs="label=Power|value=1.2|unit=kW; label=Finish|value=Matte")])
+        power = ItemSpec.objects.get(label="Power")
+        self.assertEqual((power.value_num, power.unit_canonical), (1200.0, "W"))
+        self.assertIsNone(ItemSpec.objects.get(label="Finish").value_num)
+
+        self._run([_item_row(code="P-1", specs="label=Power|value=1500|unit=W")])
+        power.refresh_from_db()
+        self.assertEqual((power.value_num, power.unit_canonical), (1500.0, "W"))
+
+
+def _question_row(group="Pumps", text="Use?", choices="", order="1"):
+    return {
+        "group_name": group, "text": text, "input_type": "single", "choices": choices,
+        "is_required": "1", "is_active": "1", "affects_score": "1", "order": order, "question_tag": "",
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class QuestionImporterTests(ImporterTestMixin, TestCase):
+    importer_class = QuestionImporter
+    changed_field = "order"
+
+    def row(self, key, changed=False):
+        return _question_row(text=key, order="9" if changed else "1")
+
+    def get(self, key):
+        return Question.objects.filter(text=key).first()
+
+    def is_changed(self, obj):
+        return obj.order == 9
+
+    def published_versions(self):
+        return [(scoring.VERSION_NAMESPACE, self.group.pk), (quiz_graph.VERSION_NAMESPACE, self.group.pk)]
+
+    def test_clear_choices_replaces_choices_and_their_impacts(self):
+        self._run([_question_row(choices="Water; Oil")])
+        water = Choice.objects.get(text="Water")
+        item = Item.objects.create(group=self.group, name="P1")
+        ChoiceImpact.objects.create(choice=water, item=item, score=1.0)
+
+        self._run([_question_row(choices="Air")], clear_choices=True)
+        self.assertEqual(list(Choice.objects.values_list("text", flat=True)), ["Air"])
+        self.assertFalse(ChoiceImpact.objects.exists())
+
+    def test_clear_choices_keeps_answered_choices(self):
+        self._run([_question_row(choices="Water; Oil")])
+        question = Question.objects.get()
+        water = question.choices.get(text="Water")
+        session = QuizSession.objects.create(group=self.group)
+        Answer.objects.create(session=session, question=question, choice=water)
+
+        result = self._run([_question_row(choices="Air")], clear_choices=True)
+        self.assertEqual(result.error_count, 1)
+        self.assertIn("cannot be cleared", result.errors[0])
+        self.assertEqual(sorted(question.choices.values_list("text", flat=True)), ["Oil", "Water"])
+
+
+def _variant_row(item_code="P-1", code="V1", name="", is_active="1", specs="", **extra):
+    return {
+        "item_code": item_code, "variant_code": code, "variant_name": name, "is_active": is_active,
+        "specs": specs, **extra,
+    }
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class VariantImporterTests(ImporterTestMixin, TestCase):
+    importer_class = VariantImporter
+    changed_field = "is_active"
+
+    def setUp(self):
+        super().setUp()
+        self.item = Item.objects.create(group=self.group, name="P1", item_code="P-1")
+
+    def row(self, key, changed=False):
+        return _variant_row(code=key, is_active="0" if changed else "1")
+
+    def get(self, key):
+        return ItemVariant.objects.filter(item=self.item, code=key).first()
+
+    def is_changed(self, obj):
+        return not obj.is_active
+
+    def published_versions(self):
+        return [(facets.VERSION_NAMESPACE, self.item.pk), (facets.CARDS_VERSION_NAMESPACE, self.item.pk)]
+
+    def test_blank_name_and_missing_description_keep_current_values(self):
+        self._run([_variant_row(name="Small", description="Text")])
+        self._run([_variant_row()])
+        variant = self.get("V1")
+        self.assertEqual((variant.name, variant.description), ("Small", "Text"))
+
+    def test_unknown_item_and_name_collision_are_row_errors(self):
+        self._run([_variant_row(code="V1", name="Small"), _variant_row(code="V2", name="Large")])
+        result = self._run([_variant_row(item_code="NOPE"), _variant_row(code="V1", name="Large")])
+        self.assertEqual(result.error_count, 2)
+        self.assertIn("no item with item_code 'NOPE'", result.errors[0])
+        self.assertIn("already named 'Large'", result.errors[1])
+        self.assertEqual(ItemVariant.objects.get(code="V1").name, "Small")
+
+    def test_clear_specs_and_normalization(self):
+        self._run([_variant_row(specs="label=Power|value=1.5|unit=kW; label=Color|value=Red")])
+        power = ItemVariantSpec.objects.get(label="Power")
+        self.assertEqual((power.value_num, power.unit_canonical), (1500.0, "W"))
+
+        self._run([_variant_row(specs="label=Power|value=750|unit=W")], clear_specs=True)
+        self.assertEqual(
+            list(ItemVariantSpec.objects.values_list("label", "value_num", "unit_canonical")),
+            [("Power", 750.0, "W")],
+        )
+
+
+def _items_csv(rows: int) -> bytes:
+    lines = ["group_name,item_name,item_code"] + [f"Pumps,P{i},P-{i}" for i in range(1, rows + 1)]
+    return ("\n".join(lines) + "\n").encode()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ImportJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.storage = FileSystemStorage(location=location)
+        patcher = mock.patch.object(ImportJob._meta.get_field("file"), "storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enqueue(self, content: bytes, **options) -> ImportJob:
+        upload = SimpleUploadedFile("items.csv", content, content_type="text/csv")
+        return import_jobs.enqueue(ImportJob.KIND_ITEMS, upload, options)
+
+    def test_failed_job_keeps_its_upload_and_resumes_after_requeue(self):
+        job = self._enqueue(_items_csv(5), batch_size=2)
+        upload = job.file.name
+        real_import_chunk = ItemImporter.import_chunk
+        first_lines = []
+
+        def flaky(importer, chunk, result):
+            first_lines.append(chunk[0][0])
+            if len(first_lines) == 2:
+                raise RuntimeError("connection dropped")
+            return real_import_chunk(importer, chunk, result)
+
+        with mock.patch.object(ItemImporter, "import_chunk", flaky):
+            with self.assertLogs("configurator.import_jobs", "ERROR"):
+                import_jobs.run_due()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.rows_done, job.created_count), (ImportJob.STATUS_FAILED, 2, 2))
+            self.assertIn("connection dropped", job.last_error)
+            self.assertTrue(self.storage.exists(upload))
+
+            admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+            self.client.force_login(admin_user)
+            self.client.post(reverse("admin:configurator_importjob_changelist"),
+                             {"action": "requeue", "_selected_action": [job.pk]})
+            job.refresh_from_db()
+            self.assertEqual(job.status, ImportJob.STATUS_QUEUED)
+
+            import_jobs.run_due()
+
+        self.assertEqual(first_lines, [2, 4, 4, 6])  # resumed at rows_done, the committed chunk not replayed
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_done, job.created_count), (ImportJob.STATUS_DONE, 5, 5))
+        self.assertEqual(Item.objects.count(), 5)
+        self.assertFalse(self.storage.exists(upload))
+
+    def test_worker_that_lost_its_lease_stops_without_writing(self):
+        job = self._enqueue(_items_csv(5), batch_size=2)
+        real_import_chunk = ItemImporter.import_chunk
+        calls = []
+
+        def overtaken(importer, chunk, result):
+            calls.append(chunk[0][0])
+            real_import_chunk(importer, chunk, result)
+            if len(calls) == 2:  # another worker claims the job mid-chunk
+                ImportJob.objects.filter(pk=job.pk).update(locked_at=timezone.now())
+
+        with mock.patch.object(ItemImporter, "import_chunk", overtaken), \
+                self.assertLogs("configurator.import_jobs", "WARNING"):
+            import_jobs.run_due()
+
+        self.assertEqual(calls, [2, 4])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_done, job.created_count), (ImportJob.STATUS_RUNNING, 2, 2))
+        self.assertEqual(Item.objects.count(), 2)  # the overtaken chunk rolled back with its progress
+
+    def test_unreadable_row_is_reported_not_fatal(self):
+        job = self._enqueue(_items_csv(2) + b"Pumps,P\xff3,P-3\n", batch_size=2)
+        import_jobs.run_due()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertIsNone(job.total_rows)
+        self.assertEqual((job.rows_done, job.created_count, job.error_count), (2, 2, 1))
+        self.assertIn("Could not read the file after row 3", job.errors[0])
+
+    def test_deleting_a_job_removes_its_upload(self):
+        job = self._enqueue(_items_csv(1))
+        name = job.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            job.delete()
+        self.assertFalse(self.storage.exists(name))
+
+
+class QuizImageResultTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, CACHES=LOCMEM_CACHE)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        group = ProductGroup.objects.create(name="Pumps")
+        self.question = Question.objects.create(
+            group=group, text="Use?", image=SimpleUploadedFile("big.jpg", b"full-size", content_type="image/jpeg"),
+        )
+
+    def test_resized_copy_replaces_the_original_upload(self):
+        storage, source = self.question.image.storage, self.question.image.name
+        self.assertTrue(storage.exists(source))
+
+        written = quiz_media.apply_result(
+            Question, self.question.pk, source, result=(b"small", "question_images/big_resized.jpg", 10, 8)
+        )
+        self.assertTrue(written)
+        self.question.refresh_from_db()
+        self.assertEqual((self.question.image_width, self.question.image_height), (10, 8))
+        self.assertTrue(storage.exists(self.question.image.name))
+        self.assertFalse(storage.exists(source))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTests(TestCase):
+    """Views answer If-Modified-Since with 304 also when the page cache is bypassed."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = ProductGroup.objects.create(name="Pumps")
+            self.item = Item.objects.create(group=self.group, name="P1")
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "signed-in"  # skip the page cache
+
+    def _assert_not_modified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Page-Cache", response)
+        last_modified = response["Last-Modified"]
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # A catalog change a few seconds later (HTTP dates have one-second resolution)
+        ProductGroup.objects.filter(pk=self.group.pk).update(catalog_version=F("catalog_version") + 5_000_000)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_quiz_page(self):
+        self._assert_not_modified(reverse("configurator:quiz", kwargs={"slug": self.group.slug}))
+
+    def test_variant_builder(self):
+        self._assert_not_modified(
+            reverse("configurator:variant_builder", kwargs={"slug": self.group.slug, "item_id": self.item.pk})
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = ProductGroup.objects.create(name="Pumps")
+        self.quiz_url = reverse("configurator:quiz", kwargs={"slug": self.group.slug})
+        self.explore_url = reverse("configurator:group_explore", kwargs={"slug": self.group.slug})
+
+    def _csrf_token(self, response) -> str:
+        return re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+    def test_form_page_carries_each_clients_own_csrf_token(self):
+        first, second = Client(), Client()
+        response = first.get(self.quiz_url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        first_token = self._csrf_token(response)
+
+        response = second.get(self.quiz_url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        second_token = self._csrf_token(response)
+        self.assertNotIn(pagecache.CSRF_PLACEHOLDER.decode(), response.content.decode())
+
+        first_secret = first.cookies[settings.CSRF_COOKIE_NAME].value
+        second_secret = second.cookies[settings.CSRF_COOKIE_NAME].value
+        self.assertNotEqual(first_secret, second_secret)
+        self.assertTrue(_does_token_match(first_token, first_secret))
+        self.assertTrue(_does_token_match(second_token, second_secret))
+        self.assertFalse(_does_token_match(second_token, first_secret))
+
+    def test_form_pages_are_private_and_others_public(self):
+        response = self.client.get(self.quiz_url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertNotIn("public", response["Cache-Control"])
+
+        response = self.client.get(self.explore_url)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn(f"max-age={pagecache.PAGE_CACHE_MAX_AGE}", response["Cache-Control"])
+
+        for url in (self.quiz_url, self.explore_url):
+            for status in ("miss", "hit"):
+                response = self.client.get(url)
+                self.assertIn("Cookie", response["Vary"], (url, status))
+
+    def test_session_cookie_bypasses_cache(self):
+        self.client.get(self.explore_url)
+        self.assertEqual(self.client.get(self.explore_url)["X-Page-Cache"], "hit")
+
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "signed-in"
+        response = self.client.get(self.explore_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Page-Cache", response)
+
+    def test_version_bump_turns_hit_into_miss(self):
+        self.client.get(self.explore_url)
+        self.assertEqual(self.client.get(self.explore_url)["X-Page-Cache"], "hit")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pagecache.purge(pagecache.SITE_KEY)
+        self.assertEqual(self.client.get(self.explore_url)["X-Page-Cache"], "miss")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(group=self.group, name="P1")
+        self.assertEqual(self.client.get(self.explore_url)["X-Page-Cache"], "miss")
+        self.assertEqual(self.client.get(self.explore_url)["X-Page-Cache"], "hit")
+
+    def test_cached_page_answers_conditional_get(self):
+        response = self.client.get(self.explore_url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response = self.client.get(self.explore_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        response = self.client.get(self.explore_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.explore_url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+
+class _StubERPClient(ERPClient):
+    """Answers POSTs from a queue of status codes (or exceptions) instead of the network."""
+
+    def __init__(self, *answers):
+        super().__init__("https://erp.example.com", "key", "secret")
+        self.answers = list(answers)
+        self.posted = []
+
+    def post(self, path, **kwargs):
+        self.posted.append((path, kwargs["json"]))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        response = requests.Response()
+        response.status_code = answer
+        response._content = b"{}"
+        return response
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ERPOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            ERPSettings.objects.create(
+                is_enabled=True, base_url="https://erp.example.com", api_key="key", api_secret="secret",
+            )
+        patcher = mock.patch.object(outbox, "INLINE_THREAD", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _message(self, **fields):
+        return ERPOutbox.objects.create(kind=ERPOutbox.KIND_CONTACT, doctype="Lead", payload={"a": 1}, **fields)
+
+    def _deliver_due(self, *answers):
+        client = _StubERPClient(*answers)
+        with mock.patch.object(outbox, "client_for", return_value=client):
+            return outbox.deliver_due(), client
+
+    def test_backoff_doubles_from_base_and_is_capped(self):
+        self.assertEqual(
+            [outbox.backoff_delay(n).total_seconds() for n in (1, 2, 3, 4)],
+            [30, 60, 120, 240],
+        )
+        self.assertEqual(outbox.backoff_delay(50).total_seconds(), outbox.BACKOFF_MAX_SECONDS)
+
+    def test_failed_sends_are_rescheduled_with_backoff(self):
+        msg = self._message()
+        for attempt, answer in enumerate((503, requests.ConnectionError("down")), start=1):
+            before = timezone.now()
+            stats, _ = self._deliver_due(answer)
+            self.assertEqual(stats["failed"], 1)
+            msg.refresh_from_db()
+            self.assertEqual((msg.status, msg.attempts, msg.locked_at), (ERPOutbox.STATUS_PENDING, attempt, None))
+            delay = timedelta(seconds=30 * 2 ** (attempt - 1))
+            self.assertGreaterEqual(msg.next_attempt_at, before + delay)
+            self.assertLessEqual(msg.next_attempt_at, timezone.now() + delay)
+            # Not due again until the backoff has passed
+            self.assertEqual(self._deliver_due()[0], {"delivered": 0, "failed": 0, "skipped": 0})
+            ERPOutbox.objects.filter(pk=msg.pk).update(next_attempt_at=timezone.now())
+
+        stats, client = self._deliver_due(201)
+        self.assertEqual(stats["delivered"], 1)
+        msg.refresh_from_db()
+        self.assertEqual((msg.status, msg.attempts), (ERPOutbox.STATUS_DELIVERED, 3))
+        self.assertEqual(client.posted, [("api/resource/Lead", {"a": 1})])
+
+    def test_bad_request_is_dead_lettered(self):
+        msg = self._message()
+        self._deliver_due(400)
+        msg.refresh_from_db()
+        self.assertEqual((msg.status, msg.attempts, msg.response_status), (ERPOutbox.STATUS_DEAD, 1, 400))
+
+    def test_throttling_and_timeouts_are_retried(self):
+        for code in (429, 408):
+            msg = self._message()
+            self._deliver_due(code)
+            msg.refresh_from_db()
+            self.assertEqual((msg.status, msg.response_status), (ERPOutbox.STATUS_PENDING, code))
+
+    def test_retries_stop_after_max_attempts(self):
+        msg = self._message(attempts=outbox.MAX_ATTEMPTS - 1)
+        self._deliver_due(503)
+        msg.refresh_from_db()
+        self.assertEqual((msg.status, msg.attempts), (ERPOutbox.STATUS_DEAD, outbox.MAX_ATTEMPTS))
+
+    def test_held_lease_cannot_be_claimed_twice(self):
+        msg = self._message()
+        self.assertTrue(outbox._claim(msg.pk))
+        self.assertFalse(outbox._claim(msg.pk))
+        stats, client = self._deliver_due()
+        self.assertEqual(stats, {"delivered": 0, "failed": 0, "skipped": 0})
+        self.assertEqual(client.posted, [])
+
+        # A lease older than LEASE_SECONDS belongs to a dead worker and is taken over
+        stale = timezone.now() - timedelta(seconds=outbox.LEASE_SECONDS + 1)
+        ERPOutbox.objects.filter(pk=msg.pk).update(locked_at=stale)
+        stats, _ = self._deliver_due(200)
+        self.assertEqual(stats["delivered"], 1)
+
+
+class UnitParsingTests(SimpleTestCase):
+    def test_apparent_power_is_its_own_dimension(self):
+        self.assertEqual(units.normalize_spec("2", "kVA"), (2000.0, "VA"))
+        self.assertEqual(units.normalize_spec("500 VA"), (500.0, "VA"))
+        self.assertEqual(units.normalize_spec("2", "kW"), (2000.0, "W"))
+        self.assertEqual(units.normalize_spec("230", "VAC"), (230.0, "V"))
+
+    def test_bare_c_is_not_celsius(self):
+        self.assertEqual(units.normalize_spec("40", "°C"), (40.0, "°C"))
+        self.assertEqual(units.normalize_spec("40", "degC"), (40.0, "°C"))
+        self.assertEqual(units.normalize_spec("40", "c"), (40.0, "c"))
+        self.assertEqual(units.normalize_spec("40 C"), (None, ""))
+
+    def test_parse_number(self):
+        self.assertEqual(units.parse_number("1,200.5 W"), (1200.5, "W"))
+        self.assertEqual(units.parse_number(".5"), (0.5, ""))
+        self.assertEqual(units.parse_number("2e3"), (2000.0, ""))
+        self.assertEqual(units.parse_number("n/a"), (None, ""))
+
+    def test_non_finite_numbers_are_rejected(self):
+        for text in ("1e999", "-1e999"):
+            self.assertEqual(units.parse_number(text), (None, ""), text)
+            self.assertEqual(units.normalize_spec(text, "W"), (None, "W"), text)
+        for raw in ("nan", "inf", "-Infinity", "1e999"):
+            self.assertIsNone(forms._to_float(raw), raw)
+        self.assertEqual(forms._to_float("2.5"), 2.5)
+
+        ranges = views._ranges_from_query(
+            QueryDict("range__power_0=nan&range__power_1=1e999&range__speed_0=10&range__speed_1=inf")
+        )
+        self.assertEqual(ranges, {"power": (None, None), "speed": (10.0, None)})
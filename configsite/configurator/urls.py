@@ -6,6 +6,7 @@ from .views import (
     ContactView, contact_thanks,
     GroupExploreView, ItemDetailView,  # keep ItemDetailView (we link to it)
     VariantBuilderView,                # builder page
+    variant_facets_api,                # builder live narrowing (JSON)
 )
 
 app_name = "configurator"
@@ -22,6 +23,7 @@ urlpatterns = [
 
     # Variant builder for a given group+item
     path("<slug:slug>/<int:item_id>/builder/", VariantBuilderView.as_view(), name="variant_builder"),
+    path("<slug:slug>/<int:item_id>/builder/facets/", variant_facets_api, name="variant_facets_api"),
 
     # Item detail (we’ll link matches here, optionally with ?variant=<id>)
     path("item/<int:item_id>/", ItemDetailView.as_view(), name="item_detail"),
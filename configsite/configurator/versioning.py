@@ -0,0 +1,86 @@
+# configurator/versioning.py
+"""
+Tiny version-counter store used to invalidate per-worker caches.
+
+Each compiled structure (score matrix, question graph, ...) remembers the
+version it was built against. Signals bump the counter whenever the source
+rows change; every worker compares its local copy with the shared counter and
+rebuilds on mismatch. Counters live in the "versions" cache alias (the
+default cache when it is not configured) so that all workers pointing at the
+same backend see the bump, and so that culling of cached pages and payloads
+never drops a counter.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+
+KEY_PREFIX = "configurator:v"
+CACHE_ALIAS = "versions"
+
+
+def _cache():
+    return caches[CACHE_ALIAS if CACHE_ALIAS in settings.CACHES else "default"]
+
+
+def _key(namespace: str, key="") -> str:
+    return f"{KEY_PREFIX}:{namespace}:{key}"
+
+
+def _seed() -> int:
+    # Seed from the clock so a counter that was evicted never goes back to a
+    # value a worker may still hold in memory.
+    return time.time_ns() // 1000
+
+
+def get_version(namespace: str, key="") -> int:
+    """Return the current version for (namespace, key), creating it if missing."""
+    k = _key(namespace, key)
+    cache = _cache()
+    version = cache.get(k)
+    if version is None:
+        cache.add(k, _seed(), timeout=None)
+        version = cache.get(k) or _seed()
+    return version
+
+
+def get_versions(namespace: str, keys) -> dict:
+    """{key: version} for several keys of one namespace in a single cache round-trip."""
+    keys = list(keys)
+    found = _cache().get_many([_key(namespace, k) for k in keys])
+    return {
+        k: found.get(_key(namespace, k)) or get_version(namespace, k)
+        for k in keys
+    }
+
+
+def bump_version(namespace: str, key="") -> int:
+    """Move (namespace, key) to a new version; cached copies become stale."""
+    k = _key(namespace, key)
+    cache = _cache()
+    if not isinstance(cache, (FileBasedCache, DatabaseCache)):
+        try:
+            return cache.incr(k)
+        except ValueError:
+            pass
+    # Missing counter, or a backend whose incr is a get followed by a set (two
+    # concurrent bumps could land on the same value): write a fresh clock value
+    version = _seed()
+    cache.set(k, version, timeout=None)
+    return version
+
+
+def set_version(namespace: str, key, version: int) -> None:
+    """Publish a version computed elsewhere (e.g. a durable DB counter)."""
+    _cache().set(_key(namespace, key), version, timeout=None)
+
+
+def bump_version_on_commit(namespace: str, key="") -> None:
+    """
+    Bump once the surrounding transaction commits, so no worker can rebuild
+    from rows that are about to be rolled back (or are not visible yet).
+    """
+    transaction.on_commit(lambda: bump_version(namespace, key))
@@ -1,21 +1,44 @@
 # configurator/views.py
 from collections import defaultdict
+import hashlib
+import json
+import math
 from typing import Dict, List, Tuple, Optional
 import os
-import requests
 
 from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.core.files.storage import FileSystemStorage
-from django.db.models import Prefetch, Q
-from django.http import JsonResponse
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
-from django.utils.html import escape
-from django.utils.text import slugify
+from django.utils.cache import patch_cache_control
+from django.utils.html import escape, strip_tags
+from django.utils.http import http_date, urlencode
+from django.utils.text import Truncator
 from django.views import View
-
-from .careers_api import fetch_job_list, fetch_job_details, submit_applicant
+from django.views.decorators.http import condition
+
+from .careers_api import (
+    CAREERS_PAGE_SIZE,
+    JobQuery,
+    fetch_job_details,
+    fetch_job_facets,
+    query_jobs,
+    submit_applicant,
+)
+from .catalog import group_key, last_modified
+from .erp import get_erp_settings
+from .facets import cards_version, get_index, range_masks
+from .images import best_url
+from .navigation import get_navigation
+from .outbox import enqueue
+from .pagecache import cached_page
+from .scoring import score_choices
 from .forms import (
     QuizForm,
     ParticipantForm,
@@ -26,33 +49,55 @@ from .forms import (
 )
 from .models import (
     Answer,
-    ChoiceImpact,
     Item,
+    ItemVariant,
     ProductGroup,
     QuizSession,
     Page,
     ContactMessage,
     ERPSettings,
+    ERPOutbox,
+    JobOpening,
 )
 
 
 # -----------------------
-# Variant Builder Helpers
+# Page cache surrogate keys (see pagecache.py)
 # -----------------------
-def _label_slug_map(item: Item):
-    """
-    Build a mapping from slugified spec label -> original label(s).
-    Lets us translate the form's facet slugs back to actual VariantSpec.label.
-    """
-    slug2label = {}
-    variants = item.variants.filter(is_active=True).prefetch_related("specs")
-    for v in variants:
-        for s in v.specs.all():
-            label = (s.label or "").strip()
-            if not label:
-                continue
-            slug2label.setdefault(slugify(label), set()).add(label)
-    return slug2label
+def _with_last_modified(response, *stamps):
+    """Set Last-Modified from datetimes / catalog versions (latest wins)."""
+    latest = last_modified(*stamps, get_navigation().pages_modified)
+    if latest:
+        response["Last-Modified"] = http_date(latest.timestamp())
+    return response
+
+
+def _page_surrogate_keys(request, slug=None):
+    pages = Page.objects.filter(is_active=True)
+    pages = pages.filter(slug=slug) if slug else pages.filter(is_home=True)
+    return [f"page:{pk}" for pk in pages.values_list("pk", flat=True)[:1]]
+
+
+def _group_list_surrogate_keys(request):
+    return ["group-list"]
+
+
+def _group_surrogate_keys(request, slug):
+    # The group key carries its catalog version, so it covers items, variants and the quiz
+    group_id = ProductGroup.objects.filter(slug=slug).values_list("pk", flat=True).first()
+    return [group_key(group_id)] if group_id else []
+
+
+def _item_surrogate_keys(request, item_id):
+    group_id = Item.objects.filter(pk=item_id).values_list("group_id", flat=True).first()
+    return [f"item:{item_id}"] + ([group_key(group_id)] if group_id else [])
+
+
+# -----------------------
+# Variant Builder
+# -----------------------
+VARIANT_FACETS_TTL = getattr(settings, "VARIANT_FACETS_TTL", 60 * 60)
+VARIANT_CARDS_LIMIT = getattr(settings, "VARIANT_CARDS_LIMIT", 48)
 
 
 class VariantBuilderView(View):
@@ -65,10 +110,7 @@ class VariantBuilderView(View):
 
     def _get_group_item(self, slug, item_id):
         group = get_object_or_404(ProductGroup, slug=slug, is_active=True)
-        item = get_object_or_404(
-            Item.objects.prefetch_related("variants__images", "variants__specs"),
-            pk=item_id, group=group, is_active=True
-        )
+        item = get_object_or_404(Item, pk=item_id, group=group, is_active=True)
         return group, item
 
     def _augment_form_for_quiz_ui(self, form: VariantFacetForm):
@@ -84,13 +126,14 @@ class VariantBuilderView(View):
         group, item = self._get_group_item(slug, item_id)
         form = VariantFacetForm(item=item)
         self._augment_form_for_quiz_ui(form)
-        return render(request, self.template_name, {
+        response = render(request, self.template_name, {
             "group": group,
             "item": item,
             "form": form,
             "question_tags": getattr(form, "question_tags", []),
             "matches": None,  # quiz first (tri-state)
         })
+        return _with_last_modified(response, group.catalog_version)
 
     def post(self, request, slug, item_id):
         group, item = self._get_group_item(slug, item_id)
@@ -110,30 +153,22 @@ class VariantBuilderView(View):
         form = VariantFacetForm(item=item, data=request.POST)
         self._augment_form_for_quiz_ui(form)
 
-        matches = []
+        matches, closest = [], []
         if form.is_valid():
             # AND across facets; OR within a single facet's selected values
-            qs = item.variants.filter(is_active=True).prefetch_related("images", "specs").distinct()
-            slug2label = _label_slug_map(item)
-
-            for label_slug, pairs in form.selected_facets().items():
-                if not pairs:
-                    continue
-                labels = slug2label.get(label_slug, set())
-                if not labels:
-                    continue
-
-                # Build OR across (label, value, unit) tuples; accept any of the original labels
-                or_q = Q()
-                for (val, unit) in pairs:
-                    for label in labels:
-                        if unit:
-                            or_q |= Q(specs__label=label, specs__value=val, specs__unit=unit)
-                        else:
-                            or_q |= Q(specs__label=label, specs__value=val)
-                qs = qs.filter(or_q)
-
-            matches = list(qs.distinct())
+            ids = form.index.ids(form.matching_mask())
+            by_id = ItemVariant.objects.filter(pk__in=ids).prefetch_related("images").in_bulk()
+            matches = [by_id[vid] for vid in ids if vid in by_id]
+
+            if not matches:
+                # Nothing satisfies every facet: offer the nearest variants instead
+                ranked = form.closest_matches()
+                by_id = ItemVariant.objects.filter(pk__in=[vid for vid, _, _ in ranked]).prefetch_related("images").in_bulk()
+                for vid, score, criteria in ranked:
+                    if vid in by_id:
+                        v = by_id[vid]
+                        v.match_score, v.match_criteria = score, criteria
+                        closest.append(v)
 
         return render(request, self.template_name, {
             "group": group,
@@ -141,9 +176,133 @@ class VariantBuilderView(View):
             "form": form,
             "question_tags": getattr(form, "question_tags", []),
             "matches": matches,  # results (may be empty)
+            "closest": closest,  # nearest variants when matches is empty
         })
 
 
+def _selection_from_query(params) -> Dict[str, List[Tuple[str, str]]]:
+    """facet__<slug>=<value>||<unit> query params -> {slug: [(value, unit), ...]}"""
+    out = {}
+    for name in params:
+        if name.startswith("facet__"):
+            out[name[len("facet__"):]] = [
+                tuple(token.split("||", 1)) for token in params.getlist(name) if "||" in token
+            ]
+    return out
+
+
+def _ranges_from_query(params) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """range__<slug>_0=<min>&range__<slug>_1=<max> (RangeWidget names) -> {slug: (min, max)}"""
+    def bound(raw):
+        try:
+            value = float(raw) if raw else None
+        except ValueError:
+            return None
+        return value if value is None or math.isfinite(value) else None  # "nan"/"inf" parse too
+
+    slugs = {name[len("range__"):-2] for name in params if name.startswith("range__") and name[-2:] in ("_0", "_1")}
+    return {
+        slug: (bound(params.get(f"range__{slug}_0")), bound(params.get(f"range__{slug}_1")))
+        for slug in slugs
+    }
+
+
+def _variant_facets_key(item_id, params):
+    index = get_index(item_id)
+    selection = index.normalize(_selection_from_query(params))
+    ranges = index.normalize_ranges(_ranges_from_query(params))
+    digest = hashlib.sha1(json.dumps([selection, ranges], sort_keys=True).encode()).hexdigest()
+    key = f"configurator:variant-facets:{item_id}:{index.version}:{cards_version(item_id)}:{digest}"
+    return index, selection, ranges, key
+
+
+def _variant_cards(item_id, ids):
+    variants = (
+        ItemVariant.objects.filter(pk__in=ids)
+        .only("id", "name", "description")
+        .prefetch_related("images")
+        .in_bulk()
+    )
+    detail_url = reverse("configurator:item_detail", kwargs={"item_id": item_id})
+    cards = []
+    for vid in ids:
+        v = variants.get(vid)
+        if v is None:
+            continue
+        images = v.images.all()
+        cards.append({
+            "id": v.pk,
+            "name": v.name,
+            "url": f"{detail_url}?variant={v.pk}",
+            "image": best_url(images[0].image, images[0].derivatives) if images else None,
+            "summary": Truncator(strip_tags(v.description or "")).chars(120),
+        })
+    return cards
+
+
+def _facets_item_exists(slug, item_id) -> bool:
+    return Item.objects.filter(pk=item_id, group__slug=slug, group__is_active=True, is_active=True).exists()
+
+
+def _variant_facets_etag(request, slug, item_id):
+    # No ETag (so no 304, and no index compiled) for a missing or inactive item; the view 404s
+    if not _facets_item_exists(slug, item_id):
+        return None
+    return hashlib.sha1(_variant_facets_key(item_id, request.GET)[-1].encode()).hexdigest()
+
+
+@condition(etag_func=_variant_facets_etag)
+def variant_facets_api(request, slug, item_id):
+    """
+    JSON twin of VariantBuilderView for live narrowing: matching variant ids,
+    summary cards and per-value counts for the current facet selection.
+    Responses are cached per (item, normalized selection, index version).
+    """
+    if not _facets_item_exists(slug, item_id):
+        raise Http404("Item not found")
+
+    index, selection, ranges, key = _variant_facets_key(item_id, request.GET)
+    payload = cache.get(key)
+    if payload is None:
+        masks = range_masks(index, ranges)
+        ids = index.ids(index.match(selection, masks=masks))
+        counts = index.counts(selection, masks=masks)
+        payload = {
+            "item": item_id,
+            "selection": {slug: [f"{v}||{u}" for v, u in pairs] for slug, pairs in selection.items()},
+            "ranges": {slug: {"min": low, "max": high} for slug, (low, high) in ranges.items()},
+            "total": len(index.variant_ids),
+            "count": len(ids),
+            "variant_ids": ids,
+            "variants": _variant_cards(item_id, ids[:VARIANT_CARDS_LIMIT]),
+            "closest": [],
+            "facets": {
+                slug: {f"{v}||{u}": n for (v, u), n in values.items()}
+                for slug, values in counts.items()
+            },
+            "range_facets": {
+                slug: {
+                    "min": f.range.to_display(f.range.low),
+                    "max": f.range.to_display(f.range.high),
+                    "unit": f.range.display_unit,
+                }
+                for slug, f in index.facets.items() if f.range
+            },
+        }
+        if not ids:
+            ranked = index.nearest(selection, ranges)
+            cards = {c["id"]: c for c in _variant_cards(item_id, [vid for vid, _, _ in ranked])}
+            payload["closest"] = [
+                dict(cards[vid], score=round(score, 3), criteria=criteria)
+                for vid, score, criteria in ranked if vid in cards
+            ]
+        cache.set(key, payload, VARIANT_FACETS_TTL)
+
+    response = JsonResponse(payload)
+    patch_cache_control(response, no_cache=True, public=True)
+    return response
+
+
 # -----------------------
 # Group Explore / Item Detail
 # -----------------------
@@ -153,6 +312,7 @@ class GroupExploreView(View):
     """
     template_name = "configurator/explore.html"
 
+    @cached_page(_group_surrogate_keys)
     def get(self, request, slug):
         group = get_object_or_404(ProductGroup, slug=slug, is_active=True)
         items = (
@@ -160,12 +320,14 @@ class GroupExploreView(View):
             .prefetch_related("images", "features", "specs", "documents")
             .order_by("name")
         )
-        return render(request, self.template_name, {"group": group, "items": items})
+        response = render(request, self.template_name, {"group": group, "items": items})
+        return _with_last_modified(response, group.catalog_version)
 
 
 class ItemDetailView(View):
     template_name = "configurator/item_detail.html"
 
+    @cached_page(_item_surrogate_keys, query_params=("variant",))
     def get(self, request, item_id):
         item = get_object_or_404(
             Item.objects.prefetch_related("images", "features", "specs", "documents", "group"),
@@ -173,11 +335,12 @@ class ItemDetailView(View):
         )
         # NEW: accept ?variant=<id> to optionally highlight/preselect on the page
         selected_variant_id = request.GET.get("variant")
-        return render(
+        response = render(
             request,
             self.template_name,
             {"item": item, "group": item.group, "selected_variant_id": selected_variant_id},
         )
+        return _with_last_modified(response, item.group.catalog_version)
 
     def post(self, request, item_id):
         """Handle Get Quote from item detail (no quiz data)."""
@@ -212,35 +375,23 @@ class ItemDetailView(View):
             f"Phone: {escape(cd.get('phone') or '-') if cd.get('phone') else '-'}"
         )
 
-        # Post to ERP (same pattern you already use in quiz contact step)
-        try:
-            erp = ERPSettings.objects.first()
-            if erp and erp.is_enabled:
-                url = erp.base_url.rstrip("/") + f"/api/resource/{erp.lead_doctype}"
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"token {erp.api_key}:{erp.api_secret}",
-                }
-
-                payload = {
-                    "doctype": erp.lead_doctype,
-                    "naming_series": erp.naming_series,
-                    "source": erp.source,
-                    "contact_email_id": cd.get("email"),
-                    "new_customer_name": cd.get("company") or "",
-                    "contact_number": cd.get("phone") or "",
-                    "contact_person": cd.get("name") or "",
-                    "interested_product": f"{html_table}<br>{designation_note}",
-                }
-                resp = requests.post(url, headers=headers, json=payload, allow_redirects=False, timeout=15)
-                if 200 <= resp.status_code < 300:
-                    messages.success(request, "Thanks! Your request has been sent.")
-                else:
-                    messages.warning(request, f"Saved locally, but ERP push failed ({resp.status_code}).")
-            else:
-                messages.success(request, "Thanks! Your request has been noted.")
-        except Exception as e:
-            messages.warning(request, f"Saved locally, but ERP push failed: {e}")
+        # Queue for the ERP; the outbox worker delivers it with retries
+        erp = get_erp_settings()
+        if erp and erp.is_enabled:
+            payload = {
+                "doctype": erp.lead_doctype,
+                "naming_series": erp.naming_series,
+                "source": erp.source,
+                "contact_email_id": cd.get("email"),
+                "new_customer_name": cd.get("company") or "",
+                "contact_number": cd.get("phone") or "",
+                "contact_person": cd.get("name") or "",
+                "interested_product": f"{html_table}<br>{designation_note}",
+            }
+            enqueue(ERPOutbox.KIND_QUOTE, erp.lead_doctype, payload)
+            messages.success(request, "Thanks! Your request has been received and queued for our team.")
+        else:
+            messages.success(request, "Thanks! Your request has been noted.")
 
         # Re-render with success banner; form clears
         return render(request, self.template_name, {"item": item, "group": item.group})
@@ -262,24 +413,20 @@ class ContactView(View):
             return render(request, self.template_name, {"form": form})
 
         cd = form.cleaned_data
-        ContactMessage.objects.create(
-            name=cd["name"],
-            email=cd["email"],
-            phone=cd.get("phone", ""),
-            subject=cd.get("subject", ""),
-            message=cd["message"],
-        )
+        erp = get_erp_settings()
+
+        # Local record and ERP outbox row commit (or roll back) together
+        with transaction.atomic():
+            contact = ContactMessage.objects.create(
+                name=cd["name"],
+                email=cd["email"],
+                phone=cd.get("phone", ""),
+                subject=cd.get("subject", ""),
+                message=cd["message"],
+            )
 
-        # Optional: push into ERP as a Note/Lead-equivalent (depends on your ERP doctype)
-        try:
-            erp = ERPSettings.objects.first()
+            # Optional: push into ERP as a Note/Lead-equivalent (depends on your ERP doctype)
             if erp and erp.is_enabled:
-                url = erp.base_url.rstrip("/") + f"/api/resource/{erp.lead_doctype}"
-                headers = {
-                    "Content-Type": "application/json",
-                    "Authorization": f"token {erp.api_key}:{erp.api_secret}",
-                }
-
                 state = (request.POST.get("state") or "").strip()
                 contact_person = (request.POST.get("contact_person") or "").strip()
                 contact_number = (request.POST.get("contact_number") or cd.get("phone", "")).strip()
@@ -297,22 +444,9 @@ class ContactView(View):
                     "contact_number": contact_number,
                     "remark": remark,
                 }
+                enqueue(ERPOutbox.KIND_CONTACT, erp.lead_doctype, form_data, contact_message=contact)
 
-                resp = requests.post(url, headers=headers, json=form_data, timeout=15)
-                try:
-                    print("ERP Visitors POST:", resp.status_code, resp.text[:400])
-                except Exception:
-                    pass
-
-                if 200 <= resp.status_code < 300:
-                    messages.success(request, "Thanks! We’ve received your message.")
-                else:
-                    messages.warning(request, f"Saved locally, but ERP push failed ({resp.status_code}).")
-            else:
-                messages.success(request, "Thanks! We’ve received your message.")
-        except Exception as e:
-            messages.warning(request, f"Saved locally, but ERP push failed: {e}")
-
+        messages.success(request, "Thanks! We’ve received your message.")
         return redirect("configurator:contact_thanks")
 
 
@@ -321,6 +455,7 @@ def contact_thanks(request):
 
 
 class PageView(View):
+    @cached_page(_page_surrogate_keys)
     def get(self, request, slug=None):
         if not slug:
             page = Page.objects.filter(is_active=True, is_home=True).first()
@@ -332,7 +467,8 @@ class PageView(View):
         if page.external_url:
             return redirect(page.external_url)
 
-        return render(request, "configurator/detail.html", {"page": page})
+        response = render(request, "configurator/detail.html", {"page": page})
+        return _with_last_modified(response, page.updated_at)
 
 
 # -----------------------
@@ -343,33 +479,54 @@ class CareerListView(View):
         search_query = (request.GET.get("search", "") or "").strip().lower()
         qualification_filter = (request.GET.get("qualification", "") or "").strip()
         location_filter = (request.GET.get("location", "") or "").strip()
-
         try:
-            jobs = fetch_job_list()
-        except RuntimeError as e:
-            messages.error(request, str(e))
-            jobs = []
-
-        qualification_options = sorted({j.get("designation", "") for j in jobs if j.get("designation")})
-        location_options = sorted({j.get("territory", "") for j in jobs if j.get("territory")})
-
-        filtered = []
-        for job in jobs:
-            nm = (job.get("name") or "").lower()
-            ds = (job.get("designation") or "").lower()
-            if search_query and (search_query not in nm and search_query not in ds):
-                continue
-            if qualification_filter and job.get("designation", "") != qualification_filter:
-                continue
-            if location_filter and job.get("territory", "") != location_filter:
-                continue
-            filtered.append(job)
-
+            page_number = max(int(request.GET.get("page", 1)), 1)
+        except (TypeError, ValueError):
+            page_number = 1
+
+        if JobOpening.objects.exists():
+            # Local mirror (kept fresh by `manage.py sync_job_openings`)
+            open_jobs = JobOpening.objects.open()
+            qualification_options = list(
+                open_jobs.exclude(designation="").order_by("designation")
+                .values_list("designation", flat=True).distinct()
+            )
+            location_options = list(
+                open_jobs.exclude(territory="").order_by("territory")
+                .values_list("territory", flat=True).distinct()
+            )
+            qs = open_jobs
+            if search_query:
+                qs = qs.filter(Q(name__icontains=search_query) | Q(designation__icontains=search_query))
+            if qualification_filter:
+                qs = qs.filter(designation=qualification_filter)
+            if location_filter:
+                qs = qs.filter(territory=location_filter)
+            page_obj = Paginator(qs, CAREERS_PAGE_SIZE).get_page(page_number)
+        else:
+            # Not synced yet: filtered + paginated query against the ERP (cached)
+            facets = fetch_job_facets()
+            qualification_options = facets["designations"]
+            location_options = facets["territories"]
+            page_obj = query_jobs(JobQuery(
+                search=search_query,
+                designation=qualification_filter,
+                territory=location_filter,
+                page=page_number,
+            ))
+
+        filter_params = {
+            k: v for k, v in (
+                ("search", search_query), ("qualification", qualification_filter), ("location", location_filter)
+            ) if v
+        }
         return render(
             request,
             "careers/job_list.html",
             {
-                "jobs": filtered,
+                "jobs": list(page_obj),
+                "page_obj": page_obj,
+                "filter_query": urlencode(filter_params),
                 "qualification_options": qualification_options,
                 "locations": location_options,
                 "search": search_query,
@@ -381,7 +538,8 @@ class CareerListView(View):
 
 class CareerDetailView(View):
     def get(self, request, job_id: str):
-        job = fetch_job_details(job_id)
+        # Local mirror first; the ERP only for jobs not synced yet
+        job = JobOpening.objects.filter(name=job_id).first() or fetch_job_details(job_id)
         if not job:
             return render(request, "careers/not_found.html", status=404)
         return render(request, "careers/job_details.html", {"job": job})
@@ -453,56 +611,33 @@ class CareerTermsView(View):
 # -----------------------
 # Menus API
 # -----------------------
+def _product_menu_etag(request):
+    return get_navigation().etag
+
+
+@condition(etag_func=_product_menu_etag)
 def product_menu_api(request):
-    groups = (
-        ProductGroup.objects.filter(is_active=True)
-        .order_by("name")
-        .prefetch_related(
-            Prefetch(
-                "items",
-                queryset=Item.objects.filter(is_active=True)
-                .only("id", "name")
-                .order_by("name"),
-                to_attr="menu_items",
-            )
-        )
-    )
-    data = []
-    for g in groups:
-        items = [{"name": it.name} for it in getattr(g, "menu_items", [])]
-        if items:
-            data.append({"name": g.name, "slug": g.slug, "items": items})
-    return JsonResponse({"groups": data})
+    # `condition` answers If-None-Match with 304; no-cache makes browsers revalidate
+    response = JsonResponse(get_navigation().product_menu)
+    patch_cache_control(response, no_cache=True, public=True)
+    return response
 
 
 # -----------------------
 # Quiz flow
 # -----------------------
-def _score_items_from_session(session: QuizSession) -> Tuple[
+def _score_items(group_id: int, choice_ids) -> Tuple[
     Dict[int, float], Dict[int, Item], Optional[Item], List[Tuple[Item, float]], List[Item]
 ]:
     """
-    Recompute scores from persisted answers.
+    Score selected choices against the group's precompiled matrix.
     Returns: (scores, items_by_id, recommended_item, breakdown, top_items)
     """
-    answers_qs = session.answers.select_related("choice__question").prefetch_related(
-        Prefetch("choice__impacts", queryset=ChoiceImpact.objects.select_related("item"))
-    )
-
-    scores: Dict[int, float] = defaultdict(float)
-
-    for ans in answers_qs:
-        q = ans.choice.question
-        if hasattr(q, "affects_score") and not q.affects_score:
-            continue
-        for impact in ans.choice.impacts.all():
-            item = impact.item
-            if item.is_active and item.group_id == session.group_id:
-                scores[item.id] += impact.score
+    scores: Dict[int, float] = score_choices(group_id, choice_ids)
 
     items_by_id: Dict[int, Item] = {}
     if scores:
-        items = Item.objects.filter(id__in=scores.keys(), group=session.group, is_active=True)
+        items = Item.objects.filter(id__in=scores.keys(), group_id=group_id, is_active=True)
         items_by_id = {it.id: it for it in items}
 
     recommended_item: Optional[Item] = None
@@ -510,9 +645,10 @@ def _score_items_from_session(session: QuizSession) -> Tuple[
     top_items: List[Item] = []
 
     if scores and items_by_id:
-        breakdown = [(items_by_id[iid], sc) for iid, sc in scores.items()]
+        breakdown = [(items_by_id[iid], sc) for iid, sc in scores.items() if iid in items_by_id]
         breakdown.sort(key=lambda t: (-t[1], t[0].name))
 
+    if breakdown:
         max_score = breakdown[0][1]
         top_items = [it for it, sc in breakdown if sc == max_score]
         recommended_item = sorted(top_items, key=lambda it: it.name)[0] if top_items else None
@@ -520,6 +656,49 @@ def _score_items_from_session(session: QuizSession) -> Tuple[
     return scores, items_by_id, recommended_item, breakdown, top_items
 
 
+def _score_items_from_session(session: QuizSession):
+    """Recompute scores from persisted answers (one flat query for the choice ids)."""
+    choice_ids = session.answers.values_list("choice_id", flat=True)
+    return _score_items(session.group_id, list(choice_ids))
+
+
+# Other products shown under the recommendation
+RESULT_FAMILY_SIZE = 8
+
+
+def _result_context(group: ProductGroup, scored, **extra) -> dict:
+    """
+    Read-model for result.html, built in a fixed number of queries however many
+    items matched: recommended items get images/features/documents/specs
+    prefetched plus a `has_variants` flag, the family strip gets its images.
+    `scored` is the tuple returned by _score_items().
+    """
+    _, _, recommended_item, breakdown, top_items = scored
+
+    prefetch_related_objects(top_items, "images", "features", "documents", "specs")
+    top_ids = [it.id for it in top_items]
+    with_variants = set(
+        ItemVariant.objects.filter(item_id__in=top_ids).values_list("item_id", flat=True).distinct()
+    ) if top_ids else set()
+    for it in top_items:
+        it.has_variants = it.id in with_variants
+
+    family = list(
+        Item.objects.filter(group=group, is_active=True)
+        .exclude(id__in=top_ids)
+        .prefetch_related("images")[:RESULT_FAMILY_SIZE]
+    )
+
+    return {
+        "group": group,
+        "recommended_items": top_items,
+        "recommended_item": recommended_item,
+        "breakdown": breakdown,
+        "family_items": family,
+        **extra,
+    }
+
+
 def _flatten_selected_choices(cleaned_data):
     """Return a list of selected Choice instances from cleaned_data (single + multi)."""
     selected = []
@@ -534,34 +713,22 @@ def _flatten_selected_choices(cleaned_data):
 
 
 class GroupListView(View):
+    @cached_page(_group_list_surrogate_keys)
     def get(self, request):
+        # hero_url / active_item_count are maintained by signals (catalog.refresh_group_summary)
         groups = (
             ProductGroup.objects.filter(is_active=True)
-            .prefetch_related(
-                Prefetch("items", queryset=Item.objects.filter(is_active=True).prefetch_related("images"))
-            )
+            .only("id", "name", "slug", "hero_url", "active_item_count", "catalog_version")
             .order_by("name")
         )
 
-        groups_ctx = []
-        for g in groups:
-            hero_url = None
-            if getattr(g, "hero_image", None) and g.hero_image:
-                hero_url = g.hero_image.url
-            else:
-                for it in g.items.all():
-                    img = next(iter(it.images.all()), None)
-                    if img:
-                        hero_url = img.image.url
-                        break
-
-            groups_ctx.append({
-                "obj": g,
-                "hero_url": hero_url,
-                "items_count": g.items.count(),
-            })
+        groups_ctx = [
+            {"obj": g, "hero_url": g.hero_url or None, "items_count": g.active_item_count}
+            for g in groups
+        ]
 
-        return render(request, "configurator/group_list.html", {"groups_ctx": groups_ctx})
+        response = render(request, "configurator/group_list.html", {"groups_ctx": groups_ctx})
+        return _with_last_modified(response, *(g.catalog_version for g in groups))
 
 
 class QuizView(View):
@@ -571,17 +738,83 @@ class QuizView(View):
       - POST step='contact': save participant info, push Lead to ERP, re-render result.
     """
 
+    @staticmethod
+    def _erp_lead_payload(erp: ERPSettings, session: QuizSession, interested_ids) -> dict:
+        """Build the ERP lead payload (HTML summary of products + selections)."""
+        # 1) Resolve interested items
+        interested_items = list(
+            Item.objects.filter(id__in=interested_ids).values_list("name", flat=True)
+        )
+
+        # 2) Build "Interested Products" rows
+        interested_rows = "".join(
+            f"<tr><td>Interested Product</td><td>{escape(name)}</td></tr>"
+            for name in interested_items
+        ) or "<tr><td>Interested Product</td><td>(not specified)</td></tr>"
+
+        # 3) Gather selected choices grouped by question
+        answers = (
+            session.answers
+            .select_related("question", "choice")
+            .order_by("question__order", "choice__order", "id")
+        )
+
+        by_question = defaultdict(list)
+        for ans in answers:
+            q_label = (ans.question.question_tag or ans.question.text or "").strip()
+            c_label = (ans.choice.text or "").strip()
+            if q_label and c_label:
+                by_question[q_label].append(c_label)
+
+        # 4) Build "Your selections" rows
+        selection_rows = "".join(
+            f"<tr><td>{escape(q)}</td><td>{escape(', '.join(choices))}</td></tr>"
+            for q, choices in by_question.items()
+        ) or "<tr><td>User selections</td><td>(none)</td></tr>"
+
+        # 5) Final HTML table
+        html_table = (
+            "<table border='1' style='border-collapse:collapse;'>"
+            "<tr><th>Requirement</th><th>Details</th></tr>"
+            f"{interested_rows}"
+            "<tr><th colspan='2' style='text-align:left;background:#f6f6f6;'>Your selections</th></tr>"
+            f"{selection_rows}"
+            "</table>"
+        )
+
+        # 6) Contact info note
+        designation_note = (
+            f"Name: {escape(session.name)}<br>"
+            f"Designation: {escape(session.designation or '-')}<br>"
+            f"Company: {escape(session.company or '-')}<br>"
+            f"Phone: {escape(session.phone or '-')}"
+        )
+
+        return {
+            "doctype": erp.lead_doctype,
+            "naming_series": erp.naming_series,
+            "source": erp.source,
+            "status": erp.status,
+            "contact_email_id": session.email,
+            "new_customer_name": session.company or "",
+            "contact_number": session.phone or "",
+            "contact_person": session.name or "",
+            "interested_product": f"{html_table}<br>{designation_note}",
+        }
+
+    @cached_page(_group_surrogate_keys)
     def get(self, request, slug):
         group = get_object_or_404(ProductGroup, slug=slug, is_active=True)
         form = QuizForm(group=group)
-        questions = group.questions.order_by("order")
-        question_tags = questions.values_list("question_tag", flat=True)
+        # One tag per rendered panel, from the same compiled graph as the form
+        question_tags = form.graph.question_tags()
 
-        return render(request, "configurator/quiz.html", {
+        response = render(request, "configurator/quiz.html", {
             "group": group,
             "form": form,
             "question_tags": question_tags,
         })
+        return _with_last_modified(response, group.catalog_version)
 
     def post(self, request, slug):
         group = get_object_or_404(ProductGroup, slug=slug, is_active=True)
@@ -604,135 +837,53 @@ class QuizView(View):
                 session.company = data.get("company", "")
                 interested_ids = request.POST.getlist("interested_items")
                 setattr(session, "notes", f"Interested in item IDs: {', '.join(interested_ids)}")
-                try:
+
+                erp = get_erp_settings()
+                outbox_msg = None
+                with transaction.atomic():
                     session.save(update_fields=["name", "email", "phone", "designation", "company"])
-                except Exception:
-                    session.save()
 
-                # --- ERP INTEGRATION ---
-                try:
-                    erp = ERPSettings.objects.first()
+                    # --- ERP INTEGRATION (queued in the same transaction) ---
                     if erp and erp.is_enabled:
-                        # 1) Resolve interested items
-                        interested_items = list(
-                            Item.objects.filter(id__in=interested_ids).values_list("name", flat=True)
-                        )
-
-                        # 2) Build "Interested Products" rows
-                        interested_rows = "".join(
-                            f"<tr><td>Interested Product</td><td>{escape(name)}</td></tr>"
-                            for name in interested_items
-                        ) or "<tr><td>Interested Product</td><td>(not specified)</td></tr>"
-
-                        # 3) Gather selected choices grouped by question
-                        answers = (
-                            session.answers
-                            .select_related("question", "choice")
-                            .order_by("question__order", "choice__order", "id")
-                        )
-
-                        by_question = defaultdict(list)
-                        for ans in answers:
-                            q_label = (ans.question.question_tag or ans.question.text or "").strip()
-                            c_label = (ans.choice.text or "").strip()
-                            if q_label and c_label:
-                                by_question[q_label].append(c_label)
-
-                        # 4) Build "Your selections" rows
-                        selection_rows = "".join(
-                            f"<tr><td>{escape(q)}</td><td>{escape(', '.join(choices))}</td></tr>"
-                            for q, choices in by_question.items()
-                        ) or "<tr><td>User selections</td><td>(none)</td></tr>"
-
-                        # 5) Final HTML table
-                        html_table = (
-                            "<table border='1' style='border-collapse:collapse;'>"
-                            "<tr><th>Requirement</th><th>Details</th></tr>"
-                            f"{interested_rows}"
-                            "<tr><th colspan='2' style='text-align:left;background:#f6f6f6;'>Your selections</th></tr>"
-                            f"{selection_rows}"
-                            "</table>"
-                        )
-
-                        # 6) Contact info note
-                        designation_note = (
-                            f"Name: {escape(session.name)}<br>"
-                            f"Designation: {escape(session.designation or '-')}<br>"
-                            f"Company: {escape(session.company or '-')}<br>"
-                            f"Phone: {escape(session.phone or '-')}"
+                        payload = self._erp_lead_payload(erp, session, interested_ids)
+                        outbox_msg = enqueue(
+                            ERPOutbox.KIND_QUIZ_LEAD, erp.lead_doctype, payload, quiz_session=session
                         )
+                    # --- /ERP INTEGRATION ---
 
-                        url = erp.base_url.rstrip("/") + f"/api/resource/{erp.lead_doctype}"
-                        headers = {
-                            "Content-Type": "application/json",
-                            "Authorization": f"token {erp.api_key}:{erp.api_secret}",
-                        }
-                        payload = {
-                            "doctype": erp.lead_doctype,
-                            "naming_series": erp.naming_series,
-                            "source": erp.source,
-                            "status": erp.status,
-                            "contact_email_id": session.email,
-                            "new_customer_name": session.company or "",
-                            "contact_number": session.phone or "",
-                            "contact_person": session.name or "",
-                            "interested_product": f"{html_table}<br>{designation_note}",
-                        }
-
-
-                        resp = requests.post(
-                            url, headers=headers, json=payload, allow_redirects=False, timeout=15
-                        )
-                        request.erp_push_ok = (200 <= resp.status_code < 300)
-                        request.erp_push_status = resp.status_code
-                    else:
-                        request.erp_push_ok = False
-                        request.erp_push_status = "ERP disabled or not configured"
-                except Exception as e:
+                if outbox_msg:
+                    request.erp_push_ok = outbox_msg.is_delivered
+                    request.erp_push_status = outbox_msg.get_status_display()
+                else:
                     request.erp_push_ok = False
-                    request.erp_push_status = f"ERP error: {e}"
-                # --- /ERP INTEGRATION ---
+                    request.erp_push_status = "ERP disabled or not configured"
 
                 # Recompute recommendation so result page stays consistent
-                _, _, recommended_item, breakdown, top_items = _score_items_from_session(session)
-                family = Item.objects.filter(group=group, is_active=True).exclude(
-                    id__in=[it.id for it in top_items]
-                )[:8]
-
                 return render(
                     request,
                     "configurator/result.html",
-                    {
-                        "group": group,
-                        "recommended_items": top_items,
-                        "recommended_item": recommended_item,
-                        "breakdown": breakdown,
-                        "family_items": family,
-                        "session": session,
-                        "quote_submitted": True,  # flag for UI
-                        "erp_push_ok": getattr(request, "erp_push_ok", None),
-                        "erp_push_status": getattr(request, "erp_push_status", None),
-                    },
+                    _result_context(
+                        group,
+                        _score_items_from_session(session),
+                        session=session,
+                        quote_submitted=True,  # flag for UI
+                        erp_push_ok=getattr(request, "erp_push_ok", None),
+                        erp_push_status=getattr(request, "erp_push_status", None),
+                        erp_delivery=outbox_msg,
+                    ),
                 )
 
             # Invalid contact form → re-render result with errors but keep prior recs
-            _, _, recommended_item, breakdown, top_items = _score_items_from_session(session)
-            family = Item.objects.filter(group=group, is_active=True).exclude(
-                id__in=[it.id for it in top_items]
-            )[:8]
             return render(
                 request,
                 "configurator/result.html",
-                {
-                    "group": group,
-                    "recommended_items": top_items,
-                    "recommended_item": recommended_item,
-                    "breakdown": breakdown,
-                    "family_items": family,
-                    "session": session,
-                    "quote_submitted": False,
-                    "contact_form": form,
-                },
+                _result_context(
+                    group,
+                    _score_items_from_session(session),
+                    session=session,
+                    quote_submitted=False,
+                    contact_form=form,
+                ),
             )
 
         # ------------------------------
@@ -743,30 +894,21 @@ class QuizView(View):
             return render(request, "configurator/quiz.html", {"group": group, "form": quiz_form})
 
         choices = _flatten_selected_choices(quiz_form.cleaned_data)
-        session = QuizSession.objects.create(group=group, recommended_item=None)
-        for ch in choices:
-            Answer.objects.create(session=session, question=ch.question, choice=ch)
-
-        _, _, recommended_item, breakdown, top_items = _score_items_from_session(session)
 
-        if recommended_item and session.recommended_item_id != recommended_item.id:
-            session.recommended_item = recommended_item
-            session.save(update_fields=["recommended_item"])
+        # Score first so the session row is written once, already carrying its
+        # recommendation; then the answers go in as a single bulk insert.
+        scored = _score_items(group.id, [ch.id for ch in choices])
+        recommended_item = scored[2]
 
-        family = Item.objects.filter(group=group, is_active=True).exclude(
-            id__in=[it.id for it in top_items]
-        )[:8]
+        with transaction.atomic():
+            session = QuizSession.objects.create(group=group, recommended_item=recommended_item)
+            Answer.objects.bulk_create([
+                Answer(session=session, question_id=ch.question_id, choice=ch)
+                for ch in choices
+            ])
 
         return render(
             request,
             "configurator/result.html",
-            {
-                "group": group,
-                "recommended_items": top_items,
-                "recommended_item": recommended_item,
-                "breakdown": breakdown,
-                "family_items": family,
-                "session": session,
-                "quote_submitted": False,
-            },
+            _result_context(group, scored, session=session, quote_submitted=False),
         )